@@ -0,0 +1,13 @@
+from django.urls import path
+from . import async_views
+
+# Read-only endpoints with an async implementation, served first under ASGI.
+urlpatterns = [
+    path('posts/', async_views.post_list),
+    path('posts/<int:pk>/', async_views.post_detail),
+    path('posts/<int:post_pk>/comments/', async_views.comment_list),
+    path('authors/', async_views.author_list),
+    path('authors/<int:pk>/', async_views.author_detail),
+    path('followers/', async_views.followers),
+    path('followings/', async_views.followings),
+]
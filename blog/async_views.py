@@ -0,0 +1,142 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ObjectDoesNotExist, SynchronousOnlyOperation
+from django.http import HttpResponse
+from django.urls import resolve
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from . import views
+from .authentication import ClaimsJWTAuthentication
+from .cache import CACHE_TIMEOUT, CachedResponseMixin, get_cache, get_generations, response_cache_key, stats
+from .compiled import CompiledListMixin
+from .conditional import ConditionalGetMixin, aaggregate_validators, not_modified, set_validators
+from .pagination import DefaultPaginationClass
+from .queries import endpoint_name
+from .renderers import StreamingJSONRenderer
+from .serializers import SimpleAuthorSerializer
+from .threads import build_comment_tree
+
+
+async def fallback(request):
+    """Serve the request with the DRF view the synchronous URLconf routes it to."""
+    match = resolve(request.path_info, urlconf=settings.ROOT_URLCONF)
+    request.resolver_match = match
+    request.query_endpoint = endpoint_name(match.func, request.method)
+    return await sync_to_async(match.func)(request, *match.args, **match.kwargs)
+
+
+async def cached(view, handler):
+    """Run `handler` through the response cache of CachedResponseMixin views, sharing their entries."""
+    if not isinstance(view, CachedResponseMixin):
+        return await handler(view), None
+    lookup = view.kwargs.get(view.lookup_url_kwarg or view.lookup_field)
+    scope = view.cache_scope if view.action == 'list' else f'{view.cache_scope}:{lookup}'
+    generations = await sync_to_async(get_generations, thread_sensitive=False)([scope])
+    # In a thread, as the viewer class can load the user row for `is_staff`.
+    key = await sync_to_async(response_cache_key)(view.request, view.cache_scope, view.action,
+                                                  view.request.accepted_renderer.format, generations)
+    cache = get_cache()
+    data = await cache.aget(key)
+    if data is not None:
+        stats[f'{view.cache_scope}.{view.action}.hit'] += 1
+        return data, 'HIT'
+
+    stats[f'{view.cache_scope}.{view.action}.miss'] += 1
+    data = await handler(view)
+    await cache.aset(key, data, CACHE_TIMEOUT)
+    return data, 'MISS'
+
+
+def async_action(viewset, action, handler, params=()):
+    """
+    An async view serving GET `action` of `viewset` with `handler`, which
+    gets a viewset instance and returns the response data, read with the
+    async ORM. Requests with another method, other query parameters than
+    `params` or asking for HTML or a stream, and every error, go to the DRF
+    view instead; so do requests the handler can not serve without a
+    blocking query, such as those with tokens issued before the identity
+    claims.
+    """
+    @csrf_exempt
+    async def view(request, **kwargs):
+        accept = request.headers.get('Accept', '')
+        if (request.method != 'GET' or not set(request.GET).issubset(params)
+                or 'text/html' in accept or StreamingJSONRenderer.media_type in accept):
+            return await fallback(request)
+        try:
+            drf_request = Request(request)
+            drf_request.accepted_renderer, drf_request.accepted_media_type = JSONRenderer(), JSONRenderer.media_type
+            user, drf_request.auth = await ClaimsJWTAuthentication().aauthenticate(request) or (AnonymousUser(), None)
+            drf_request.user = user
+            instance = viewset(request=drf_request, args=(), kwargs=kwargs, action=action, format_kwarg=None)
+            instance.check_permissions(drf_request)
+            validators = None
+            if isinstance(instance, ConditionalGetMixin):
+                validators = instance.get_validators(await aaggregate_validators(instance.get_conditional_queryset()))
+            if validators is not None:
+                response = not_modified(request, *validators)
+                if response is not None:
+                    return set_validators(response, *validators)
+            data, cache = await cached(instance, handler)
+        except (APIException, ObjectDoesNotExist, SynchronousOnlyOperation):
+            return await fallback(request)
+
+        response = HttpResponse(JSONRenderer().render(data), content_type=JSONRenderer.media_type)
+        response['Vary'] = 'Accept'
+        if cache is not None:
+            response['X-Cache'] = cache
+        return set_validators(response, *validators) if validators else response
+
+    # Lets QueryBudgetMiddleware report and budget these as the DRF actions.
+    view.cls = viewset
+    view.actions = {'get': action}
+    return view
+
+
+async def list_objects(view):
+    queryset = view.filter_queryset(view.get_queryset())
+    if isinstance(view, CompiledListMixin):
+        serializer = view.get_compiled_serializer()
+        page = await view.paginator.apaginate_queryset(serializer.values(queryset), view.request, view=view)
+        return view.get_paginated_response(serializer.many(page)).data
+    page = await view.paginator.apaginate_queryset(queryset, view.request, view=view)
+    return view.get_paginated_response(view.get_serializer(page, many=True).data).data
+
+
+async def retrieve_object(view):
+    queryset = view.filter_queryset(view.get_queryset())
+    lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+    instance = await queryset.aget(**{view.lookup_field: view.kwargs[lookup_url_kwarg]})
+    view.check_object_permissions(view.request, instance)
+    return view.get_serializer(instance).data
+
+
+async def list_comments(view):
+    comments = view.filter_queryset(view.get_queryset())
+    depth = view.get_depth()
+    if depth is not None:
+        comments = comments.filter(depth__lte=depth)
+    tree = build_comment_tree([comment async for comment in comments])
+    return view.get_serializer(tree, many=True).data
+
+
+def list_authors(relation):
+    async def handler(view):
+        paginator = DefaultPaginationClass()
+        page = await paginator.apaginate_queryset(view.get_authors(relation), view.request)
+        serializer = SimpleAuthorSerializer(page, many=True, context={'request': view.request})
+        return paginator.get_paginated_response(serializer.data).data
+    return handler
+
+
+post_list = async_action(views.PostViewSet, 'list', list_objects, params=('cursor', 'page_size'))
+post_detail = async_action(views.PostViewSet, 'retrieve', retrieve_object)
+comment_list = async_action(views.CommentViewSet, 'list', list_comments, params=('depth',))
+author_list = async_action(views.AuthorViewSet, 'list', list_objects, params=('page',))
+author_detail = async_action(views.AuthorViewSet, 'retrieve', retrieve_object)
+followers = async_action(views.FollowViewSet, 'followers', list_authors('follows'), params=('page',))
+followings = async_action(views.FollowViewSet, 'followings', list_authors('followed_by'), params=('page',))
@@ -0,0 +1,77 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from blog.models import Author
+
+# Identity claims copied into every token, read back without a query.
+# Permissions such as `is_staff` are left out: they can be revoked while
+# a token lives, so they are read from the user row.
+CLAIMS = ('username', 'author_id')
+
+
+def has_claims(token):
+    return all(claim in token for claim in (api_settings.USER_ID_CLAIM, *CLAIMS))
+
+
+class AuthorTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Issue tokens carrying the user's author id and username.
+    Refreshed access tokens copy them from the refresh token.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['username'] = user.get_username()
+        token['author_id'] = Author.objects.filter(user_id=user.pk).values_list('id', flat=True).first()
+        return token
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    The user of a token, answering `pk`, `id` and the identity claims from
+    the token itself. Any other attribute loads the user row on first use.
+    """
+
+    def __init__(self, token):
+        user_id = token[api_settings.USER_ID_CLAIM]
+        super().__init__(lambda: get_user_model().objects.get(**{api_settings.USER_ID_FIELD: user_id}))
+        self.__dict__.update({claim: token[claim] for claim in CLAIMS}, id=user_id, pk=user_id,
+                             is_authenticated=True, is_anonymous=False)
+
+    def __bool__(self):
+        # `IsAuthenticated` tests `request.user` before `is_authenticated`.
+        return True
+
+    def __setattr__(self, name, value):
+        # A claim set on the user, e.g. a new username, must not be shadowed.
+        self.__dict__.pop(name, None)
+        super().__setattr__(name, value)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication without the per-request user query. Tokens issued
+    before the claims existed fall back to loading the user. As with any
+    stateless token, a deactivated user keeps access until it expires.
+    """
+
+    async def aauthenticate(self, request):
+        """`authenticate` for async views; only tokens without the claims query the user."""
+        header = self.get_header(request)
+        raw_token = None if header is None else self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if has_claims(validated_token):
+            return ClaimsUser(validated_token), validated_token
+        return await sync_to_async(super().get_user)(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        if not has_claims(validated_token):
+            return super().get_user(validated_token)
+        return ClaimsUser(validated_token)
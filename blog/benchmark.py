@@ -0,0 +1,275 @@
+import importlib.util
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.authentication import AuthorTokenObtainPairSerializer
+from blog.compiled import CompiledSerializer
+from blog.models import Author, Comment, Follow, Post
+from blog.seeding import WORDS
+from blog.serializers import AuthorSerializer, PostSerializer, SimpleAuthorSerializer
+
+# name: (path template, whether the request is authenticated)
+ENDPOINTS = {
+    'PostViewSet.list': ('/blog/posts/', False),
+    'PostViewSet.list?search': ('/blog/posts/?search={word}', False),
+    'PostViewSet.retrieve': ('/blog/posts/{post}/', False),
+    'CommentViewSet.list': ('/blog/posts/{post}/comments/', False),
+    'AuthorViewSet.list': ('/blog/authors/', False),
+    'AuthorViewSet.retrieve': ('/blog/authors/{author}/', False),
+    'FollowViewSet.followers': ('/blog/followers/', True),
+    'FollowViewSet.followings': ('/blog/followings/', True),
+    'FeedViewSet.list': ('/blog/feed/', True),
+}
+SAMPLE_SIZE = 1000
+READERS = 20
+# interface: uvicorn arguments serving the project with it
+SERVERS = {
+    'wsgi': ('myblog.wsgi:application', '--interface', 'wsgi'),
+    'asgi': ('myblog.asgi:application', '--interface', 'asgi3'),
+}
+STARTUP_TIMEOUT = 30
+# name: (serializer class, queryset of the rows it reads)
+SERIALIZERS = {
+    'PostSerializer': (PostSerializer, Post.objects.order_by('-id')),
+    'AuthorSerializer': (AuthorSerializer, Author.objects.select_related('user').order_by('-id')),
+    'SimpleAuthorSerializer': (SimpleAuthorSerializer, Author.objects.select_related('user').order_by('-id')),
+}
+
+
+class InProcessSession:
+    """Requests through the Django test client, counting SQL queries."""
+
+    def __init__(self, token, host):
+        headers = {'HTTP_AUTHORIZATION': f'JWT {token}'} if token else {}
+        self.client = Client(raise_request_exception=False, HTTP_HOST=host, **headers)
+
+    def get(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, HTTP_ACCEPT='application/json')
+        return response.status_code, response.get('X-Cache'), len(queries)
+
+    def close(self):
+        connection.close()
+
+
+class HTTPSession:
+    """Requests to a running server. Queries are not visible from here."""
+
+    def __init__(self, token, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.headers = {'Accept': 'application/json'}
+        if token:
+            self.headers['Authorization'] = f'JWT {token}'
+
+    def get(self, path):
+        request = urllib.request.Request(self.base_url + path, headers=self.headers)
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status, response.headers.get('X-Cache'), None
+        except urllib.error.HTTPError as error:
+            return error.code, None, None
+
+    def close(self):
+        pass
+
+
+def load_targets(rng):
+    """Ids the requests pick from, and the users following the most authors."""
+    posts = list(Post.objects.filter(status='P').values_list('id', flat=True))
+    authors = list(Author.objects.values_list('id', flat=True))
+    readers = Author.objects.select_related('user').order_by('-following_count', 'id')[:READERS]
+    return {
+        'post': rng.sample(posts, min(len(posts), SAMPLE_SIZE)),
+        'author': rng.sample(authors, min(len(authors), SAMPLE_SIZE)),
+        'word': WORDS,
+        'readers': [reader.user for reader in readers],
+    }
+
+
+def percentile(values, share):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[share - 1]
+
+
+def summarize(samples, elapsed):
+    latencies = [latency for latency, _, _, _ in samples]
+    queries = [count for _, _, _, count in samples if count is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, status, _, _ in samples if status >= 400),
+        'cache_hits': sum(1 for _, _, cache, _ in samples if cache == 'HIT'),
+        'throughput': round(len(samples) / elapsed, 1) if elapsed else None,
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies), 2),
+            'p50': round(percentile(latencies, 50), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'max': round(max(latencies), 2),
+        },
+        'queries': {
+            'mean': round(statistics.fmean(queries), 2),
+            'max': max(queries),
+        } if queries else None,
+    }
+
+
+def run_endpoint(name, targets, clients, requests, warmup, seed, base_url=None, host='localhost'):
+    """
+    Send `requests` GETs to one endpoint from `clients` threads, each with
+    its own session and database connection, after `warmup` untimed ones.
+    """
+    template, authenticated = ENDPOINTS[name]
+    shares = [requests // clients + (index < requests % clients) for index in range(clients)]
+
+    def client(index):
+        rng = random.Random(f'{seed}:{name}:{index}')
+        # Tokens are issued per run, as a slow endpoint can outlive their lifetime.
+        reader = rng.choice(targets['readers']) if authenticated and targets['readers'] else None
+        token = str(AuthorTokenObtainPairSerializer.get_token(reader).access_token) if reader else None
+        session = HTTPSession(token, base_url) if base_url else InProcessSession(token, host)
+        samples = []
+        try:
+            for number in range(warmup + shares[index]):
+                path = template.format(**{key: rng.choice(values) for key, values in targets.items()
+                                          if values and f'{{{key}}}' in template})
+                started = time.perf_counter()
+                status, cache, queries = session.get(path)
+                latency = (time.perf_counter() - started) * 1000
+                if number >= warmup:
+                    samples.append((latency, status, cache, queries))
+        finally:
+            session.close()
+        return samples
+
+    with ThreadPoolExecutor(clients) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(client, range(clients)))
+        elapsed = time.perf_counter() - started
+    return summarize([sample for samples in results for sample in samples], elapsed)
+
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def serve(interface, workers=1):
+    """
+    Serve the project with uvicorn on the `wsgi` or `asgi` interface while
+    the block runs, and yield its base URL.
+    """
+    if importlib.util.find_spec('uvicorn') is None:
+        raise RuntimeError('Serving the project needs uvicorn, which is not installed.')
+    port = free_port()
+    app, *options = SERVERS[interface]
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', app, *options, '--port', str(port), '--workers', str(workers),
+         '--log-level', 'warning', '--no-access-log'],
+        cwd=settings.BASE_DIR, env=os.environ.copy(),
+    )
+    try:
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f'uvicorn exited with status {process.returncode}.')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f'uvicorn did not start within {STARTUP_TIMEOUT}s.')
+                time.sleep(0.1)
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def run_benchmark(endpoints=None, clients=8, requests=200, warmup=5, seed=0, base_url=None, host='localhost',
+                  server=None, log=lambda message: None):
+    """Benchmark `endpoints` (all by default) and return the JSON report."""
+    targets = load_targets(random.Random(seed))
+    report = {
+        'meta': {
+            'commit': current_commit(),
+            'started_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'target': base_url or 'in-process',
+            'server': server,
+            'clients': clients,
+            'requests': requests,
+            'dataset': {
+                'authors': Author.objects.count(),
+                'follows': Follow.objects.count(),
+                'posts': Post.objects.count(),
+                'comments': Comment.objects.count(),
+            },
+        },
+        'endpoints': {},
+    }
+    for name in endpoints or ENDPOINTS:
+        report['endpoints'][name] = result = run_endpoint(name, targets, clients, requests, warmup, seed,
+                                                          base_url, host)
+        log(f"{name}: {result['throughput']} req/s, p95 {result['latency_ms']['p95']} ms")
+    return report
+
+
+def best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings), result
+
+
+def run_serializer_benchmark(rows=1000, repeat=5, host='localhost', log=lambda message: None):
+    """
+    Read and serialize `rows` rows with each of SERIALIZERS and with its
+    CompiledSerializer, and report the best of `repeat` timings of both.
+    """
+    context = {'request': RequestFactory().get('/', HTTP_HOST=host)}
+    report = {'meta': {'commit': current_commit(), 'database': connection.vendor, 'rows': rows, 'repeat': repeat},
+              'serializers': {}}
+    for name, (serializer_class, queryset) in SERIALIZERS.items():
+        queryset = queryset[:rows]
+        compiled = CompiledSerializer(serializer_class(context=context))
+        serializer_ms, expected = best_of(repeat, lambda: serializer_class(queryset, many=True, context=context).data)
+        compiled_ms, data = best_of(repeat, lambda: compiled.many(compiled.values(queryset)))
+        report['serializers'][name] = result = {
+            'rows': len(data),
+            'serializer_ms': round(serializer_ms, 2),
+            'compiled_ms': round(compiled_ms, 2),
+            'speedup': round(serializer_ms / compiled_ms, 2) if compiled_ms else None,
+            'identical': data == expected,
+        }
+        log(f"{name}: {result['serializer_ms']} -> {result['compiled_ms']} ms for {result['rows']} rows "
+            f"({result['speedup']}x)")
+    return report
@@ -0,0 +1,105 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import FileField as ModelFileField
+from rest_framework import ISO_8601, fields, relations
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+from rest_framework.settings import api_settings
+
+# to_representation methods returning the column value unchanged.
+PASSTHROUGH = frozenset({
+    fields.ReadOnlyField.to_representation,
+    fields.IntegerField.to_representation,
+    fields.CharField.to_representation,
+    fields.BooleanField.to_representation,
+    fields.ChoiceField.to_representation,
+})
+
+
+class CompiledSerializer:
+    """
+    Read-only form of a bound ModelSerializer for rows of `.values()`.
+
+    Every readable field is turned once into a column path (its `source`
+    joined with `__`) and a converter, so a row costs one dict build instead
+    of a field object walk with attribute lookups. Only fields backed by a
+    column can be compiled: a SerializerMethodField, a nested serializer or
+    `source='*'` raise TypeError.
+    """
+
+    def __init__(self, serializer):
+        model = serializer.Meta.model
+        self.fields = [(field.field_name, '__'.join(field.source_attrs), self.converter(model, field))
+                       for field in serializer._readable_fields]
+        self.paths = list(dict.fromkeys(path for _, path, _ in self.fields))
+
+    def converter(self, model, field):
+        if isinstance(field, relations.PrimaryKeyRelatedField) and field.source_attrs:
+            return None if field.pk_field is None else field.pk_field.to_representation
+        if not field.source_attrs or isinstance(field, (relations.RelatedField, relations.ManyRelatedField,
+                                                        BaseSerializer)):
+            raise TypeError(f'{field.field_name} can not be compiled')
+
+        model_field = model_field_of(model, field.source_attrs)
+        to_representation = type(field).to_representation
+        if to_representation in PASSTHROUGH:
+            return None
+        if isinstance(model_field, ModelFileField):
+            return lambda name: field.to_representation(model_field.attr_class(None, model_field, name))
+        if to_representation is fields.DateTimeField.to_representation:
+            return datetime_converter(field)
+        return field.to_representation
+
+    def values(self, queryset):
+        """`queryset` as `.values()` rows, with its annotations kept for ordering and cursors."""
+        return queryset.prefetch_related(None).values(*self.paths, *queryset.query.annotations)
+
+    def to_representation(self, row):
+        return {name: row[path] if convert is None or row[path] is None else convert(row[path])
+                for name, path, convert in self.fields}
+
+    def many(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+def datetime_converter(field):
+    """DateTimeField.to_representation with the field timezone and format looked up once instead of per row."""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or field_timezone is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    def convert(value):
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def model_field_of(model, attrs):
+    for attr in attrs[:-1]:
+        model = model._meta.get_field(attr).related_model
+    try:
+        return model._meta.get_field(attrs[-1])
+    except FieldDoesNotExist:
+        # Attribute names such as `user_id`.
+        return next((field for field in model._meta.concrete_fields if field.attname == attrs[-1]), None)
+
+
+class CompiledListMixin:
+    """
+    Serve `list` with a CompiledSerializer of `serializer_class`: the page
+    is read as `.values()` rows and turned into the same JSON as the
+    serializer would give, without model instances or field objects.
+    """
+
+    def get_compiled_serializer(self):
+        return CompiledSerializer(self.get_serializer())
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_compiled_serializer()
+        rows = serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.many(page))
+        return Response(serializer.many(rows))
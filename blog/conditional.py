@@ -0,0 +1,87 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+
+
+def make_validators(row, *parts):
+    """
+    Strong ETag and Last-Modified timestamp of rows whose newest `updated_at`
+    and count are in `row`. `parts` tell apart the representations of the
+    same rows, such as the renderer format.
+    """
+    last_modified = row['last_modified']
+    version = ':'.join([*map(str, parts), str(row['count']), last_modified.isoformat() if last_modified else ''])
+    etag = hashlib.md5(version.encode(), usedforsecurity=False).hexdigest()
+    return f'"{etag}"', int(last_modified.timestamp()) if last_modified else None
+
+
+def aggregate_validators(queryset):
+    return queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+
+
+async def aaggregate_validators(queryset):
+    return await queryset.order_by().aaggregate(last_modified=Max('updated_at'), count=Count('pk'))
+
+
+def not_modified(request, etag, last_modified):
+    """The 304 (or 412) response `If-None-Match` / `If-Modified-Since` call for, if any."""
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET for `list` and `retrieve`. The validators come from one
+    aggregate query over the rows the response is built from, before any
+    serialization or response cache lookup, so an unchanged resource is
+    answered with 304 Not Modified right away. Every change to those rows
+    moves their `updated_at` or their count.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
+    def is_single_object(self):
+        return (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+
+    def get_conditional_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.is_single_object():
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]})
+        return queryset
+
+    def get_validator_parts(self):
+        return self.request.get_full_path(), self.request.accepted_renderer.format
+
+    def get_validators(self, row):
+        """
+        `(etag, last_modified)` from the aggregate `row`, or None for an object
+        that does not exist, which is left to the view to answer with 404.
+        Lists have no Last-Modified: deleting one of their rows moves their
+        count, which the ETag covers, but not their newest `updated_at`.
+        """
+        single = self.is_single_object()
+        if single and not row['count']:
+            return None
+        etag, last_modified = make_validators(row, *self.get_validator_parts())
+        return etag, last_modified if single else None
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        validators = self.get_validators(aggregate_validators(self.get_conditional_queryset()))
+        if validators is None:
+            return handler(request, *args, **kwargs)
+        response = not_modified(request, *validators) or handler(request, *args, **kwargs)
+        return set_validators(response, *validators)
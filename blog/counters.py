@@ -0,0 +1,138 @@
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from blog.cache import invalidate
+from blog.models import Author, Follow, Post
+
+POST_COUNTER_RELATIONS = {
+    'comments_count': 'comments',
+    'images_count': 'images',
+    'videos_count': 'videos',
+}
+
+
+def increment_post_counter(post_id, counter, delta=1):
+    """
+    Adjust one of the denormalized counters on a post in the database,
+    without reading it into Python first. A decrement never goes below zero.
+    Counters are part of the post's representation, so `updated_at`, which
+    conditional requests validate against, moves with them.
+    """
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(**{f'{counter}__gte': -delta})
+    posts.update(**{counter: F(counter) + delta}, updated_at=timezone.now())
+
+
+def rebuild_post_counters(posts, chunk_size=1000):
+    """
+    Recompute the denormalized counters of `posts` from the child tables.
+
+    Every counter is a separate correlated subquery, so each child table is
+    aggregated on its own instead of being joined together with the others.
+    Rows are updated in primary key chunks to keep each statement short, and
+    only when a counter drifted. Returns the number of posts that were rewritten.
+    """
+    model = posts.model
+    updates = {}
+    drifted = Q()
+    for counter, relation in POST_COUNTER_RELATIONS.items():
+        child = model._meta.get_field(relation).related_model
+        counts = child.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(total=Count('pk')).values('total')
+        updates[counter] = Coalesce(Subquery(counts), 0)
+        drifted |= ~Q(**{counter: updates[counter]})
+
+    updated = 0
+    last_pk = 0
+    ids = posts.order_by('pk').values_list('pk', flat=True)
+    while True:
+        chunk = list(ids.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            return updated
+        updated += model.objects.filter(drifted, pk__in=chunk).update(**updates, updated_at=timezone.now())
+        last_pk = chunk[-1]
+
+
+def adjust_follow_counters(follower_id, followed_ids, delta):
+    """
+    Move `following_count` of the follower by `delta` per followed author,
+    and `follower_count` of every followed author by `delta`, with one
+    statement each. The database applies the arithmetic under the row lock,
+    so concurrent follows never lose an update, and a decrement never takes
+    a counter below zero.
+    """
+    followed_ids = list(followed_ids)
+    if not followed_ids:
+        return
+    now = timezone.now()
+    Author.objects.filter(pk=follower_id).update(
+        following_count=_shifted('following_count', delta * len(followed_ids)), updated_at=now)
+    Author.objects.filter(pk__in=followed_ids).update(
+        follower_count=_shifted('follower_count', delta), updated_at=now)
+    # Queryset updates do not send post_save, so drop the cached authors here.
+    invalidate('authors', f'authors:{follower_id}', *[f'authors:{pk}' for pk in followed_ids])
+
+
+def _shifted(counter, delta):
+    if delta >= 0:
+        return F(counter) + delta
+    return Case(When(**{f'{counter}__gte': -delta}, then=F(counter) + delta), default=0)
+
+
+def follow_counts(from_id, to_id):
+    """
+    Count the follow edges of the authors with `from_id <= id < to_id`.
+    Returns `{author_id: (follower_count, following_count)}`, aggregated by
+    the database over the two indexes of the follow table.
+    """
+    counts = {}
+    followers = Follow.objects.filter(to_author_id__gte=from_id, to_author_id__lt=to_id) \
+                              .values_list('to_author_id').annotate(total=Count('*')).order_by()
+    for author_id, total in followers:
+        counts[author_id] = (total, 0)
+    followings = Follow.objects.filter(from_author_id__gte=from_id, from_author_id__lt=to_id) \
+                               .values_list('from_author_id').annotate(total=Count('*')).order_by()
+    for author_id, total in followings:
+        counts[author_id] = (counts.get(author_id, (0, 0))[0], total)
+    return counts
+
+
+def reconcile_follow_counters(chunk_size=1000, dry_run=False):
+    """
+    Compare the stored follower/following counters with the follow table,
+    one range of author ids at a time, and rewrite only the rows that
+    drifted. Yields `(author_id, stored, actual)` for every drifted row.
+
+    The fix recomputes the counts inside the UPDATE itself, so a follow that
+    lands between the comparison and the write is not overwritten.
+    """
+    follower_total = Follow.objects.filter(to_author=OuterRef('pk')).order_by() \
+                                   .values('to_author').annotate(total=Count('*')).values('total')
+    following_total = Follow.objects.filter(from_author=OuterRef('pk')).order_by() \
+                                    .values('from_author').annotate(total=Count('*')).values('total')
+
+    last_id = 0
+    while True:
+        authors = list(Author.objects.filter(pk__gt=last_id).order_by('pk')
+                                     .values_list('pk', 'follower_count', 'following_count')[:chunk_size])
+        if not authors:
+            return
+        from_id, to_id = authors[0][0], authors[-1][0] + 1
+        counts = follow_counts(from_id, to_id)
+
+        drifted = []
+        for author_id, *stored in authors:
+            actual = counts.get(author_id, (0, 0))
+            if tuple(stored) != actual:
+                drifted.append(author_id)
+                yield author_id, tuple(stored), actual
+
+        if drifted and not dry_run:
+            Author.objects.filter(pk__in=drifted).update(
+                follower_count=Coalesce(Subquery(follower_total), 0),
+                following_count=Coalesce(Subquery(following_total), 0),
+                updated_at=timezone.now(),
+            )
+            invalidate('authors', *[f'authors:{author_id}' for author_id in drifted])
+        last_id = authors[-1][0]
@@ -0,0 +1,171 @@
+import csv
+import io
+from collections import deque
+from datetime import timedelta
+from itertools import batched
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+
+from blog.models import Author, Comment, Follow, Post
+from blog.renderers import ENCODERS, JSON_ENCODER
+
+# Rows per keyset range; each range is one short query, so no lock or
+# snapshot is held for the whole export.
+RANGE_SIZE = getattr(settings, 'BLOG_EXPORT_RANGE_SIZE', 10000)
+# Rows fetched per round trip from the server-side cursor of a range, and
+# written per chunk.
+CHUNK_SIZE = getattr(settings, 'BLOG_EXPORT_CHUNK_SIZE', 1000)
+# Seconds read again before an `updated_at` watermark: a transaction that
+# began before an export and committed after it has rows dated before it.
+OVERLAP = getattr(settings, 'BLOG_EXPORT_OVERLAP', 300)
+
+
+class Table(NamedTuple):
+    model: type
+    columns: tuple
+    # The columns ordering the export and making up its watermark.
+    keys: tuple = ('updated_at', 'id')
+    # Columns read from related rows, by name.
+    expressions: dict = {}
+
+
+TABLES = {
+    'posts': Table(Post, ('id', 'owner_id', 'title', 'slug', 'body', 'status', 'published_date', 'comments_count',
+                          'images_count', 'videos_count', 'created_at', 'updated_at')),
+    'comments': Table(Comment, ('id', 'post_id', 'owner_id', 'parent_id', 'body', 'depth', 'created_at',
+                                'updated_at')),
+    'authors': Table(Author, ('id', 'user_id', 'username', 'bio', 'follower_count', 'following_count', 'joined_at',
+                              'updated_at'), expressions={'username': F('user__username')}),
+    # Follows are never updated, only created and deleted, so new edges follow the highest id exported.
+    'follows': Table(Follow, ('id', 'from_author_id', 'to_author_id'), keys=('id',)),
+}
+FORMATS = ('jsonl', 'csv', 'columns')
+
+
+def parse_watermark(table, values):
+    """
+    The watermark of `table` from `values`, a mapping of its key columns to
+    strings such as query parameters, or None when none are given. Raise
+    ValidationError unless every key has a valid value.
+    """
+    keys = TABLES[table].keys
+    if not any(values.get(key) for key in keys):
+        return None
+    model = TABLES[table].model
+    watermark = {}
+    for key in keys:
+        if not values.get(key):
+            raise ValidationError(f'The watermark needs {" and ".join(keys)}.')
+        watermark[key] = model._meta.get_field(key).to_python(values[key])
+    return watermark
+
+
+def read_rows(table, watermark=None, range_size=RANGE_SIZE, chunk_size=CHUNK_SIZE, overlap=OVERLAP):
+    """
+    Yield the rows of `table` as dicts of its columns, after `watermark` in
+    the order of its keys, with datetimes as ISO 8601 strings. Every range of
+    `range_size` rows is a separate indexed query seeking past the last row
+    of the one before, read with a server-side cursor where the backend has
+    them. The export ends at the first range that comes back short, so rows
+    written meanwhile are included up to then.
+
+    `watermark`, a dict of the key columns, is updated in place to the last
+    row yielded; store it to resume the export later. An `updated_at`
+    watermark is moved back by `overlap` seconds, so rows committed late are
+    not skipped for good. The rows read in that window are deduplicated by
+    id and `updated_at` against the `recent` rows the watermark lists, which
+    read_rows stores in it; without them they are yielded again.
+    """
+    table = TABLES[table]
+    queryset = table.model.objects.annotate(**table.expressions).order_by(*table.keys).values(*table.columns)
+    dates = [field.name for field in table.model._meta.concrete_fields
+             if field.name in table.columns and field.get_internal_type() == 'DateTimeField']
+    watermark = {} if watermark is None else watermark
+    keyset = {key: watermark[key] for key in table.keys if key in watermark}
+    dated = 'updated_at' in table.keys
+    seen = set()
+    if keyset and dated:
+        updated_at = table.model._meta.get_field('updated_at').to_python(keyset['updated_at'])
+        keyset = {key: 0 for key in table.keys} | {'updated_at': updated_at - timedelta(seconds=overlap)}
+        seen = {tuple(row) for row in watermark.get('recent', [])}
+    # The id, `updated_at` and its string of the rows read in the last `overlap` seconds.
+    recent = deque()
+    while True:
+        rows = queryset
+        if keyset:
+            rows = rows.filter(_after(table.keys, keyset))
+        count = 0
+        for row in rows[:range_size].iterator(chunk_size=chunk_size):
+            count += 1
+            keyset = {key: row[key] for key in table.keys}
+            if dated:
+                while recent and recent[0][1] < row['updated_at'] - timedelta(seconds=overlap):
+                    recent.popleft()
+                recent.append((row['id'], row['updated_at'], row['updated_at'].isoformat()))
+            for name in dates:
+                if row[name] is not None:
+                    row[name] = row[name].isoformat()
+            if seen and (row['id'], row['updated_at']) in seen:
+                continue
+            watermark.update((key, row[key]) for key in table.keys)
+            yield row
+        if count < range_size:
+            break
+    if recent:
+        watermark['recent'] = [[row_id, updated_at] for row_id, _, updated_at in recent]
+
+
+def _after(keys, watermark):
+    """`(a, b) > (x, y)` for the ascending, non-null `keys`."""
+    condition, equal = Q(pk__in=[]), Q()
+    for key in keys:
+        condition |= equal & Q(**{f'{key}__gt': watermark[key]})
+        equal &= Q(**{key: watermark[key]})
+    return condition
+
+
+def write_jsonl(rows, columns, chunk_size=CHUNK_SIZE):
+    """A JSON object per row and line."""
+    encode = ENCODERS[JSON_ENCODER]
+    for chunk in batched(rows, chunk_size):
+        yield b''.join(encode(row) + b'\n' for row in chunk)
+
+
+def write_csv(rows, columns, chunk_size=CHUNK_SIZE):
+    """A header line of `columns`, then a line per row; NULL is an empty cell."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, columns)
+    writer.writeheader()
+    for chunk in batched(rows, chunk_size):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def write_columns(rows, columns, chunk_size=CHUNK_SIZE):
+    """
+    A JSON line per chunk of rows holding one array per column, like the
+    row groups of a columnar file: `{"rows": n, "columns": {"id": [...], ...}}`.
+    """
+    encode = ENCODERS[JSON_ENCODER]
+    for chunk in batched(rows, chunk_size):
+        yield encode({'rows': len(chunk), 'columns': {name: [row[name] for row in chunk] for name in columns}}) + b'\n'
+
+
+WRITERS = {'jsonl': write_jsonl, 'csv': write_csv, 'columns': write_columns}
+
+
+def filename(table, format):
+    return f"{table}.{'csv' if format == 'csv' else 'jsonl'}"
+
+
+def export_table(table, format, watermark=None, range_size=RANGE_SIZE, chunk_size=CHUNK_SIZE):
+    """The chunks of the export of `table` in `format`, as bytes. read_rows describes `watermark`."""
+    rows = read_rows(table, watermark, range_size, chunk_size)
+    return WRITERS[format](rows, TABLES[table].columns, chunk_size)
@@ -0,0 +1,100 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from blog.models import Author, Follow, Post, TimelineEntry
+
+# Posts by authors with more followers than this are not copied into every
+# follower timeline; they are pulled in when the feed is read instead.
+FANOUT_FOLLOWER_LIMIT = getattr(settings, 'BLOG_FEED_FANOUT_LIMIT', 10000)
+# How many of the latest posts of newly followed authors land in a timeline.
+BACKFILL_SIZE = getattr(settings, 'BLOG_FEED_BACKFILL_SIZE', 100)
+CHUNK_SIZE = 1000
+
+
+def is_fanned_out(follower_count):
+    return follower_count <= FANOUT_FOLLOWER_LIMIT
+
+
+def fan_out_post(post_id):
+    """
+    Copy a freshly published post into the timeline of every follower of
+    its owner, in chunks of followers. Runs as a background task, so a post
+    unpublished or deleted in the meantime is skipped.
+    """
+    fan_out_posts([post_id])
+
+
+def fan_out_posts(post_ids):
+    """fan_out_post for many posts, reading the followers of each owner once."""
+    posts_by_owner = defaultdict(list)
+    for post in Post.objects.filter(pk__in=post_ids, status='P').only('owner_id', 'published_date'):
+        posts_by_owner[post.owner_id].append(post)
+    if not posts_by_owner:
+        return
+    owners = Author.objects.filter(pk__in=posts_by_owner, follower_count__lte=FANOUT_FOLLOWER_LIMIT) \
+                           .values_list('pk', flat=True)
+    for owner_id in owners:
+        copy_to_followers(owner_id, posts_by_owner[owner_id])
+
+
+def copy_to_followers(owner_id, posts):
+    followers = Follow.objects.filter(to_author_id=owner_id).order_by('from_author_id') \
+                              .values_list('from_author_id', flat=True)
+    last_id = 0
+    while True:
+        chunk = list(followers.filter(from_author_id__gt=last_id)[:CHUNK_SIZE])
+        if not chunk:
+            return
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(follower_id=follower_id, author_id=owner_id, post_id=post.id,
+                           published_date=post.published_date)
+             for follower_id in chunk for post in posts],
+            batch_size=CHUNK_SIZE,
+            ignore_conflicts=True,
+        )
+        last_id = chunk[-1]
+
+
+def retract_post(post):
+    TimelineEntry.objects.filter(post=post).delete()
+
+
+def backfill_timeline(follower_id, authors):
+    """
+    Copy the latest BACKFILL_SIZE published posts of each of the newly
+    followed `authors` into the follower's timeline, with a single query
+    for all of them.
+    """
+    authors = {author.pk: author for author in authors if is_fanned_out(author.follower_count)}
+    if not authors:
+        return
+    latest = Window(RowNumber(), partition_by=F('owner_id'), order_by=[F('published_date').desc(), F('id').desc()])
+    posts = Post.objects.filter(owner_id__in=authors, status='P').annotate(rank=latest) \
+                        .filter(rank__lte=BACKFILL_SIZE).order_by() \
+                        .values_list('id', 'owner_id', 'published_date')
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(follower_id=follower_id, author_id=owner_id, post_id=post_id, published_date=published_date)
+         for post_id, owner_id, published_date in posts],
+        ignore_conflicts=True,
+    )
+
+
+def trim_timeline(follower_id, author_ids):
+    TimelineEntry.objects.filter(follower_id=follower_id, author_id__in=author_ids).delete()
+
+
+def feed_sources(follower_id):
+    """
+    Return the `(queryset, id_field)` pairs making up a follower's home
+    timeline: the materialized entries, plus published posts of followed
+    authors that are too popular to be fanned out on write.
+    """
+    sources = [(TimelineEntry.objects.filter(follower_id=follower_id), 'post_id')]
+    pulled = list(Follow.objects.filter(from_author_id=follower_id, to_author__follower_count__gt=FANOUT_FOLLOWER_LIMIT)
+                                .values_list('to_author_id', flat=True))
+    if pulled:
+        sources.append((Post.objects.filter(owner_id__in=pulled, status='P'), 'id'))
+    return sources
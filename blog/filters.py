@@ -1,6 +1,8 @@
 from django_filters.filterset import FilterSet
+from rest_framework.filters import OrderingFilter, SearchFilter
 
 from .models import Post
+from .search import get_search_backend
 
 
 class PostFilter(FilterSet):
@@ -9,4 +11,26 @@ class PostFilter(FilterSet):
         fields = {
             'published_date': ['gte', 'lte'],
             'status': ['exact']
-        }
\ No newline at end of file
+        }
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    `?search=` backed by the configured full-text search backend instead of
+    `LIKE '%term%'` over every row. Matching posts are annotated with `rank`.
+    """
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return get_search_backend().search(queryset, ' '.join(terms))
+
+
+class RelevanceOrderingFilter(OrderingFilter):
+    """
+    Order search results by relevance unless `?ordering=` says otherwise.
+    """
+    def get_ordering(self, request, queryset, view):
+        if not request.query_params.get(self.ordering_param) and request.query_params.get(FullTextSearchFilter.search_param):
+            return ['-rank']
+        return super().get_ordering(request, queryset, view)
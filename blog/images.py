@@ -0,0 +1,102 @@
+import io
+import logging
+import os
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from blog.tasks import enqueue
+
+logger = logging.getLogger(__name__)
+
+# name: (longest side in pixels, Pillow format, file extension)
+VARIANTS = {
+    'thumbnail': (160, 'JPEG', 'jpg'),
+    'medium': (800, 'JPEG', 'jpg'),
+    'webp': (800, 'WEBP', 'webp'),
+}
+QUALITY = 80
+
+
+def needs_derivatives(file, variants):
+    return bool(file) and variants.get('source') != file.name
+
+
+def current_variants(file, variants):
+    """
+    `variants` if they were generated from `file`, else none: those of a
+    replaced file must not be served, and their files are deleted.
+    """
+    if variants.get('source') == file.name:
+        return variants
+    delete_derivatives(file.storage, variants)
+    return {}
+
+
+def delete_derivatives(storage, variants):
+    """Delete the files of `variants` once the current transaction commits."""
+    paths = variants.get('files', [])
+    if paths:
+        transaction.on_commit(lambda: delete_files(storage, paths))
+
+
+def delete_files(storage, paths):
+    for path in paths:
+        try:
+            storage.delete(path)
+        except OSError:
+            logger.exception('Could not delete image derivative %s', path)
+
+
+def schedule_derivatives(instance, field_name, variants_field):
+    """
+    Queue the generation of the variants of `instance.<field_name>`, so the
+    upload request does not wait for it.
+    """
+    enqueue('blog.images.generate_derivatives', instance._meta.label, instance.pk, field_name, variants_field)
+
+
+def render_variant(image, size, format):
+    variant = image.copy()
+    variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+    if format == 'JPEG' and variant.mode not in ('RGB', 'L'):
+        variant = variant.convert('RGB')
+    output = io.BytesIO()
+    variant.save(output, format=format, quality=QUALITY, optimize=format == 'JPEG')
+    return output.getvalue()
+
+
+def generate_derivatives(label, pk, field_name, variants_field):
+    """
+    Write resized, recompressed copies of an uploaded image next to it and
+    record their URLs on the row, keyed by variant name, with their paths
+    under `files`. The original file stays untouched, and the derivatives
+    stored before are deleted. If the image was replaced meanwhile, the new
+    ones are deleted instead.
+    """
+    model = apps.get_model(label)
+    try:
+        instance = model.objects.get(pk=pk)
+        file = getattr(instance, field_name)
+        if not file:
+            return
+        with file.open('rb'):
+            image = ImageOps.exif_transpose(Image.open(file))
+            image.load()
+
+        directory, filename = os.path.split(file.name)
+        stem = os.path.splitext(filename)[0]
+        variants = {'source': file.name, 'files': []}
+        for name, (size, format, extension) in VARIANTS.items():
+            path = file.storage.save(f'{directory}/derivatives/{stem}_{name}.{extension}',
+                                     ContentFile(render_variant(image, size, format)))
+            variants[name] = file.storage.url(path)
+            variants['files'].append(path)
+    except Exception:
+        logger.exception('Could not generate image derivatives for %s %s', label, pk)
+        return
+
+    stored = model.objects.filter(pk=pk, **{field_name: file.name}).update(**{variants_field: variants})
+    delete_derivatives(file.storage, getattr(instance, variants_field) if stored else variants)
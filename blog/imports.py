@@ -0,0 +1,191 @@
+import csv
+import json
+from itertools import batched
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from blog.cache import invalidate
+from blog.models import Author, Post
+from blog.search import get_search_backend
+from blog.serializers import PostImportSerializer
+from blog.slugs import allocate_slugs, slug_base
+from blog.tasks import enqueue
+
+# Rows read, validated, given slugs and written together.
+BATCH_SIZE = getattr(settings, 'BLOG_IMPORT_BATCH_SIZE', 1000)
+# Rows per INSERT statement of `bulk_create`.
+CHUNK_SIZE = getattr(settings, 'BLOG_IMPORT_CHUNK_SIZE', 500)
+FORMATS = ('jsonl', 'csv')
+# Attempts at writing a batch whose slugs were taken in the meantime.
+WRITE_ATTEMPTS = 3
+NOT_TEXT = {'non_field_errors': ['The line is not UTF-8 text.']}
+
+
+def detect_format(name, content_type=''):
+    return 'csv' if name.lower().endswith('.csv') or content_type == 'text/csv' else 'jsonl'
+
+
+def decode_lines(lines):
+    """The text of the byte `lines`, with None for each line that is not UTF-8. A leading BOM is dropped."""
+    for number, line in enumerate(lines):
+        try:
+            yield line.decode('utf-8-sig' if number == 0 else 'utf-8')
+        except UnicodeDecodeError:
+            yield None
+
+
+def read_jsonl(lines):
+    """`(number, row, errors)` of every non-blank line, where exactly one of `row` and `errors` is set."""
+    for number, line in enumerate(lines, 1):
+        if line is None:
+            yield number, None, NOT_TEXT
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield number, None, {'non_field_errors': [f'Invalid JSON: {error}']}
+            continue
+        if isinstance(row, dict):
+            yield number, row, None
+        else:
+            yield number, None, {'non_field_errors': ['Expected a JSON object.']}
+
+
+def read_csv(lines):
+    """
+    read_jsonl for CSV with a header line. Empty cells count as missing.
+    Reading goes on after a malformed record or a line that is not UTF-8,
+    which is read as a blank line.
+    """
+    undecodable = []
+    read = 0
+
+    def text():
+        nonlocal read
+        for read, line in enumerate(lines, 1):
+            if line is None:
+                undecodable.append(read)
+                line = '\n'
+            yield line
+
+    reader = csv.DictReader(text())
+    while True:
+        try:
+            row = next(reader, None)
+        except csv.Error as error:
+            # The reader does not count the line it failed on.
+            yield read, None, {'non_field_errors': [f'Invalid CSV: {error}']}
+            continue
+        while undecodable:
+            yield undecodable.pop(0), None, NOT_TEXT
+        if row is None:
+            return
+        if None in row:
+            yield reader.line_num, None, {'non_field_errors': ['More cells than columns.']}
+        else:
+            yield reader.line_num, {key: value for key, value in row.items() if value not in ('', None)}, None
+
+
+def read_rows(lines, format):
+    """read_jsonl or read_csv of the byte `lines` of a file."""
+    lines = decode_lines(lines)
+    return read_csv(lines) if format == 'csv' else read_jsonl(lines)
+
+
+def import_posts(rows, owner_id=None, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE, log=lambda message: None):
+    """
+    Create posts from the `(number, row, errors)` items of read_rows, a
+    batch at a time, so only one batch is held in memory. Posts belong to
+    `owner_id` if given, else to the author named by each row's `owner`.
+
+    Return the report: how many rows were read, created and failed, and the
+    errors of every failed row by line number.
+    """
+    report = {'rows': 0, 'created': 0, 'failed': 0, 'errors': []}
+    for batch in batched(rows, batch_size):
+        created, errors = import_batch(batch, owner_id, chunk_size)
+        report['rows'] += len(batch)
+        report['created'] += created
+        report['failed'] += len(errors)
+        report['errors'].extend(errors)
+        log(f"{report['rows']} rows read, {report['created']} posts created, {report['failed']} failed")
+    return report
+
+
+def import_batch(batch, owner_id, chunk_size):
+    serializer = PostImportSerializer()
+    errors, valid = [], []
+    for number, row, row_errors in batch:
+        if row_errors is None:
+            try:
+                valid.append((number, serializer.run_validation(row)))
+                continue
+            except ValidationError as error:
+                row_errors = error.detail
+        errors.append({'line': number, 'errors': row_errors})
+
+    owners = resolve_owners(valid, owner_id)
+    now = timezone.now()
+    posts = []
+    for number, attrs in valid:
+        owner = owners.get(attrs.get('owner')) if owner_id is None else owner_id
+        if owner is None:
+            message = 'This field is required.' if 'owner' not in attrs else 'No author has this username.'
+            errors.append({'line': number, 'errors': {'owner': [message]}})
+            continue
+        # What Post.save does, which bulk_create skips.
+        published_date = (attrs.get('published_date') or now) if attrs['status'] == 'P' else None
+        posts.append(Post(title=attrs['title'], body=attrs['body'], status=attrs['status'], owner_id=owner,
+                          published_date=published_date, slug=slug_base(attrs.get('slug') or attrs['title'])))
+
+    if posts:
+        write_posts(posts, chunk_size)
+    errors.sort(key=lambda error: error['line'])
+    return len(posts), errors
+
+
+def resolve_owners(valid, owner_id):
+    """Author id by username for the `owner` of the rows, with one query."""
+    if owner_id is not None:
+        return {}
+    usernames = {attrs['owner'] for _, attrs in valid if 'owner' in attrs}
+    return dict(Author.objects.filter(user__username__in=usernames).values_list('user__username', 'id'))
+
+
+def write_posts(posts, chunk_size):
+    """
+    Insert and index `posts` with free slugs, their `slug` holding the base
+    to start from, then fan out the published ones. Signals are not sent
+    for bulk inserts, so their work is done here for the whole batch.
+    """
+    bases = [post.slug for post in posts]
+    for attempt in range(1, WRITE_ATTEMPTS + 1):
+        for post, slug in zip(posts, allocate_slugs(bases)):
+            post.slug = slug
+        try:
+            with transaction.atomic():
+                Post.objects.bulk_create(posts, batch_size=chunk_size)
+                if posts[0].pk is None:
+                    # Backends without RETURNING do not set primary keys on bulk inserts.
+                    ids = dict(Post.objects.filter(slug__in=[post.slug for post in posts])
+                                           .values_list('slug', 'id'))
+                    for post in posts:
+                        post.pk = ids[post.slug]
+                get_search_backend().index_many(posts)
+            break
+        except IntegrityError:
+            # Another writer took one of the slugs after they were read.
+            for post in posts:
+                post.pk, post._state.adding = None, True
+            if attempt == WRITE_ATTEMPTS:
+                raise
+
+    invalidate('posts')
+    published = [post.pk for post in posts if post.status == 'P']
+    if published:
+        enqueue('blog.feed.fan_out_posts', published)
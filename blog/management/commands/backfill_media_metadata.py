@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from blog.mediainfo import image_metadata, video_metadata
+from blog.models import Author, PostImage, PostVideo
+
+
+class Command(BaseCommand):
+    help = 'Fill in image dimensions and video metadata for media uploaded before they were recorded.'
+
+    def handle(self, *args, **options):
+        images = self.backfill(PostImage.objects.filter(width__isnull=True), 'image', image_metadata)
+        authors = self.backfill(
+            Author.objects.filter(image_width__isnull=True).exclude(image=Author._meta.get_field('image').default),
+            'image', image_metadata, prefix='image_')
+        videos = self.backfill(
+            PostVideo.objects.filter(duration__isnull=True, codec='').filter(video__iregex=r'\.(mp4|mov|m4v)$'),
+            'video', video_metadata)
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated {images} post images, {authors} author images and {videos} videos.'))
+
+    def backfill(self, queryset, field_name, extract, prefix=''):
+        updated = 0
+        for instance in queryset.only('pk', field_name).iterator(chunk_size=500):
+            file = getattr(instance, field_name)
+            try:
+                with file.open('rb'):
+                    metadata = extract(file)
+            except (OSError, ValueError) as error:
+                self.stderr.write(f'Skipping {file.name}: {error}')
+                continue
+            if metadata:
+                queryset.model.objects.filter(pk=instance.pk).update(
+                    **{f'{prefix}{name}': value for name, value in metadata.items()})
+                updated += 1
+        return updated
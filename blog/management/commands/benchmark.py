@@ -0,0 +1,66 @@
+import json
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.benchmark import ENDPOINTS, SERVERS, run_benchmark, serve
+from blog.seeding import seed_blog
+
+
+class Command(BaseCommand):
+    help = ('Drive the blog endpoints with concurrent clients and report throughput, '
+            'p50/p95/p99 latency and SQL queries per request as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', action='append', choices=list(ENDPOINTS), dest='endpoints',
+                            help='Endpoint to benchmark; repeat for several. Defaults to all of them.')
+        parser.add_argument('--clients', type=int, default=8, help='Number of concurrent clients.')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per client first.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the request and data generators.')
+        parser.add_argument('--url', help='Base URL of a running server. Defaults to in-process requests.')
+        parser.add_argument('--host', default='localhost', help='Host header of in-process requests.')
+        parser.add_argument('--server', choices=list(SERVERS),
+                            help='Start uvicorn with this interface and benchmark it over HTTP.')
+        parser.add_argument('--server-workers', type=int, default=1, help='uvicorn worker processes.')
+        parser.add_argument('--populate', action='store_true',
+                            help='Seed 10k authors, 100k posts and 1M comments before running.')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+        parser.add_argument('--compare', help='JSON report of a previous run to compare against.')
+
+    def handle(self, *args, **options):
+        if options['clients'] < 1 or options['requests'] < 1:
+            raise CommandError('--clients and --requests must be positive.')
+        if options['url'] and options['server']:
+            raise CommandError('--url and --server are mutually exclusive.')
+        if options['populate']:
+            seed_blog(seed=options['seed'], log=self.stderr.write)
+
+        try:
+            with serve(options['server'], options['server_workers']) if options['server'] else nullcontext() as url:
+                report = run_benchmark(options['endpoints'], options['clients'], options['requests'],
+                                       options['warmup'], options['seed'], url or options['url'], options['host'],
+                                       options['server'], log=self.stderr.write)
+        except RuntimeError as error:
+            raise CommandError(error)
+        if options['compare']:
+            with open(options['compare']) as file:
+                self.compare(json.load(file), report)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def compare(self, baseline, report):
+        for name, result in report['endpoints'].items():
+            before = baseline['endpoints'].get(name)
+            if before is None:
+                continue
+            self.stderr.write(
+                f"{name}: throughput {before['throughput']} -> {result['throughput']} req/s, "
+                f"p95 {before['latency_ms']['p95']} -> {result['latency_ms']['p95']} ms, "
+                f"queries {(before['queries'] or {}).get('mean')} -> {(result['queries'] or {}).get('mean')}"
+            )
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.benchmark import run_serializer_benchmark
+from blog.seeding import seed_blog
+
+
+class Command(BaseCommand):
+    help = ('Time reading and serializing rows with the list serializers and with their compiled '
+            'read-only form, and report both as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows serialized per run.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per serializer; the best one counts.')
+        parser.add_argument('--host', default='localhost', help='Host of the absolute media URLs.')
+        parser.add_argument('--populate', action='store_true',
+                            help='Seed 10k authors, 100k posts and 1M comments before running.')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['repeat'] < 1:
+            raise CommandError('--rows and --repeat must be positive.')
+        if options['populate']:
+            seed_blog(log=self.stderr.write)
+
+        report = run_serializer_benchmark(options['rows'], options['repeat'], options['host'],
+                                          log=self.stderr.write)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
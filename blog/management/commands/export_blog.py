@@ -0,0 +1,61 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.exports import CHUNK_SIZE, FORMATS, OVERLAP, RANGE_SIZE, TABLES, WRITERS, filename, read_rows
+
+
+class Command(BaseCommand):
+    help = ('Export posts, comments, authors and follows to a file per table, read in keyset ranges. '
+            'With --watermarks, each run resumes after the last row the previous run exported.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('tables', nargs='*', help=f'Tables to export, of {", ".join(TABLES)}; all by default.')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl',
+                            help='JSON lines, CSV, or JSON lines of column chunks.')
+        parser.add_argument('--output-dir', default='.', help='Directory the files are written to.')
+        parser.add_argument('--watermarks',
+                            help='JSON file of the last row exported per table, read to resume and updated '
+                                 'after each table.')
+        parser.add_argument('--range-size', type=int, default=RANGE_SIZE, help='Rows per keyset range query.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Rows per database round trip and per write.')
+        parser.add_argument('--overlap', type=int, default=OVERLAP,
+                            help='Seconds read again before an updated_at watermark, for rows committed late.')
+
+    def handle(self, *args, **options):
+        if min(options['range_size'], options['chunk_size']) < 1:
+            raise CommandError('--range-size and --chunk-size must be positive.')
+        if options['overlap'] < 0:
+            raise CommandError('--overlap must not be negative.')
+        unknown = set(options['tables']) - set(TABLES)
+        if unknown:
+            raise CommandError(f'Unknown tables: {", ".join(sorted(unknown))}.')
+        watermarks = {}
+        if options['watermarks'] and os.path.exists(options['watermarks']):
+            with open(options['watermarks']) as file:
+                watermarks = json.load(file)
+        os.makedirs(options['output_dir'], exist_ok=True)
+
+        for table in options['tables'] or TABLES:
+            started = time.perf_counter()
+            path = os.path.join(options['output_dir'], filename(table, options['format']))
+            watermark = dict(watermarks.get(table, {}))
+            rows = self.count(read_rows(table, watermark, options['range_size'], options['chunk_size'],
+                                        options['overlap']))
+            with open(path, 'wb') as file:
+                for chunk in WRITERS[options['format']](rows, TABLES[table].columns, options['chunk_size']):
+                    file.write(chunk)
+            # Only a finished export moves the watermark, so an interrupted one is redone.
+            if options['watermarks'] and watermark:
+                watermarks[table] = watermark
+                with open(options['watermarks'], 'w') as file:
+                    json.dump(watermarks, file, indent=2)
+            self.stdout.write(f'Exported {self.rows} {table} to {path} in {time.perf_counter() - started:.1f}s.')
+
+    def count(self, rows):
+        self.rows = 0
+        for self.rows, row in enumerate(rows, 1):
+            yield row
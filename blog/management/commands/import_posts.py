@@ -0,0 +1,53 @@
+import json
+import sys
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.imports import BATCH_SIZE, CHUNK_SIZE, FORMATS, detect_format, import_posts, read_rows
+from blog.models import Author
+
+
+class Command(BaseCommand):
+    help = ('Create posts from a JSONL or CSV file, read as a stream and written in validated batches. '
+            'Rows that fail are reported by line.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, or - for standard input.')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Defaults to csv for .csv files and jsonl for anything else.')
+        parser.add_argument('--owner', help='Username of the author of every post, instead of an owner column.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Rows validated and written together.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows per INSERT.')
+        parser.add_argument('--errors', help='Write the errors of failed rows to this file as JSON lines.')
+
+    def handle(self, *args, **options):
+        if min(options['batch_size'], options['chunk_size']) < 1:
+            raise CommandError('--batch-size and --chunk-size must be positive.')
+        owner_id = None
+        if options['owner']:
+            owner_id = Author.objects.filter(user__username=options['owner']).values_list('id', flat=True).first()
+            if owner_id is None:
+                raise CommandError(f"No author has the username {options['owner']}.")
+        path = options['path']
+        format = options['format'] or detect_format(path)
+
+        started = time.perf_counter()
+        try:
+            with (nullcontext(sys.stdin.buffer) if path == '-' else open(path, 'rb')) as file:
+                report = import_posts(read_rows(file, format), owner_id, options['batch_size'],
+                                      options['chunk_size'], log=self.stderr.write)
+        except OSError as error:
+            raise CommandError(error)
+
+        if options['errors']:
+            with open(options['errors'], 'w') as file:
+                for error in report['errors']:
+                    file.write(json.dumps(error) + '\n')
+        else:
+            for error in report['errors']:
+                self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        self.stdout.write(f"Imported {report['created']} of {report['rows']} rows, {report['failed']} failed, "
+                          f"in {time.perf_counter() - started:.1f}s.")
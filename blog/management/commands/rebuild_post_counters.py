@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog.counters import rebuild_post_counters
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Recompute comments_count, images_count and videos_count on every post.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Number of posts updated per statement.')
+
+    def handle(self, *args, **options):
+        updated = rebuild_post_counters(Post.objects.all(), chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt counters for {updated} posts.'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from blog.counters import reconcile_follow_counters
+
+
+class Command(BaseCommand):
+    help = 'Fix follower_count and following_count on authors whose counters drifted from the follow table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Number of authors compared per batch.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report drifted authors without fixing them.')
+
+    def handle(self, *args, **options):
+        drifted = 0
+        for author_id, stored, actual in reconcile_follow_counters(options['chunk_size'], options['dry_run']):
+            drifted += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Author {author_id}: stored {stored}, actual {actual}')
+        action = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{action} {drifted} drifted authors.'))
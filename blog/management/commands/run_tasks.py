@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+import statistics
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from blog.tasks import RETENTION, VISIBILITY_TIMEOUT, claim_tasks, purge_finished_tasks, record_result
+from blog.workers import execute, setup
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks in a pool of worker processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Number of worker processes.')
+        parser.add_argument('--visibility-timeout', type=int, default=VISIBILITY_TIMEOUT,
+                            help='Seconds before a running task may be claimed by another worker.')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait for new tasks when the queue is empty.')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit as soon as the queue is drained.')
+        parser.add_argument('--retention', type=int, default=RETENTION,
+                            help='Seconds done and failed tasks are kept before they are purged.')
+        parser.add_argument('--purge-interval', type=float, default=3600,
+                            help='Seconds between purges of finished tasks; the first runs on start.')
+
+    def handle(self, *args, **options):
+        self.timings = defaultdict(list)
+        self.failures = defaultdict(int)
+        self.verbosity = options['verbosity']
+        workers = options['workers']
+        # Workers are spawned rather than forked so that none of them shares
+        # a database connection with this process.
+        context = multiprocessing.get_context('spawn')
+        running = {}
+        self.next_purge = 0
+        try:
+            while True:
+                try:
+                    with ProcessPoolExecutor(workers, mp_context=context, initializer=setup) as pool:
+                        self.run(pool, running, workers, options)
+                    break
+                except BrokenProcessPool:
+                    # A worker died abruptly, killed or out of memory, which
+                    # takes the whole pool down: its tasks fail and a new pool
+                    # takes over.
+                    for task in running.values():
+                        self.finish(task, 'Worker process died.', 0)
+                    running.clear()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connections.close_all()
+            self.report()
+
+    def run(self, pool, running, workers, options):
+        while True:
+            close_old_connections()
+            if time.monotonic() >= self.next_purge:
+                self.purge(options)
+            for task in claim_tasks(workers - len(running), options['visibility_timeout']):
+                running[pool.submit(execute, task.name, task.args, task.kwargs)] = task
+            if not running:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+            finished, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+            for future in finished:
+                self.finish(running[future], *future.result())
+                del running[future]
+
+    def purge(self, options):
+        deleted = purge_finished_tasks(options['retention'])
+        self.next_purge = time.monotonic() + options['purge_interval']
+        if self.verbosity > 1:
+            self.stdout.write(f'Purged {deleted} finished tasks.')
+
+    def finish(self, task, error, duration_ms):
+        record_result(task, error, duration_ms)
+        self.timings[task.name].append(duration_ms)
+        if error is not None:
+            self.failures[task.name] += 1
+        if self.verbosity > 1:
+            outcome = 'failed' if error else 'done'
+            self.stdout.write(f'Task {task.pk} {task.name}: {outcome} in {duration_ms} ms')
+
+    def report(self):
+        for name, durations in sorted(self.timings.items()):
+            p95 = statistics.quantiles(durations, n=20, method='inclusive')[-1] if len(durations) > 1 else durations[0]
+            self.stdout.write(f'{name}: {len(durations)} runs, {self.failures[name]} failed, '
+                              f'mean {statistics.fmean(durations):.0f} ms, p95 {p95:.0f} ms, '
+                              f'max {max(durations)} ms')
+        self.stdout.write(self.style.SUCCESS(f'Ran {sum(map(len, self.timings.values()))} tasks.'))
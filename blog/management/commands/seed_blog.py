@@ -0,0 +1,47 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from blog.seeding import seed_blog
+
+
+class Command(BaseCommand):
+    help = ('Fill the database with synthetic authors, a power-law follow graph, posts and '
+            'comment threads, written in parallel batches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=10_000, help='Number of users and authors.')
+        parser.add_argument('--posts', type=int, default=100_000, help='Number of posts.')
+        parser.add_argument('--comments', type=int, default=1_000_000, help='Number of comments.')
+        parser.add_argument('--follows', type=int, default=20, help='Average number of followings per author.')
+        parser.add_argument('--timelines', type=int, default=100,
+                            help='Number of home timelines to materialize.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the generator.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT.')
+        parser.add_argument('--workers', type=int,
+                            help='Processes writing batches. Defaults to the CPU count, or 1 on SQLite, '
+                                 'which only allows one writer at a time.')
+
+    def handle(self, *args, **options):
+        if min(options['authors'], options['batch_size']) < 1:
+            raise CommandError('--authors and --batch-size must be positive.')
+        workers = options['workers']
+        if workers is None:
+            workers = 1 if connection.vendor == 'sqlite' else os.cpu_count() or 1
+
+        started = time.perf_counter()
+        counts = seed_blog(
+            authors=options['authors'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            timelines=options['timelines'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            workers=workers,
+            log=self.stdout.write if options['verbosity'] > 1 else lambda message: None,
+        )
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Seeded {summary} in {time.perf_counter() - started:.1f}s.'))
@@ -0,0 +1,109 @@
+import os
+import struct
+
+from django.core.files.images import get_image_dimensions
+
+MP4_EXTENSIONS = {'.mp4', '.mov', '.m4v'}
+CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+
+
+def image_metadata(file):
+    """
+    Width and height of an image, read from its header through Pillow's
+    incremental parser rather than by decoding the whole picture.
+    """
+    width, height = get_image_dimensions(file)
+    return {'width': width, 'height': height}
+
+
+def video_metadata(file):
+    """
+    Duration in seconds, resolution and codec of an MP4/MOV file.
+
+    Only the box headers are read: the parser seeks over every top-level
+    box but `moov`, so the media data itself is never loaded. Returns an
+    empty dict for other containers or files it cannot make sense of.
+    """
+    if os.path.splitext(file.name)[1].lower() not in MP4_EXTENSIONS:
+        return {}
+    position = file.tell() if hasattr(file, 'tell') else 0
+    try:
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        moov = find_box(file, 0, size, b'moov')
+        return parse_moov(file, *moov) if moov else {}
+    except (struct.error, ValueError, OSError):
+        return {}
+    finally:
+        file.seek(position)
+
+
+def iter_boxes(file, start, end):
+    """
+    Yield `(type, payload_start, box_end)` for the ISO-BMFF boxes laid out
+    between `start` and `end`.
+    """
+    position = start
+    while position + 8 <= end:
+        file.seek(position)
+        size, kind = struct.unpack('>I4s', file.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack('>Q', file.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - position
+        if size < header:
+            raise ValueError('Corrupt box header.')
+        yield kind, position + header, position + size
+        position += size
+
+
+def find_box(file, start, end, kind):
+    for box_kind, payload, box_end in iter_boxes(file, start, end):
+        if box_kind == kind:
+            return payload, box_end
+    return None
+
+
+def read_at(file, offset, length):
+    file.seek(offset)
+    return file.read(length)
+
+
+def parse_moov(file, start, end):
+    metadata = {}
+    for kind, payload, box_end in iter_boxes(file, start, end):
+        if kind == b'mvhd':
+            version = read_at(file, payload, 1)[0]
+            if version == 1:
+                timescale, duration = struct.unpack('>IQ', read_at(file, payload + 20, 12))
+            else:
+                timescale, duration = struct.unpack('>II', read_at(file, payload + 12, 8))
+            if timescale:
+                metadata['duration'] = round(duration / timescale, 3)
+        elif kind == b'trak' and 'codec' not in metadata:
+            metadata.update(parse_video_track(file, payload, box_end))
+    return metadata
+
+
+def parse_video_track(file, start, end):
+    track = {}
+    for kind, payload, box_end in walk(file, start, end):
+        if kind == b'tkhd':
+            width, height = struct.unpack('>II', read_at(file, box_end - 8, 8))
+            track['width'], track['height'] = width >> 16, height >> 16
+        elif kind == b'hdlr':
+            if read_at(file, payload + 8, 4) != b'vide':
+                return {}
+        elif kind == b'stsd':
+            track['codec'] = read_at(file, payload + 12, 4).decode('latin-1').strip()
+    return track if 'codec' in track else {}
+
+
+def walk(file, start, end):
+    """Depth-first walk through the container boxes of a track."""
+    for kind, payload, box_end in iter_boxes(file, start, end):
+        yield kind, payload, box_end
+        if kind in CONTAINER_BOXES:
+            yield from walk(file, payload, box_end)
@@ -0,0 +1,70 @@
+import logging
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from blog import queries
+
+logger = logging.getLogger('blog.queries')
+
+
+class QueryBudgetMiddleware:
+    """
+    Record the SQL queries of a sample of requests (BLOG_QUERY_SAMPLE_RATE)
+    and report them per view action: the summary goes to the
+    X-Query-Summary header and the `blog.queries` logger, with a warning
+    for requests over their BLOG_QUERY_BUDGETS entry or repeating a
+    statement. With BLOG_QUERY_BUDGET_STRICT going over budget is an error.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        with queries.QueryRecorder() as recorder:
+            response = self.get_response(request)
+        return self.report(request, response, recorder)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        # Connections are per thread: record on the one running the request's queries.
+        recorder = await sync_to_async(queries.QueryRecorder().__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recorder.__exit__)(None, None, None)
+        return self.report(request, response, recorder)
+
+    def sampled(self):
+        return queries.SAMPLE_RATE and random.random() < queries.SAMPLE_RATE
+
+    def report(self, request, response, recorder):
+        endpoint = getattr(request, 'query_endpoint', None)
+        summary = recorder.summary()
+        budget = queries.BUDGETS.get(endpoint)
+
+        response[queries.HEADER] = (f"endpoint={endpoint}; count={summary['count']}; "
+                                    f"time_ms={summary['time_ms']}; duplicates={len(summary['duplicates'])}"
+                                    + (f'; budget={budget}' if budget is not None else ''))
+        over_budget = budget is not None and summary['count'] > budget
+        if over_budget or summary['duplicates']:
+            logger.warning(queries.describe(endpoint, summary, budget))
+        else:
+            logger.info(queries.describe(endpoint, summary, budget))
+        if over_budget and queries.STRICT:
+            queries.check_budget(endpoint, summary, budget)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_endpoint = queries.endpoint_name(view_func, request.method)
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0006_author_joined_at_alter_author_image_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["-published_date", "-created_at", "-id"],
+                name="post_published_keyset_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["status", "-published_date", "-created_at", "-id"],
+                name="post_status_keyset_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["-updated_at", "-id"], name="post_updated_keyset_idx"
+            ),
+        ),
+    ]
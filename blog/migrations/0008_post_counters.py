@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:41
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_post_counters(apps, schema_editor):
+    Post = apps.get_model("blog", "Post")
+    updates = {}
+    for counter, child in [
+        ("comments_count", "Comment"),
+        ("images_count", "PostImage"),
+        ("videos_count", "PostVideo"),
+    ]:
+        counts = (
+            apps.get_model("blog", child)
+            .objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        updates[counter] = Coalesce(Subquery(counts), 0)
+
+    # Primary key chunks keep each UPDATE short.
+    ids = Post.objects.order_by("pk").values_list("pk", flat=True)
+    last_pk = 0
+    while chunk := list(ids.filter(pk__gt=last_pk)[:1000]):
+        Post.objects.filter(pk__in=chunk).update(**updates)
+        last_pk = chunk[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0007_post_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="images_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="videos_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_post_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:44
+
+from django.db import migrations, models
+
+# Each path level is the comment id zero padded to this width, as in
+# blog.threads at the time of this migration.
+PATH_STEP = 10
+
+
+def backfill_comment_paths(apps, schema_editor):
+    Comment = apps.get_model("blog", "Comment")
+    # Parents are always older than their replies, so walking by id sees
+    # every parent before its children.
+    nodes = {}
+    batch = []
+    for comment in Comment.objects.order_by("pk").iterator(chunk_size=2000):
+        parent_path, parent_depth = nodes.get(comment.parent_id, ("", -1))
+        comment.path = f"{parent_path}{comment.pk:0{PATH_STEP}d}"
+        comment.depth = parent_depth + 1
+        nodes[comment.pk] = (comment.path, comment.depth)
+        batch.append(comment)
+        if len(batch) >= 2000:
+            Comment.objects.bulk_update(batch, ["path", "depth"])
+            batch = []
+    Comment.objects.bulk_update(batch, ["path", "depth"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0008_post_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="depth",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="path",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=255
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["post", "path"], name="comment_thread_idx"),
+        ),
+        migrations.RunPython(backfill_comment_paths, migrations.RunPython.noop),
+    ]
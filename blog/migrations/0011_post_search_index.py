@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def forwards(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute("ALTER TABLE blog_post ADD FULLTEXT INDEX post_fulltext_idx (title, body)")
+    elif schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("CREATE VIRTUAL TABLE blog_post_fts USING fts5(title, body)")
+        schema_editor.execute("INSERT INTO blog_post_fts (rowid, title, body) SELECT id, title, body FROM blog_post")
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute("ALTER TABLE blog_post DROP INDEX post_fulltext_idx")
+    elif schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE blog_post_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0010_timeline_entry"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
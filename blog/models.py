@@ -1,10 +1,11 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.core.validators import FileExtensionValidator
 from django.conf import settings
-from django.utils.text import slugify
 from django.utils import timezone
 from functools import partial
+import uuid
 
+from blog.threads import comment_path
 from blog.validators import file_size_validator
 
 
@@ -16,6 +17,9 @@ class Author(models.Model):
                               default='users/profiles/default.png',
                               validators=[file_size_validator]
                               )
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
     following_count = models.PositiveIntegerField(default=0)
     follows = models.ManyToManyField(
         'self',
@@ -24,10 +28,19 @@ class Author(models.Model):
         related_name='followed_by'
     )
     joined_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.user.username
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='author_updated_keyset_idx'),
+        ]
+
+
+Follow = Author.follows.through
+
     
 class Post(models.Model):
     STATUS_CHOICES = [
@@ -43,26 +56,83 @@ class Post(models.Model):
     published_date = models.DateTimeField(null=True, blank=True, )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    images_count = models.PositiveIntegerField(default=0, editable=False)
+    videos_count = models.PositiveIntegerField(default=0, editable=False)
+    # Only ever changed in the database, by blog.counters.
+    COUNTERS = ('comments_count', 'images_count', 'videos_count')
     
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so post_save can tell a publish apart
+        # from an edit of an already published post.
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_slug = instance.__dict__.get('slug')
+        return instance
+
     def save(self, *args, **kwargs):
         if self.status == 'P' and not self.published_date:
             self.published_date = timezone.now()
         elif self.status == 'D':
             self.published_date = None
-        if not self.slug:
-            self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # Writing back the counters read with the post would undo
+            # increments made since.
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in self.COUNTERS]
+        if self.slug:
+            super().save(*args, **kwargs)
+            return
+        # Imported here, as blog.slugs queries this model.
+        from blog.slugs import SAVE_ATTEMPTS, allocate_slug
+        for attempt in range(1, SAVE_ATTEMPTS + 1):
+            self.slug = allocate_slug(self.title)
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                # Another post took the slug after it was read.
+                self.slug = ''
+                if attempt == SAVE_ATTEMPTS:
+                    raise
 
     def __str__(self):
         return self.title
 
     class Meta:
         ordering = ['-published_date', '-created_at']
+        indexes = [
+            models.Index(fields=['-published_date', '-created_at', '-id'], name='post_published_keyset_idx'),
+            models.Index(fields=['status', '-published_date', '-created_at', '-id'], name='post_status_keyset_idx'),
+            models.Index(fields=['-updated_at', '-id'], name='post_updated_keyset_idx'),
+            models.Index(fields=['owner', 'status', '-published_date', '-id'], name='post_owner_feed_idx'),
+        ]
         
+class TimelineEntry(models.Model):
+    follower = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='timeline')
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='+')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    published_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['follower', 'post'], name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['follower', '-published_date', '-post'], name='timeline_feed_idx'),
+            models.Index(fields=['follower', 'author'], name='timeline_author_idx'),
+        ]
+
+
 class PostImage(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='blog/post_images/', validators=[file_size_validator])
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
     caption = models.CharField(max_length=255, blank=True, null=True)
     upload_at = models.DateTimeField(auto_now_add=True)
 
@@ -72,6 +142,10 @@ class PostImage(models.Model):
 class PostVideo(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='videos')
     video = models.FileField(upload_to='blog/post_videos/', validators=[FileExtensionValidator(allowed_extensions=['mp4', 'mkv', 'avi', 'mov']), partial(file_size_validator, max_size_in_mb=10)])
+    duration = models.FloatField(null=True, blank=True, editable=False)
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    codec = models.CharField(max_length=16, blank=True, default='', editable=False)
     caption = models.CharField(max_length=255, blank=True, null=True)
     upload_at = models.DateTimeField(auto_now_add=True)
 
@@ -79,11 +153,27 @@ class PostVideo(models.Model):
         return f"Video for {self.post.title}"
 
 
+class VideoUpload(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='video_uploads')
+    owner = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='video_uploads')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    caption = models.CharField(max_length=255, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload of {self.filename} ({self.offset}/{self.size} bytes)"
+
+
 class Comment(models.Model):
     owner = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='comments')
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     body = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     parent = models.ForeignKey(
         'self',
         on_delete=models.CASCADE,
@@ -91,6 +181,17 @@ class Comment(models.Model):
         blank=True,
         related_name='replies'
     )
+    path = models.CharField(max_length=255, blank=True, default='', editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    def save(self, *args, **kwargs):
+        creating = self._state.adding
+        if creating:
+            self.depth = self.parent.depth + 1 if self.parent_id else 0
+        super().save(*args, **kwargs)
+        if creating:
+            self.path = comment_path(self.pk, self.parent)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
 
     def __str__(self):
         return f"Comment by {self.owner.user.username} on {self.created_at.strftime("%Y-%m-%d %H:%M:%S")}"
@@ -98,3 +199,40 @@ class Comment(models.Model):
     def is_reply(self):
         return self.parent is not None
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'path'], name='comment_thread_idx'),
+            models.Index(fields=['updated_at', 'id'], name='comment_updated_keyset_idx'),
+        ]
+
+
+class Task(models.Model):
+    STATUS_CHOICES = [
+        ('Q', "Queued"),
+        ('R', "Running"),
+        ('D', "Done"),
+        ('F', "Failed")
+    ]
+
+    name = models.CharField(max_length=255)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=1, choices=STATUS_CHOICES, default='Q')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    # When a queued task may run, or when a running task's claim expires.
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='task_claim_idx'),
+        ]
+
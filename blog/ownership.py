@@ -0,0 +1,53 @@
+from typing import NamedTuple
+
+from django.db.models import Subquery
+from django.http import Http404
+
+from blog.models import Author, Post
+
+
+class Ownership(NamedTuple):
+    author_id: int | None
+    post_owner_id: int | None = None
+
+    @property
+    def owns_post(self):
+        return self.author_id is not None and self.author_id == self.post_owner_id
+
+
+def fetch_ownership(user, post_pk=None):
+    # Token users carry their author id as a claim; others need a lookup.
+    author_id = getattr(user, 'author_id', None)
+    authors = None
+    if author_id is None and user.is_authenticated:
+        authors = Author.objects.filter(user_id=user.id).values('id')
+    if post_pk is None:
+        return Ownership(authors.values_list('id', flat=True).first() if authors is not None else author_id)
+
+    posts = Post.objects.filter(pk=post_pk)
+    if authors is None:
+        owner_id = posts.values_list('owner_id', flat=True).first()
+        row = None if owner_id is None else (author_id, owner_id)
+    else:
+        row = posts.annotate(author_id=Subquery(authors[:1])).values_list('author_id', 'owner_id').first()
+    if row is None:
+        raise Http404('No Post matches the given query.')
+    return Ownership(*row)
+
+
+def resolve_ownership(request, post_pk=None):
+    """
+    The caller's author id and, on routes nested under a post, the id of
+    the post's owner, fetched together in one query the first time they are
+    needed and cached on the request. Permissions, querysets and
+    `perform_create` all share the same lookup. Raises Http404 when the
+    post does not exist. No query is needed for the author id of users
+    authenticated by ClaimsJWTAuthentication.
+    """
+    cache = request.__dict__.setdefault('_ownership', {})
+    key = None if post_pk is None else str(post_pk)
+    if key not in cache:
+        cache[key] = fetch_ownership(request.user, post_pk)
+    if key is not None and None not in cache:
+        cache[None] = Ownership(cache[key].author_id)
+    return cache[key]
@@ -1,5 +1,214 @@
-from rest_framework.pagination import PageNumberPagination
+import asyncio
+import json
+import operator
+from functools import reduce
+
+from django.core.paginator import InvalidPage, Page
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, PageNumberPagination
 
 
 class DefaultPaginationClass(PageNumberPagination):
-    page_size = 10
\ No newline at end of file
+    page_size = 10
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        `paginate_queryset` on the async ORM, with the count and the page
+        queried together. Only numeric page numbers are supported.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        page_number = request.query_params.get(self.page_query_param) or 1
+        paginator = self.django_paginator_class(queryset, page_size)
+        try:
+            number = int(page_number)
+            offset = max(number - 1, 0) * page_size
+            # Django still runs async queries one at a time on the request's
+            # database thread; gathering them lets a native backend overlap them.
+            paginator.count, results = await asyncio.gather(
+                queryset.acount(), _alist(queryset[offset:offset + page_size]))
+            self.page = Page(results, paginator.validate_number(number), paginator)
+        except (ValueError, InvalidPage) as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        return list(self.page)
+
+
+class KeysetPaginationClass(CursorPagination):
+    """
+    Cursor pagination keyed on every ordering column plus `id`.
+
+    DRF's CursorPagination only seeks on the first ordering field and falls
+    back to OFFSET for ties. Here the cursor carries the full row key, so the
+    next page is a single `WHERE (a, b, id) < (...)` range scan on the matching
+    composite index, no matter how deep the client has paged.
+    Descending columns sort NULLs last and ascending ones NULLs first, which is
+    what MySQL does natively, so no extra `IS NULL` sort key is emitted.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-published_date', '-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering.append('-id' if ordering[-1].startswith('-') else 'id')
+        return tuple(ordering)
+
+    def order(self, queryset, request, view=None):
+        """`queryset` in page order, for reading it whole."""
+        return queryset.order_by(*[_order_by(field) for field in self.get_ordering(request, queryset, view)])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.seek(queryset, request, view)
+        return None if queryset is None else self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.seek(queryset, request, view)
+        return None if queryset is None else self.set_page(await _alist(queryset))
+
+    def seek(self, queryset, request, view=None):
+        """The query for the page after the cursor, one row longer to tell whether more follow."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.fields = [_ordering_field(queryset, field) for field in self.ordering]
+
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor.reverse if self.cursor else False
+        current_position = self.decode_position(self.cursor)
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*[_order_by(field) for field in ordering])
+        if current_position is not None:
+            queryset = queryset.filter(_seek(ordering, current_position))
+        self.reverse, self.has_position = reverse, current_position is not None
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        self.page = results[:self.page_size]
+        has_more = len(results) > len(self.page)
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = self.has_position
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.has_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def decode_position(self, cursor):
+        if cursor is None or cursor.position is None:
+            return None
+        try:
+            values = json.loads(cursor.position)
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [None if value is None else field.to_python(value)
+                    for field, value in zip(self.fields, values)]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            attr = field.lstrip('-')
+            value = instance[attr] if isinstance(instance, dict) else getattr(instance, attr)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return json.dumps(values, separators=(',', ':'))
+
+
+class FeedPaginationClass(KeysetPaginationClass):
+    """
+    Forward-only keyset pagination over several sources of post ids, each
+    already ordered by `(published_date, <id>)`. Every source is read with
+    one range scan from the cursor and the results are merged in Python.
+    """
+    ordering = ('-published_date', '-id')
+
+    def paginate_sources(self, sources, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.fields = [queryset.model._meta.get_field(field.lstrip('-'))
+                       for field in self.ordering]
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is not None and self.cursor.reverse:
+            raise NotFound(self.invalid_cursor_message)
+        current_position = self.decode_position(self.cursor)
+
+        keys = set()
+        for source, id_field in sources:
+            ordering = ('-published_date', '-' + id_field)
+            source = source.order_by(*[_order_by(field) for field in ordering])
+            if current_position is not None:
+                source = source.filter(_seek(ordering, current_position))
+            keys.update(source.values_list('published_date', id_field)[:self.page_size + 1])
+
+        keys = sorted(keys, reverse=True)
+        posts = queryset.in_bulk([post_id for _, post_id in keys[:self.page_size]])
+        self.page = [posts[post_id] for _, post_id in keys[:self.page_size] if post_id in posts]
+        self.has_next = len(keys) > self.page_size
+        self.has_previous = False
+        return self.page
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+def _ordering_field(queryset, field):
+    name = field.lstrip('-')
+    if name in queryset.query.annotations:
+        return queryset.query.annotations[name].output_field
+    return queryset.model._meta.get_field(name)
+
+
+def _reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+
+
+def _order_by(field):
+    if field.startswith('-'):
+        return F(field[1:]).desc(nulls_last=True)
+    return F(field).asc(nulls_first=True)
+
+
+def _seek(ordering, position):
+    """
+    Build the row-value comparison `(a, b, id) > (x, y, z)` for the given
+    ordering, expanded so that every branch is a range on the composite index.
+    """
+    branches = []
+    equal = Q()
+    for field, value in zip(ordering, position):
+        attr = field.lstrip('-')
+        if field.startswith('-') and value is not None:
+            branches.append(equal & (Q(**{f'{attr}__lt': value}) | Q(**{f'{attr}__isnull': True})))
+        elif not field.startswith('-'):
+            after = Q(**{f'{attr}__isnull': False}) if value is None else Q(**{f'{attr}__gt': value})
+            branches.append(equal & after)
+        equal &= Q(**{f'{attr}__isnull': True}) if value is None else Q(**{attr: value})
+    return reduce(operator.or_, branches, Q(pk__in=[]))
@@ -1,7 +1,6 @@
-from django.shortcuts import get_object_or_404
 from rest_framework import permissions
 
-from .models import Post, Author
+from .ownership import resolve_ownership
 
 
 class DenyUpdateExceptMe(permissions.BasePermission):
@@ -15,15 +14,12 @@ class IsOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        return request.user.author == obj.owner
+        return obj.owner_id == resolve_ownership(request).author_id
 
 
 class IsPostOwnerOrReadOnly(permissions.BasePermission):
     def is_owner(self, request, view):
-        post_pk = view.kwargs.get('post_pk')
-        post = get_object_or_404(Post, pk=post_pk)
-        author = Author.objects.filter(user=request.user.id).first()
-        return post.owner == author
+        return resolve_ownership(request, view.kwargs.get('post_pk')).owns_post
         
 
     def has_permission(self, request, view):
@@ -0,0 +1,131 @@
+import os
+import re
+import time
+import traceback
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+# Maximum number of SQL queries per endpoint, keyed as 'PostViewSet.list'.
+BUDGETS = getattr(settings, 'BLOG_QUERY_BUDGETS', {})
+# Share of requests the middleware records, from 0 (off) to 1 (all).
+SAMPLE_RATE = getattr(settings, 'BLOG_QUERY_SAMPLE_RATE', 0)
+# Raise instead of logging when a recorded request goes over its budget.
+STRICT = getattr(settings, 'BLOG_QUERY_BUDGET_STRICT', False)
+HEADER = 'X-Query-Summary'
+
+PROJECT_ROOT = str(settings.BASE_DIR)
+IGNORED_PATHS = ('site-packages', os.path.join('blog', 'queries.py'), os.path.join('blog', 'middleware.py'))
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+IN_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def normalize(sql):
+    """SQL with literals and IN lists collapsed, so repeats of a statement compare equal."""
+    return IN_LIST_RE.sub('(...)', LITERAL_RE.sub('%s', sql))
+
+
+def call_site():
+    """The innermost frame of project code, outside Django and this module."""
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(PROJECT_ROOT) and not any(path in frame.filename for path in IGNORED_PATHS):
+            return f'{os.path.relpath(frame.filename, PROJECT_ROOT)}:{frame.lineno} in {frame.name}'
+    return None
+
+
+class QueryRecorder:
+    """
+    Record the queries run on every database connection of the current
+    thread while active, with their duration and the project code that
+    issued them.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started, call_site()))
+
+    def __enter__(self):
+        self.stack = ExitStack()
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stack.close()
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def duplicates(self):
+        """Statements run more than once, most repeated first: the N+1 suspects."""
+        counts = Counter()
+        sites = defaultdict(Counter)
+        for sql, _, site in self.queries:
+            statement = normalize(sql)
+            counts[statement] += 1
+            sites[statement][site] += 1
+        return [
+            {'sql': statement, 'count': count, 'call_site': sites[statement].most_common(1)[0][0]}
+            for statement, count in counts.most_common() if count > 1
+        ]
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'time_ms': round(sum(duration for _, duration, _ in self.queries) * 1000, 2),
+            'duplicates': self.duplicates(),
+        }
+
+
+def endpoint_name(view_func, method):
+    """'PostViewSet.list'-style name of the view action serving a request."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', None)
+    action = (getattr(view_func, 'actions', None) or {}).get(method.lower(), method.lower())
+    return f'{cls.__name__}.{action}'
+
+
+def describe(endpoint, summary, budget):
+    lines = [f"{endpoint or 'request'} ran {summary['count']} queries"
+             + (f' over a budget of {budget}' if budget is not None else '')
+             + f" in {summary['time_ms']} ms."]
+    for duplicate in summary['duplicates']:
+        lines.append(f"  {duplicate['count']}x at {duplicate['call_site']}: {duplicate['sql'][:200]}")
+    return '\n'.join(lines)
+
+
+def check_budget(endpoint, summary, budget=None):
+    """Raise QueryBudgetExceeded when `summary` goes over the endpoint's budget."""
+    budget = BUDGETS.get(endpoint) if budget is None else budget
+    if budget is not None and summary['count'] > budget:
+        raise QueryBudgetExceeded(describe(endpoint, summary, budget))
+
+
+@contextmanager
+def assert_query_budget(budget=None, endpoint=None, allow_duplicates=True):
+    """
+    Fail when the enclosed block runs more queries than `budget`, or than
+    the configured budget of `endpoint`. With `allow_duplicates=False` any
+    repeated statement fails it too, reported with the line issuing it.
+    """
+    with QueryRecorder() as recorder:
+        yield recorder
+    summary = recorder.summary()
+    check_budget(endpoint, summary, budget)
+    if not allow_duplicates and summary['duplicates']:
+        raise QueryBudgetExceeded(describe(endpoint, summary, budget))
@@ -0,0 +1,164 @@
+import mimetypes
+import os
+import re
+import uuid
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+# How the bytes of a media file leave the server:
+#   None               - the app streams them itself (FileResponse / ranges)
+#   'x-accel-redirect' - nginx serves BLOG_MEDIA_ACCEL_PREFIX + file name
+#   'x-sendfile'       - Apache/lighttpd serve the absolute file path
+OFFLOAD = getattr(settings, 'BLOG_MEDIA_OFFLOAD', None)
+ACCEL_PREFIX = getattr(settings, 'BLOG_MEDIA_ACCEL_PREFIX', '/protected-media/')
+MAX_RANGES = 16
+BLOCK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_ranges(header, size):
+    """
+    Parse a `Range: bytes=...` header into sorted, merged `(start, end)`
+    pairs with inclusive ends. Returns None when the header should be
+    ignored (bad syntax, other units, too many ranges) and raises
+    RangeNotSatisfiable when no range overlaps the file.
+    """
+    units, _, specs = header.partition('=')
+    if units.strip() != 'bytes' or not specs:
+        return None
+    specs = specs.split(',')
+    if len(specs) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for spec in specs:
+        match = RANGE_RE.match(spec.strip())
+        if match is None or match.groups() == ('', ''):
+            return None
+        first, last = match.groups()
+        if first == '':
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            if last and int(last) < start:
+                return None
+        if start < size and end >= start:
+            ranges.append((start, end))
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def if_range_matches(request, etag, last_modified):
+    value = request.headers.get('If-Range')
+    if value is None:
+        return True
+    if value.startswith(('"', 'W/')):
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+def read_range(path, start, end):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining:
+            block = file.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                return
+            remaining -= len(block)
+            yield block
+
+
+def offload_response(file, content_type):
+    response = HttpResponse(content_type=content_type)
+    if OFFLOAD == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = ACCEL_PREFIX + quote(file.name)
+    else:
+        response['X-Sendfile'] = file.storage.path(file.name)
+    return response
+
+
+def serve_file(request, file):
+    """
+    Serve a stored file with HTTP range support: conditional GETs, single
+    ranges as 206, several ranges as multipart/byteranges, 416 when none
+    fits. A full file goes through FileResponse, which lets the WSGI server
+    use sendfile. With BLOG_MEDIA_OFFLOAD the front proxy sends the bytes.
+    """
+    content_type = mimetypes.guess_type(file.name)[0] or 'application/octet-stream'
+    if OFFLOAD:
+        return offload_response(file, content_type)
+
+    path = file.storage.path(file.name)
+    stat = os.stat(path)
+    size, last_modified = stat.st_size, int(stat.st_mtime)
+    etag = f'"{size:x}-{stat.st_mtime_ns:x}"'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    ranges = None
+    header = request.headers.get('Range')
+    if header and if_range_matches(request, etag, last_modified):
+        try:
+            ranges = parse_ranges(header, size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if not ranges:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        response = StreamingHttpResponse(read_range(path, start, end), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        response = multipart_response(path, ranges, size, content_type)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def multipart_response(path, ranges, size, content_type):
+    boundary = uuid.uuid4().hex
+    heads = [
+        (f'--{boundary}\r\nContent-Type: {content_type}\r\n'
+         f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n').encode()
+        for start, end in ranges
+    ]
+    tail = f'\r\n--{boundary}--\r\n'.encode()
+
+    def parts():
+        for index, ((start, end), head) in enumerate(zip(ranges, heads)):
+            yield (b'\r\n' if index else b'') + head
+            yield from read_range(path, start, end)
+        yield tail
+
+    length = sum(len(head) + end - start + 1 for (start, end), head in zip(ranges, heads)) \
+        + 2 * (len(ranges) - 1) + len(tail)
+    response = StreamingHttpResponse(parts(), status=206,
+                                     content_type=f'multipart/byteranges; boundary={boundary}')
+    response['Content-Length'] = str(length)
+    return response
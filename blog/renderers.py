@@ -0,0 +1,152 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+from .compiled import CompiledSerializer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CHUNK_SIZE = getattr(settings, 'BLOG_STREAMING_CHUNK_SIZE', 100)
+# 'orjson' or 'json'; orjson when it is installed.
+JSON_ENCODER = getattr(settings, 'BLOG_JSON_ENCODER', 'json' if orjson is None else 'orjson')
+
+
+def encode_json(data):
+    """The bytes JSONRenderer gives for `data`, with the standard library."""
+    content = json.dumps(data, cls=encoders.JSONEncoder, ensure_ascii=False, allow_nan=not api_settings.STRICT_JSON,
+                         separators=(',', ':'))
+    return content.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+
+
+def encode_orjson(data):
+    """encode_json with orjson."""
+    content = orjson.dumps(data, default=encoders.JSONEncoder().default)
+    return content.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+ENCODERS = {'json': encode_json, 'orjson': encode_orjson}
+
+
+class StreamingJSONRenderer(JSONRenderer):
+    """
+    JSON arrays written row by row, for clients that accept
+    `application/stream+json` (or ask for `?format=json-stream`). Views send
+    rows through `streaming_response`; anything else, such as error
+    responses, is rendered in one piece.
+    """
+    media_type = 'application/stream+json'
+    format = 'json-stream'
+    streaming = True
+
+    def __init__(self, encoder=None):
+        self.encode = ENCODERS[encoder or JSON_ENCODER]
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b'' if data is None else self.encode(data)
+
+    def stream(self, rows, to_representation, chunk_size=CHUNK_SIZE):
+        """Yield the JSON array of `rows` in chunks of `chunk_size` rows."""
+        opening = b'['
+        chunk = []
+        for row in rows:
+            chunk.append(self.encode(to_representation(row)))
+            if len(chunk) >= chunk_size:
+                yield opening + b','.join(chunk)
+                opening, chunk = b',', []
+        if chunk:
+            yield opening + b','.join(chunk) + b']'
+        else:
+            yield b']' if opening == b',' else b'[]'
+
+
+def is_streaming(request):
+    return getattr(request.accepted_renderer, 'streaming', False)
+
+
+async def aiterate(iterator):
+    """Iterate a synchronous iterator from async code, one item at a time on the database thread."""
+    done = object()
+    next_item = sync_to_async(next)
+    while (item := await next_item(iterator, done)) is not done:
+        yield item
+
+
+def streaming_response(request, rows, to_representation, chunk_size=CHUNK_SIZE):
+    """
+    A chunked response of the JSON array of `rows`, an iterator such as
+    `queryset.iterator(chunk_size)`. Under ASGI the chunks are produced
+    through an async iterator, which Django would otherwise buffer whole.
+    """
+    return chunked_response(request, request.accepted_renderer.stream(rows, to_representation, chunk_size))
+
+
+def chunked_response(request, chunks):
+    """A response of the byte `chunks`, in the negotiated media type."""
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        chunks = aiterate(chunks)
+    return StreamingHttpResponse(chunks, content_type=request.accepted_media_type)
+
+
+class ExportRenderer(BaseRenderer):
+    """
+    The formats of blog.exports, for content negotiation: export views
+    write the response themselves with chunked_response and render errors
+    as JSON.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Content reaching a renderer here is already written in the format.
+        return b'' if data is None else bytes(data)
+
+
+class JSONLinesRenderer(ExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'jsonl'
+
+
+class CSVRenderer(ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class ColumnsRenderer(ExportRenderer):
+    media_type = 'application/x-columns+ndjson'
+    format = 'columns'
+
+
+class StreamingListMixin:
+    """
+    Answer `list` with the whole filtered collection as a streamed JSON
+    array, without pagination, when StreamingJSONRenderer is negotiated.
+    Rows come in the order of the view's keyset pagination if it has one,
+    read with `.iterator()` through the compiled serializer when the view
+    has one.
+    """
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, StreamingJSONRenderer]
+
+    def list(self, request, *args, **kwargs):
+        if not is_streaming(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        if hasattr(self.paginator, 'order'):
+            queryset = self.paginator.order(queryset, request, self)
+        return self.stream_queryset(queryset)
+
+    def stream_queryset(self, queryset, serializer=None):
+        if serializer is None:
+            serializer = (self.get_compiled_serializer() if hasattr(self, 'get_compiled_serializer')
+                          else self.get_serializer())
+        if isinstance(serializer, CompiledSerializer):
+            queryset = serializer.values(queryset)
+        return streaming_response(self.request, queryset.iterator(chunk_size=CHUNK_SIZE),
+                                  serializer.to_representation, CHUNK_SIZE)
@@ -0,0 +1,198 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+FTS_TABLE = 'blog_post_fts'
+
+
+def tokenize(text):
+    return [token.lower() for token in TOKEN_RE.findall(text or '')]
+
+
+class SearchBackend:
+    """
+    Full-text index over `Post.title` and `Post.body`.
+
+    `search` narrows a Post queryset to the posts matching every term of
+    `query` and annotates it with a `rank` where higher is more relevant.
+    `index` and `remove` keep the index in step with single posts,
+    `index_many` with new posts written in bulk, and `rebuild` with every
+    post, after writes that bypassed the signals.
+    """
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+    def index(self, post):
+        pass
+
+    def index_many(self, posts):
+        for post in posts:
+            self.index(post)
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class MySQLFullTextBackend(SearchBackend):
+    """
+    InnoDB FULLTEXT index on `(title, body)`. The index is maintained by
+    MySQL itself, so there is nothing to do on save.
+    """
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset.none()
+        table = queryset.model._meta.db_table
+        match = f'MATCH ({table}.title, {table}.body) AGAINST (%s IN BOOLEAN MODE)'
+        boolean_query = ' '.join(f'+{term}' for term in terms)
+        return queryset.annotate(rank=RawSQL(match, [boolean_query], output_field=FloatField())) \
+                       .filter(rank__gt=0)
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """
+    FTS5 virtual table mirroring `(title, body)`, ranked with bm25.
+    Rows are replaced one by one as posts are saved.
+    """
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset.none()
+        table = queryset.model._meta.db_table
+        fts_query = ' '.join(f'"{term}"' for term in terms)
+        matches = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [fts_query])
+        rank = RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, 2.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id',
+            [fts_query],
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=matches).annotate(rank=rank)
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+            cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+                           [post.pk, post.title, post.body])
+
+    def index_many(self, posts):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+                               [(post.pk, post.title, post.body) for post in posts])
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, title, body) SELECT id, title, body FROM blog_post')
+
+
+class InvertedIndexBackend(SearchBackend):
+    """
+    Process-local inverted index for databases without a full-text engine.
+
+    The index is built from the posts table on first use and then updated
+    incrementally. Matches are ranked by TF-IDF, with title terms counted
+    twice, and only the best `max_results` are returned.
+    """
+    max_results = 1000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.postings = None
+        self.documents = {}
+
+    def build(self):
+        from blog.models import Post
+
+        self.postings = defaultdict(dict)
+        self.documents = {}
+        for post_id, title, body in Post.objects.values_list('id', 'title', 'body').iterator(chunk_size=2000):
+            self.add(post_id, title, body)
+
+    def add(self, post_id, title, body):
+        frequencies = Counter(tokenize(title) * 2 + tokenize(body))
+        self.documents[post_id] = frequencies
+        for term, frequency in frequencies.items():
+            self.postings[term][post_id] = frequency
+
+    def discard(self, post_id):
+        for term in self.documents.pop(post_id, ()):
+            self.postings[term].pop(post_id, None)
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def scores(self, terms):
+        with self.lock:
+            if self.postings is None:
+                self.build()
+            postings = [self.postings.get(term, {}) for term in set(terms)]
+            if not all(postings):
+                return {}
+            total = len(self.documents)
+            candidates = set.intersection(*(set(posting) for posting in postings))
+            return {
+                post_id: sum(posting[post_id] * math.log(1 + total / len(posting)) for posting in postings)
+                for post_id in candidates
+            }
+
+    def search(self, queryset, query):
+        scores = self.scores(tokenize(query))
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:self.max_results]
+        if not best:
+            return queryset.none()
+        rank = Case(*[When(pk=post_id, then=Value(score)) for post_id, score in best], output_field=FloatField())
+        return queryset.filter(pk__in=[post_id for post_id, _ in best]).annotate(rank=rank)
+
+    def index(self, post):
+        with self.lock:
+            if self.postings is None:
+                return
+            self.discard(post.pk)
+            self.add(post.pk, post.title, post.body)
+
+    def remove(self, post_id):
+        with self.lock:
+            if self.postings is not None:
+                self.discard(post_id)
+
+    def rebuild(self):
+        with self.lock:
+            self.postings = None
+
+
+VENDOR_BACKENDS = {
+    'mysql': MySQLFullTextBackend,
+    'sqlite': SQLiteFTS5Backend,
+}
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    """
+    Return the backend named by the `BLOG_SEARCH_BACKEND` setting, or the
+    one matching the default database, falling back to the inverted index.
+    """
+    path = getattr(settings, 'BLOG_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    return VENDOR_BACKENDS.get(connection.vendor, InvertedIndexBackend)()
+
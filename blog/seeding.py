@@ -0,0 +1,244 @@
+import multiprocessing
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import accumulate, batched
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.text import slugify
+
+from blog.cache import invalidate
+from blog.feed import backfill_timeline
+from blog.models import Author, Comment, Follow, Post
+from blog.search import get_search_backend
+from blog.threads import MAX_DEPTH, comment_path
+from blog.workers import setup
+
+PASSWORD = 'seed-password'
+# Exponent of the Zipf distributions behind author popularity and activity
+# and post virality: a few authors and posts get most of the attention.
+SKEW = 1.1
+PUBLISHED_RATIO = 0.9
+REPLY_RATIO = 0.5
+WORDS = (
+    'about', 'after', 'again', 'answer', 'api', 'async', 'author', 'backend', 'better', 'blog',
+    'browser', 'build', 'cache', 'change', 'client', 'cloud', 'code', 'comment', 'data', 'database',
+    'debug', 'deploy', 'design', 'django', 'docker', 'early', 'easy', 'error', 'every', 'fast',
+    'feature', 'feed', 'field', 'first', 'follow', 'frontend', 'guide', 'index', 'issue', 'java',
+    'join', 'keep', 'language', 'large', 'latency', 'learn', 'linux', 'little', 'memory', 'model',
+    'modern', 'network', 'never', 'notes', 'other', 'page', 'python', 'query', 'queue', 'quick',
+    'read', 'release', 'request', 'review', 'right', 'rust', 'scale', 'search', 'server', 'simple',
+    'slow', 'small', 'sql', 'start', 'story', 'system', 'team', 'test', 'thread', 'today',
+    'tool', 'traffic', 'update', 'user', 'using', 'value', 'video', 'view', 'web', 'week',
+    'while', 'why', 'work', 'world', 'write', 'year',
+)
+# Word frequencies follow Zipf's law too, so some search terms match most
+# posts and others only a few.
+WORD_WEIGHTS = list(accumulate(1 / (rank + 1) for rank in range(len(WORDS))))
+
+
+def zipf_weights(count, rng):
+    """Cumulative Zipf weights over `count` items, shuffled so rank is not id."""
+    weights = [1 / (rank + 1) ** SKEW for rank in range(count)]
+    rng.shuffle(weights)
+    return list(accumulate(weights))
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def words(rng, low, high):
+    return ' '.join(rng.choices(WORDS, cum_weights=WORD_WEIGHTS, k=rng.randint(low, high)))
+
+
+# Batch writers. The ones that need randomness draw from their own stream,
+# named after the seed and the batch, so the rows do not depend on how the
+# batches are spread over worker processes.
+
+def write_users(user_ids, password):
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(id=user_id, username=f'seed{user_id}', email=f'seed{user_id}@example.com', password=password)
+        for user_id in user_ids
+    )
+    return len(user_ids)
+
+
+def write_authors(rows):
+    Author.objects.bulk_create(
+        Author(id=author_id, user_id=user_id, follower_count=followers, following_count=followings)
+        for author_id, user_id, followers, followings in rows
+    )
+    return len(rows)
+
+
+def write_follows(edges):
+    Follow.objects.bulk_create(Follow(from_author_id=follower_id, to_author_id=target_id)
+                               for follower_id, target_id in edges)
+    return len(edges)
+
+
+def write_posts(stream, rows, now):
+    """Write posts from `(post_id, owner_id, comments_count)` rows."""
+    rng = random.Random(stream)
+    posts = []
+    for post_id, owner_id, comments_count in rows:
+        title = words(rng, 3, 8).capitalize()
+        published = rng.random() < PUBLISHED_RATIO
+        posts.append(Post(
+            id=post_id,
+            title=title,
+            slug=f'{slugify(title)[:200]}-{post_id}',
+            body=words(rng, 30, 200),
+            owner_id=owner_id,
+            status='P' if published else 'D',
+            published_date=now - timedelta(seconds=rng.uniform(0, 365 * 86400)) if published else None,
+            comments_count=comments_count,
+        ))
+    Post.objects.bulk_create(posts)
+    return len(posts)
+
+
+def write_comments(stream, rows, comment_start, author_ids):
+    """Write the comment threads of `(post_id, count)` rows."""
+    rng = random.Random(stream)
+    comments = []
+    comment_id = comment_start
+    for post_id, count in rows:
+        thread = []
+        for _ in range(count):
+            parent = rng.choice(thread) if thread and rng.random() < REPLY_RATIO else None
+            if parent is not None and parent.depth >= MAX_DEPTH:
+                parent = None
+            comment = Comment(
+                id=comment_id,
+                post_id=post_id,
+                owner_id=rng.choice(author_ids),
+                body=words(rng, 5, 40),
+                parent_id=parent.id if parent else None,
+                depth=parent.depth + 1 if parent else 0,
+                path=comment_path(comment_id, parent),
+            )
+            thread.append(comment)
+            comments.append(comment)
+            comment_id += 1
+    Comment.objects.bulk_create(comments)
+    return len(comments)
+
+
+def write_batch(writer, *args):
+    with transaction.atomic():
+        return writer(*args)
+
+
+def comment_batches(post_ids, counts, comment_start, batch_size):
+    """Group posts into batches of about `batch_size` comments."""
+    rows = []
+    size = 0
+    for post_id, count in zip(post_ids, counts):
+        if count:
+            rows.append((post_id, count))
+            size += count
+        if size >= batch_size:
+            yield rows, comment_start
+            comment_start += size
+            rows, size = [], 0
+    if rows:
+        yield rows, comment_start
+
+
+class BatchWriter:
+    """
+    Write batches one stage at a time, in a pool of spawned processes when
+    `workers` is above one. A stage starts once the rows it references have
+    been written by the previous ones.
+    """
+
+    def __init__(self, workers, log):
+        self.log = log
+        self.pool = None
+        if workers > 1:
+            self.pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=setup)
+
+    def stage(self, label, writer, batches):
+        if self.pool is None:
+            count = sum(write_batch(writer, *batch) for batch in batches)
+        else:
+            futures = [self.pool.submit(write_batch, writer, *batch) for batch in batches]
+            count = sum(future.result() for future in futures)
+        self.log(f'{label}: {count}')
+        return count
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+
+def seed_blog(authors=10_000, posts=100_000, comments=1_000_000, follows=20, timelines=100,
+              seed=0, batch_size=5000, workers=1, log=lambda message: None):
+    """
+    Add a synthetic dataset: users with their authors, a power-law follow
+    graph averaging `follows` followings per author, posts and threaded
+    comments. Counters are computed up front and primary keys assigned here,
+    so every row goes in through `bulk_create` with one precomputed password
+    hash and no signals. The home timelines of the `timelines` authors
+    following the most people are materialized. The same `seed` always
+    produces the same content, whatever the number of `workers`.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    User = get_user_model()
+    user_start, author_start = next_id(User), next_id(Author)
+    post_start, comment_start = next_id(Post), next_id(Comment)
+    user_ids = range(user_start, user_start + authors)
+    author_ids = range(author_start, author_start + authors)
+    post_ids = range(post_start, post_start + posts)
+
+    popularity = zipf_weights(authors, rng)
+    edges = set()
+    for follower_id in author_ids:
+        targets = rng.choices(author_ids, cum_weights=popularity, k=min(int(rng.expovariate(1 / follows)), authors))
+        edges.update((follower_id, target_id) for target_id in targets if target_id != follower_id)
+    follower_counts = Counter(target_id for _, target_id in edges)
+    following_counts = Counter(follower_id for follower_id, _ in edges)
+
+    owners = rng.choices(author_ids, cum_weights=zipf_weights(authors, rng), k=posts)
+    comment_counts = Counter(rng.choices(range(posts), cum_weights=zipf_weights(posts, rng), k=comments))
+    counts = [comment_counts[index] for index in range(posts)]
+
+    writer = BatchWriter(workers, log)
+    try:
+        password = make_password(PASSWORD)
+        writer.stage('users', write_users, [(chunk, password) for chunk in batched(user_ids, batch_size)])
+        writer.stage('authors', write_authors, [
+            ([(author_id, user_id, follower_counts[author_id], following_counts[author_id])
+              for author_id, user_id in chunk],)
+            for chunk in batched(zip(author_ids, user_ids), batch_size)
+        ])
+        writer.stage('follows', write_follows, [(chunk,) for chunk in batched(sorted(edges), batch_size)])
+        writer.stage('posts', write_posts, [
+            (f'{seed}:posts:{number}', chunk, now)
+            for number, chunk in enumerate(batched(zip(post_ids, owners, counts), batch_size))
+        ])
+        writer.stage('comments', write_comments, [
+            (f'{seed}:comments:{number}', rows, start, author_ids)
+            for number, (rows, start) in enumerate(comment_batches(post_ids, counts, comment_start, batch_size))
+        ])
+    finally:
+        writer.close()
+
+    readers = Author.objects.filter(id__in=author_ids, following_count__gt=0).order_by('-following_count')[:timelines]
+    for reader in readers:
+        backfill_timeline(reader.pk, list(reader.follows.all()))
+    log(f'timelines: {len(readers)}')
+
+    get_search_backend().rebuild()
+    invalidate('posts', 'authors')
+    return {'authors': authors, 'follows': len(edges), 'posts': posts, 'comments': comments}
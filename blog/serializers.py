@@ -1,15 +1,32 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .models import Author, Comment, Post, PostImage, PostVideo
+from .models import Author, Comment, Post, PostImage, PostVideo, VideoUpload
+from .threads import MAX_DEPTH
+from .uploads import validate_video
 
 
 
 
 
+class SrcsetField(serializers.ReadOnlyField):
+    """
+    Variant name -> absolute URL map of the derivatives generated for an
+    image, or an empty map while they are still being generated.
+    """
+    def to_representation(self, variants):
+        request = self.context.get('request')
+        return {
+            name: request.build_absolute_uri(url) if request is not None else url
+            for name, url in variants.items() if name not in ('source', 'files')
+        }
+
+
 class SimpleAuthorSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username')
+    srcset = SrcsetField(source='image_variants')
     class Meta:
         model = Author
-        fields = ['id', 'user_id', 'username', 'image']
+        fields = ['id', 'user_id', 'username', 'image', 'image_width', 'image_height', 'srcset']
         read_only_fields = ['user', 'username', 'image']
 
 
@@ -28,6 +45,8 @@ class AuthorSerializer(serializers.ModelSerializer):
                   'last_name',
                   'bio',
                   'image',
+                  'image_width',
+                  'image_height',
                   'follower_count',
                   'following_count',
                   'joined_at'
@@ -47,21 +66,40 @@ class AuthorSerializer(serializers.ModelSerializer):
         return instance
    
 
+class BulkFollowSerializer(serializers.Serializer):
+    author_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=100)
+
+    def validate_author_ids(self, author_ids):
+        return list(dict.fromkeys(author_ids))
+
+
 class ReplySerializer(serializers.ModelSerializer):
     created_at = serializers.SerializerMethodField(method_name='get_time')
+    replies = serializers.SerializerMethodField()
     
     def get_time(self, comment):
         return comment.created_at.strftime("%Y-%m-%d %H:%M:%S")
+
+    def get_replies(self, comment):
+        return ReplySerializer(getattr(comment, 'thread_replies', []), many=True, context=self.context).data
     class Meta:
         model = Comment 
-        fields = ['id', 'owner', 'body', 'created_at']
+        fields = ['id', 'owner', 'body', 'created_at', 'replies']
 
 class CommentSerializer(serializers.ModelSerializer):
-    replies = ReplySerializer(many=True, read_only=True)
+    replies = serializers.SerializerMethodField()
     created_at = serializers.SerializerMethodField(method_name='get_time')
     
     def get_time(self, comment):
         return comment.created_at.strftime("%Y-%m-%d %H:%M:%S")
+
+    def get_replies(self, comment):
+        # Threads loaded through build_comment_tree carry their children;
+        # a lone comment (create/update responses) falls back to one level.
+        replies = getattr(comment, 'thread_replies', None)
+        if replies is None:
+            replies = comment.replies.all()
+        return ReplySerializer(replies, many=True, context=self.context).data
     class Meta:
         model = Comment
         fields = [
@@ -75,15 +113,28 @@ class CommentSerializer(serializers.ModelSerializer):
                  
         ]
         read_only_fields = ['post', 'owner']
+
+    def validate_parent(self, parent):
+        if self.instance is not None and parent != self.instance.parent:
+            raise serializers.ValidationError('A comment cannot be moved to another parent.')
+        if parent is None or self.instance is not None:
+            return parent
+        if str(parent.post_id) != str(self.context['post_id']):
+            raise serializers.ValidationError('The parent comment belongs to another post.')
+        if parent.depth >= MAX_DEPTH:
+            raise serializers.ValidationError('This thread is nested too deeply to reply to.')
+        return parent
         
     def create(self, validated_data):
-        author = Author.objects.get(user_id=self.context['user_id'])
-        return Comment.objects.create(owner=author, post_id=self.context['post_id'], **validated_data)
+        comment = Comment.objects.create(post_id=self.context['post_id'], **validated_data)
+        comment.thread_replies = []
+        return comment
   
 class PostImageSerializer(serializers.ModelSerializer):
+    srcset = SrcsetField(source='variants')
     class Meta:
         model = PostImage
-        fields = ['id', 'image', 'caption', 'upload_at'] 
+        fields = ['id', 'image', 'width', 'height', 'srcset', 'caption', 'upload_at'] 
     
     
     def create(self, validated_data):
@@ -92,19 +143,32 @@ class PostImageSerializer(serializers.ModelSerializer):
 class PostVideoSerializer(serializers.ModelSerializer):
     class Meta:
         model = PostVideo
-        fields = ['id', 'video', 'caption', 'upload_at'] 
+        fields = ['id', 'video', 'duration', 'width', 'height', 'codec', 'caption', 'upload_at'] 
     
     def create(self, validated_data):
         return PostVideo.objects.create(post_id=self.context.get('post_id'), **validated_data)
+
+
+class VideoUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VideoUpload
+        fields = ['id', 'filename', 'size', 'offset', 'caption', 'created_at', 'updated_at']
+        read_only_fields = ['offset']
+        # An empty upload has no chunk to write, so no partial file to finalize.
+        extra_kwargs = {'size': {'min_value': 1}}
+
+    def validate(self, attrs):
+        try:
+            validate_video(attrs['filename'], attrs['size'])
+        except DjangoValidationError as error:
+            raise serializers.ValidationError({'filename': error.messages})
+        return attrs
+
+    def create(self, validated_data):
+        return VideoUpload.objects.create(post_id=self.context['post_id'], **validated_data)
     
     
 class PostSerializer(serializers.ModelSerializer):
-    
-    comments_count = serializers.IntegerField(read_only=True)
-    images_count = serializers.IntegerField(read_only=True)
-    videos_count = serializers.IntegerField(read_only=True)
-    
-   
     class Meta:
         model = Post
         fields = ['id',
@@ -119,8 +183,20 @@ class PostSerializer(serializers.ModelSerializer):
                   'comments_count',
                   'images_count',
                   'videos_count']
-        read_only_fields = ['owner']
+        read_only_fields = ['owner', 'comments_count', 'images_count', 'videos_count']
         
     def create(self, validated_data):
-        author = Author.objects.get(user_id=self.context['user_id'])
-        return Post.objects.create(owner=author, **validated_data)
+        return Post.objects.create(**validated_data)
+
+
+class PostImportSerializer(serializers.Serializer):
+    """
+    One row of a post import. Uniqueness and owners are checked for the
+    whole batch by blog.imports, so validating a row runs no query.
+    """
+    title = serializers.CharField(max_length=255)
+    body = serializers.CharField()
+    status = serializers.ChoiceField(choices=Post.STATUS_CHOICES, default='D')
+    published_date = serializers.DateTimeField(required=False, allow_null=True)
+    slug = serializers.SlugField(max_length=255, required=False, allow_blank=True)
+    owner = serializers.CharField(required=False, help_text='Username of the author.')
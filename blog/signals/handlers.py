@@ -1,14 +1,155 @@
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.conf import settings
 from django.db.models.signals import m2m_changed
+from django.utils import timezone
+
+from blog.cache import invalidate
+from blog.counters import increment_post_counter
+from blog.feed import retract_post
+from blog.images import current_variants, delete_derivatives, needs_derivatives, schedule_derivatives
+from blog.mediainfo import image_metadata, video_metadata
+from blog.models import Author, Comment, Post, PostImage, PostVideo
+from blog.search import get_search_backend
+from blog.slugs import forget_slug
+from blog.tasks import enqueue
+
+POST_COUNTERS = {
+    Comment: 'comments_count',
+    PostImage: 'images_count',
+    PostVideo: 'videos_count',
+}
 
-from blog.models import Author
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_an_author_for_new_user(sender, instance, created, **kwargs):
     if created:
         Author.objects.create(user=instance)
-        
 
 
+@receiver(post_save, sender=Post)
+def update_follower_timelines(sender, instance, created, **kwargs):
+    was_published = getattr(instance, '_loaded_status', None) == 'P'
+    if instance.status == 'P' and not was_published:
+        enqueue('blog.feed.fan_out_post', instance.pk)
+    elif instance.status != 'P' and was_published:
+        retract_post(instance)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_save, sender=Post)
+def index_post_for_search(sender, instance, **kwargs):
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_search(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=PostImage)
+@receiver(post_save, sender=PostVideo)
+def increment_post_counters(sender, instance, created, **kwargs):
+    if created:
+        increment_post_counter(instance.post_id, POST_COUNTERS[sender])
+
+
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=PostImage)
+@receiver(post_delete, sender=PostVideo)
+def decrement_post_counters(sender, instance, **kwargs):
+    increment_post_counter(instance.post_id, POST_COUNTERS[sender], -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_cached_post(sender, instance, **kwargs):
+    invalidate('posts', f'posts:{instance.pk}')
+
+
+@receiver(post_save, sender=Post)
+def forget_previous_slug(sender, instance, **kwargs):
+    loaded_slug = getattr(instance, '_loaded_slug', None)
+    if loaded_slug and loaded_slug != instance.slug:
+        forget_slug(loaded_slug)
+    instance._loaded_slug = instance.slug
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleted_slug(sender, instance, **kwargs):
+    forget_slug(instance.slug)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=PostImage)
+@receiver(post_delete, sender=PostImage)
+@receiver(post_save, sender=PostVideo)
+@receiver(post_delete, sender=PostVideo)
+def invalidate_cached_post_media(sender, instance, **kwargs):
+    invalidate('posts', f'posts:{instance.post_id}')
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def invalidate_cached_author(sender, instance, **kwargs):
+    invalidate('authors', f'authors:{instance.pk}')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_author_of_user(sender, instance, created, **kwargs):
+    # Author responses embed the username and names of the user.
+    if not created:
+        authors = Author.objects.filter(user=instance)
+        authors.update(updated_at=timezone.now())
+        invalidate('authors', *[f'authors:{pk}' for pk in authors.values_list('pk', flat=True)])
+
+
+@receiver(post_save, sender=PostImage)
+def generate_post_image_derivatives(sender, instance, **kwargs):
+    if needs_derivatives(instance.image, instance.variants):
+        schedule_derivatives(instance, 'image', 'variants')
+
+
+@receiver(post_save, sender=Author)
+def generate_author_image_derivatives(sender, instance, **kwargs):
+    is_default = instance.image.name == Author._meta.get_field('image').default
+    if not is_default and needs_derivatives(instance.image, instance.image_variants):
+        schedule_derivatives(instance, 'image', 'image_variants')
+
+
+@receiver(post_delete, sender=PostImage)
+def delete_post_image_derivatives(sender, instance, **kwargs):
+    delete_derivatives(instance.image.storage, instance.variants)
+
+
+@receiver(post_delete, sender=Author)
+def delete_author_image_derivatives(sender, instance, **kwargs):
+    delete_derivatives(instance.image.storage, instance.image_variants)
+
+
+# Media metadata is read once, from the freshly uploaded file, before it is
+# stored; serializers then read the columns and never open the file.
+
+@receiver(pre_save, sender=PostImage)
+def store_post_image_dimensions(sender, instance, **kwargs):
+    if instance.image and not instance.image._committed:
+        metadata = image_metadata(instance.image)
+        instance.width, instance.height = metadata['width'], metadata['height']
+    instance.variants = current_variants(instance.image, instance.variants)
+
+
+@receiver(pre_save, sender=Author)
+def store_author_image_dimensions(sender, instance, **kwargs):
+    if instance.image and not instance.image._committed:
+        metadata = image_metadata(instance.image)
+        instance.image_width, instance.image_height = metadata['width'], metadata['height']
+    instance.image_variants = current_variants(instance.image, instance.image_variants)
+
+
+@receiver(pre_save, sender=PostVideo)
+def store_video_metadata(sender, instance, **kwargs):
+    if instance.video and not instance.video._committed:
+        for name, value in video_metadata(instance.video).items():
+            setattr(instance, name, value)
@@ -0,0 +1,90 @@
+import hashlib
+import operator
+from functools import reduce
+from itertools import batched
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from blog.cache import get_cache
+from blog.models import Post
+
+MAX_LENGTH = Post._meta.get_field('slug').max_length
+# Room left after the base for a `-<number>` suffix.
+SUFFIX_LENGTH = 11
+# Bases looked up per query; SQLite rejects expressions nested over 1000 deep.
+QUERY_BASES = 500
+KEY_PREFIX = 'blog:slug'
+# Attempts at saving a new post whose slug was taken in the meantime.
+SAVE_ATTEMPTS = 3
+
+
+def slug_base(text):
+    """The slug of `text`, short enough to take a suffix; `post` for titles without any slug characters."""
+    return slugify(text)[:MAX_LENGTH - SUFFIX_LENGTH].strip('-') or 'post'
+
+
+def allocate_slug(text):
+    """A free slug for a new post titled `text`, with one query."""
+    return allocate_slugs([slug_base(text)])[0]
+
+
+def allocate_slugs(bases):
+    """
+    A free slug for each of `bases`, which may repeat: the base itself, or
+    the base with the lowest `-2`, `-3`, ... suffix that neither an existing
+    post nor an earlier entry holds. The slugs taken by existing posts are
+    read with one query per QUERY_BASES distinct bases.
+    """
+    taken = set()
+    for chunk in batched(set(bases), QUERY_BASES):
+        # `base-` < slug < `base.` holds the slugs starting with `base-`, as a
+        # range on the unique index where LIKE would scan on some backends.
+        matches = reduce(operator.or_, (Q(slug__gt=f'{base}-', slug__lt=f'{base}.') for base in chunk),
+                         Q(slug__in=chunk))
+        taken.update(Post.objects.filter(matches).order_by().values_list('slug', flat=True))
+    numbers = {}
+    slugs = []
+    for base in bases:
+        slug, number = base, numbers.get(base, 1)
+        if number > 1:
+            slug = f'{base}-{number}'
+        while slug in taken:
+            number += 1
+            slug = f'{base}-{number}'
+        numbers[base] = number
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def slug_key(slug):
+    # Hashed, as slugs can be longer than memcached allows for keys.
+    return f'{KEY_PREFIX}:{hashlib.md5(slug.encode(), usedforsecurity=False).hexdigest()}'
+
+
+def post_id_for_slug(slug):
+    """
+    The id of the post with `slug`, or None. Ids are kept in the cache by
+    slug, without expiry: a post keeps its id, and signal handlers forget
+    the slugs of posts that are deleted or given another slug.
+    """
+    cache = get_cache()
+    post_id = cache.get(slug_key(slug))
+    if post_id is None:
+        post_id = Post.objects.filter(slug=slug).values_list('id', flat=True).first()
+        if post_id is not None:
+            cache.set(slug_key(slug), post_id, timeout=None)
+    return post_id
+
+
+def forget_slug(slug):
+    """
+    Drop the cached id of `slug`, and again once the current transaction
+    commits: a request reading the slug before the commit would otherwise
+    cache the old id back, for good.
+    """
+    get_cache().delete(slug_key(slug))
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: get_cache().delete(slug_key(slug)))
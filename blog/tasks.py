@@ -0,0 +1,118 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from blog.models import Task
+from blog.workers import execute
+
+logger = logging.getLogger(__name__)
+
+# How long a claimed task may run before another worker is allowed to take
+# it over, assuming the first one died.
+VISIBILITY_TIMEOUT = getattr(settings, 'BLOG_TASKS_VISIBILITY_TIMEOUT', 300)
+# Seconds before the first retry; every further attempt waits twice as long.
+RETRY_DELAY = getattr(settings, 'BLOG_TASKS_RETRY_DELAY', 10)
+MAX_ATTEMPTS = getattr(settings, 'BLOG_TASKS_MAX_ATTEMPTS', 3)
+# Seconds done and failed tasks are kept for before they are purged.
+RETENTION = getattr(settings, 'BLOG_TASKS_RETENTION', 7 * 24 * 3600)
+
+
+def is_eager():
+    return getattr(settings, 'BLOG_TASKS_EAGER', False)
+
+
+def enqueue(name, *args, **kwargs):
+    """
+    Queue a call to the function at dotted path `name`. Arguments must be
+    JSON serializable, so pass primary keys rather than model instances.
+
+    The row is written in the caller's transaction: it only becomes visible
+    to workers once that transaction commits, and disappears with it on
+    rollback. With BLOG_TASKS_EAGER the function runs inline instead.
+    """
+    if is_eager():
+        import_string(name)(*args, **kwargs)
+        return None
+    return Task.objects.create(name=name, args=list(args), kwargs=kwargs, max_attempts=MAX_ATTEMPTS)
+
+
+def claim_tasks(limit, visibility_timeout=VISIBILITY_TIMEOUT):
+    """
+    Mark up to `limit` due tasks as running and return them. Running tasks
+    whose claim expired are taken over; the ones that used up their attempts
+    that way are failed instead.
+    """
+    now = timezone.now()
+    expired = Q(status='R', available_at__lte=now)
+    Task.objects.filter(expired, attempts__gte=F('max_attempts')) \
+                .update(status='F', finished_at=now, last_error='Visibility timeout expired.')
+
+    with transaction.atomic():
+        tasks = list(Task.objects.select_for_update(skip_locked=True)
+                                 .filter(Q(status='Q', available_at__lte=now) | expired)
+                                 .order_by('available_at', 'id')[:limit])
+        if not tasks:
+            return []
+        Task.objects.filter(pk__in=[task.pk for task in tasks]).update(
+            status='R',
+            attempts=F('attempts') + 1,
+            started_at=now,
+            available_at=now + timedelta(seconds=visibility_timeout),
+        )
+    for task in tasks:
+        task.status, task.attempts, task.started_at = 'R', task.attempts + 1, now
+    return tasks
+
+
+def record_result(task, error, duration_ms):
+    """Store the outcome of an attempt and schedule a retry if one is left."""
+    now = timezone.now()
+    fields = {'duration_ms': duration_ms, 'last_error': error or ''}
+    if error is None:
+        fields.update(status='D', finished_at=now)
+    elif task.attempts < task.max_attempts:
+        logger.warning('Task %s (%s) failed, retrying: %s', task.pk, task.name, error)
+        delay = RETRY_DELAY * 2 ** (task.attempts - 1)
+        fields.update(status='Q', available_at=now + timedelta(seconds=delay))
+    else:
+        logger.error('Task %s (%s) failed: %s', task.pk, task.name, error)
+        fields.update(status='F', finished_at=now)
+    # A task whose claim expired may have been taken over meanwhile; only
+    # the current attempt gets to record its result.
+    Task.objects.filter(pk=task.pk, status='R', attempts=task.attempts).update(**fields)
+    for name, value in fields.items():
+        setattr(task, name, value)
+
+
+def run_pending_tasks(limit=100):
+    """Run due tasks in the current process, until none is left or `limit`."""
+    done = []
+    while len(done) < limit:
+        tasks = claim_tasks(min(limit - len(done), 10))
+        if not tasks:
+            break
+        for task in tasks:
+            record_result(task, *execute(task.name, task.args, task.kwargs))
+            done.append(task)
+    return done
+
+
+def purge_finished_tasks(retention=RETENTION, batch_size=1000):
+    """
+    Delete the done and failed tasks that finished over `retention` seconds
+    ago, `batch_size` rows per statement so no delete holds locks for long.
+    Returns the number of tasks deleted.
+    """
+    finished = Task.objects.filter(status__in=['D', 'F'],
+                                   finished_at__lt=timezone.now() - timedelta(seconds=retention))
+    deleted = 0
+    while True:
+        ids = list(finished.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += Task.objects.filter(pk__in=ids).delete()[0]
@@ -1,14 +1,35 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework.test import APIClient
 import pytest
 from faker import Faker
 from model_bakery import baker
+from blog import queries
+from blog.cache import stats as cache_stats
 from blog.models import Post
 
 faker = Faker()
 
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    cache_stats.clear()
+
+@pytest.fixture(autouse=True)
+def run_tasks_eagerly(settings):
+    settings.BLOG_TASKS_EAGER = True
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(monkeypatch):
+    monkeypatch.setattr(queries, 'SAMPLE_RATE', 1)
+    monkeypatch.setattr(queries, 'STRICT', True)
+
+@pytest.fixture
+def query_budget():
+    return queries.assert_query_budget
+
 @pytest.fixture
 def api_client():
     return APIClient()
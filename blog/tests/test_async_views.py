@@ -0,0 +1,106 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+from django.urls import resolve
+from model_bakery import baker
+from rest_framework import status
+
+from blog import async_views
+from blog.authentication import AuthorTokenObtainPairSerializer
+from blog.models import Comment, Follow
+from blog.renderers import StreamingJSONRenderer
+
+
+@pytest.fixture
+def async_get():
+    def do_async_get(path, token=None, **headers):
+        if token:
+            headers['Authorization'] = f'JWT {token}'
+        request = AsyncRequestFactory().get(path, headers=headers)
+        match = resolve(request.path_info, urlconf='myblog.asgi_urls')
+        return async_to_sync(match.func)(request, **match.kwargs)
+    return do_async_get
+
+
+@pytest.fixture
+def no_fallback(monkeypatch):
+    async def fail(request):
+        raise AssertionError(f'{request.get_full_path()} went to the DRF view')
+    monkeypatch.setattr(async_views, 'fallback', fail)
+
+
+@pytest.fixture
+def blog_data(authenticate, create_post_instance):
+    post = create_post_instance(status='P')
+    reader = authenticate()
+    Follow.objects.create(from_author=post.owner, to_author=reader.author)
+    Follow.objects.create(from_author=reader.author, to_author=post.owner)
+    baker.make(Comment, post=post, owner=reader.author, _quantity=3)
+    return {'post': post, 'reader': reader}
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    @pytest.mark.parametrize('template', [
+        '/blog/posts/',
+        '/blog/posts/?page_size=1',
+        '/blog/posts/{post}/',
+        '/blog/posts/{post}/comments/',
+        '/blog/posts/{post}/comments/?depth=0',
+        '/blog/authors/',
+        '/blog/authors/{author}/',
+        '/blog/followers/',
+        '/blog/followings/',
+    ])
+    def test_responses_match_the_drf_views(self, api_client, async_get, blog_data, no_fallback, template):
+        path = template.format(post=blog_data['post'].id, author=blog_data['post'].owner_id)
+        token = str(AuthorTokenObtainPairSerializer.get_token(blog_data['reader']).access_token)
+        api_client.force_authenticate(user=None)
+        api_client.credentials(HTTP_AUTHORIZATION=f'JWT {token}')
+
+        expected = api_client.get(path)
+        response = async_get(path, token)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert json.loads(response.content) == expected.json()
+
+    def test_list_shares_the_response_cache(self, api_client, async_get, blog_data, no_fallback):
+        api_client.force_authenticate(user=None)
+        api_client.get('/blog/posts/')
+        response = async_get('/blog/posts/')
+        assert response['X-Cache'] == 'HIT'
+
+    def test_conditional_requests_share_the_validators(self, api_client, async_get, blog_data, no_fallback):
+        path = f"/blog/posts/{blog_data['post'].id}/comments/"
+        api_client.force_authenticate(user=None)
+        etag = api_client.get(path)['ETag']
+
+        response = async_get(path, If_None_Match=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+
+    def test_missing_post_is_not_found_whatever_the_preconditions(self, async_get, blog_data):
+        assert async_get('/blog/posts/999999/', If_None_Match='*').status_code == status.HTTP_404_NOT_FOUND
+
+    def test_streams_are_served_asynchronously(self, async_get, blog_data):
+        response = async_get('/blog/authors/', Accept=StreamingJSONRenderer.media_type)
+
+        async def read():
+            return b''.join([chunk async for chunk in response])
+
+        assert response.is_async
+        assert len(json.loads(async_to_sync(read)())) == 2
+
+    @pytest.mark.parametrize('template, expected_status', [
+        ('/blog/posts/?search=first', status.HTTP_200_OK),
+        ('/blog/posts/999999/', status.HTTP_404_NOT_FOUND),
+        ('/blog/posts/{post}/comments/?depth=x', status.HTTP_400_BAD_REQUEST),
+        ('/blog/authors/?page=99', status.HTTP_404_NOT_FOUND),
+        ('/blog/followers/', status.HTTP_401_UNAUTHORIZED),
+    ])
+    def test_other_requests_go_to_the_drf_views(self, async_get, blog_data, template, expected_status):
+        response = async_get(template.format(post=blog_data['post'].id))
+        assert response.status_code == expected_status
@@ -0,0 +1,92 @@
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from blog import queries
+from blog.authentication import ClaimsUser
+
+
+@pytest.fixture
+def create_user():
+    def do_create_user():
+        return get_user_model().objects.create_user(username='reader', email='reader@example.com', password='test123')
+    return do_create_user
+
+
+@pytest.fixture
+def login(api_client, create_user):
+    def do_login():
+        user = create_user()
+        response = api_client.post('/auth/jwt/create/', {'username': 'reader', 'password': 'test123'})
+        assert response.status_code == status.HTTP_200_OK
+        return user, response.data
+    return do_login
+
+
+def identity_queries(recorder):
+    return [sql for sql, _, _ in recorder.queries if '"users_user"' in sql or '"blog_author"."user_id"' in sql]
+
+
+@pytest.mark.django_db
+class TestClaimsAuthentication:
+    def test_tokens_carry_identity_claims(self, login):
+        user, tokens = login()
+        token = AccessToken(tokens['access'])
+        assert (token['author_id'], token['username']) == (user.author.id, 'reader')
+        assert 'is_staff' not in token
+
+    def test_refreshed_token_keeps_claims(self, api_client, login):
+        user, tokens = login()
+        response = api_client.post('/auth/jwt/refresh/', {'refresh': tokens['refresh']})
+        assert AccessToken(response.data['access'])['author_id'] == user.author.id
+
+    @pytest.mark.parametrize('method, path, data', [
+        ('get', '/blog/feed/', None),
+        ('get', '/blog/followers/', None),
+        ('get', '/blog/followings/', None),
+        ('post', '/blog/posts/', {'title': 'Claims', 'body': 'No lookups', 'status': 'P'}),
+    ])
+    def test_endpoints_run_no_identity_queries(self, api_client, login, method, path, data):
+        _, tokens = login()
+        api_client.credentials(HTTP_AUTHORIZATION=f"JWT {tokens['access']}")
+
+        with queries.QueryRecorder() as recorder:
+            response = getattr(api_client, method)(path, data)
+
+        assert status.is_success(response.status_code)
+        assert identity_queries(recorder) == []
+
+    def test_other_attributes_load_the_user(self, login, django_assert_num_queries):
+        _, tokens = login()
+        user = ClaimsUser(AccessToken(tokens['access']))
+        with django_assert_num_queries(0):
+            assert (user.username, user.is_authenticated) == ('reader', True)
+        with django_assert_num_queries(1):
+            assert user.email == 'reader@example.com'
+
+    def test_tokens_without_claims_fall_back_to_the_user(self, api_client, create_user):
+        user = create_user()
+        api_client.credentials(HTTP_AUTHORIZATION=f'JWT {AccessToken.for_user(user)}')
+        response = api_client.get('/blog/authors/me/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['id'] == user.author.id
+
+    def test_staff_flag_is_read_from_the_user(self, api_client, login):
+        user, tokens = login()
+        user.is_staff = True
+        user.save()
+        api_client.credentials(HTTP_AUTHORIZATION=f"JWT {tokens['access']}")
+        assert api_client.get('/blog/export/follows/').status_code == status.HTTP_200_OK
+
+        user.is_staff = False
+        user.save()
+        assert api_client.get('/blog/export/follows/').status_code == status.HTTP_403_FORBIDDEN
+
+    def test_setting_a_claim_attribute_updates_the_user(self, login):
+        _, tokens = login()
+        user = ClaimsUser(AccessToken(tokens['access']))
+        user.username = 'renamed'
+        user.save()
+        assert user.username == 'renamed'
+        assert get_user_model().objects.filter(username='renamed').exists()
@@ -0,0 +1,74 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count
+
+from blog.benchmark import run_benchmark, run_serializer_benchmark
+from blog.models import Author, Comment, Post
+from blog.seeding import PASSWORD, seed_blog
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBenchmark:
+    def test_seeded_counters_match_rows(self):
+        counts = seed_blog(authors=30, posts=60, comments=300, follows=4, timelines=5)
+
+        assert Post.objects.count() == counts['posts']
+        assert Comment.objects.count() == counts['comments']
+        for post in Post.objects.annotate(actual=Count('comments')):
+            assert post.comments_count == post.actual
+        for author in Author.objects.annotate(followers=Count('followed_by', distinct=True),
+                                              followings=Count('follows', distinct=True)):
+            assert (author.follower_count, author.following_count) == (author.followers, author.followings)
+
+    def test_seeded_replies_extend_parent_path(self):
+        seed_blog(authors=10, posts=5, comments=100, follows=2, timelines=0)
+        for reply in Comment.objects.filter(parent__isnull=False).select_related('parent'):
+            assert reply.path.startswith(reply.parent.path)
+            assert reply.depth == reply.parent.depth + 1
+
+    def test_report_has_latency_percentiles_and_queries(self):
+        seed_blog(authors=20, posts=40, comments=100, follows=3, timelines=5)
+
+        report = run_benchmark(['PostViewSet.retrieve', 'FeedViewSet.list'], clients=2, requests=6, warmup=1,
+                               host='testserver')
+
+        assert report['meta']['dataset']['posts'] == 40
+        for result in report['endpoints'].values():
+            assert (result['requests'], result['errors']) == (6, 0)
+            assert result['latency_ms']['p50'] <= result['latency_ms']['p95'] <= result['latency_ms']['p99']
+            assert result['queries']['max'] >= 1
+
+    def test_serializer_report_compares_identical_output(self):
+        seed_blog(authors=20, posts=40, comments=0, follows=2, timelines=0)
+
+        report = run_serializer_benchmark(rows=30, repeat=2, host='testserver')
+
+        assert report['serializers']['PostSerializer']['rows'] == 30
+        for result in report['serializers'].values():
+            assert result['identical']
+            assert result['serializer_ms'] > 0 and result['compiled_ms'] > 0
+
+
+@pytest.mark.django_db
+class TestSeedBlog:
+    def test_same_seed_produces_same_content(self):
+        seed_blog(authors=10, posts=20, comments=50, follows=2, timelines=0, seed=7, batch_size=6)
+        first = list(Post.objects.order_by('id').values_list('title', 'status', 'comments_count'))
+        first_comments = list(Comment.objects.order_by('id').values_list('body', 'depth'))
+
+        seed_blog(authors=10, posts=20, comments=50, follows=2, timelines=0, seed=7, batch_size=6)
+        second = list(Post.objects.order_by('id').values_list('title', 'status', 'comments_count'))[20:]
+        second_comments = list(Comment.objects.order_by('id').values_list('body', 'depth'))[50:]
+
+        assert first == second
+        assert first_comments == second_comments
+
+    def test_command_seeds_users_with_usable_password(self):
+        out = io.StringIO()
+        call_command('seed_blog', authors=5, posts=10, comments=20, follows=2, timelines=1, stdout=out)
+
+        author = Author.objects.select_related('user').first()
+        assert author.user.check_password(PASSWORD)
+        assert 'Seeded 5 authors' in out.getvalue()
@@ -64,6 +64,13 @@ class TestCommentCreation:
         assert response.status_code == status.HTTP_201_CREATED
         assert response.data['body'] == 'test'
 
+    def test_missing_post_returns_404(self, authenticate, create_comment):
+        authenticate()
+
+        response = create_comment(0, {'body': 'test'})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
 @pytest.mark.django_db
 class TestCommentRetrieval:
     def test_nonexistent_comment_returns_404(self, create_post_instance, retrieve_comment):
@@ -151,3 +158,66 @@ class TestCommentDeletion:
         response = delete_comment(comment.post.id, comment.id)
         
         assert response.status_code == status.HTTP_204_NO_CONTENT
+
+@pytest.mark.django_db
+class TestCommentThread:
+    def make_thread(self, post):
+        root = baker.make(Comment, post=post, owner=post.owner)
+        reply = baker.make(Comment, post=post, owner=post.owner, parent=root)
+        nested = baker.make(Comment, post=post, owner=post.owner, parent=reply)
+        return root, reply, nested
+
+    def test_list_only_returns_comments_of_the_post(self, api_client, create_post_instance):
+        post = create_post_instance()
+        other_post = create_post_instance()
+        baker.make(Comment, post=other_post, owner=other_post.owner)
+        root, _, _ = self.make_thread(post)
+
+        response = api_client.get(f"{POST_BASE_URL}{post.id}/comments/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [comment['id'] for comment in response.data] == [root.id]
+
+    def test_list_nests_the_whole_thread(self, api_client, create_post_instance, django_assert_num_queries):
+        post = create_post_instance()
+        root, reply, nested = self.make_thread(post)
+
+        # The conditional GET validators, then the whole thread.
+        with django_assert_num_queries(2):
+            response = api_client.get(f"{POST_BASE_URL}{post.id}/comments/")
+
+        replies = response.data[0]['replies']
+        assert replies[0]['id'] == reply.id
+        assert replies[0]['replies'][0]['id'] == nested.id
+
+    def test_retrieve_limits_subtree_depth(self, api_client, create_post_instance):
+        post = create_post_instance()
+        root, reply, nested = self.make_thread(post)
+
+        response = api_client.get(f"{POST_BASE_URL}{post.id}/comments/{reply.id}/?depth=0")
+        assert response.data['replies'] == []
+
+        response = api_client.get(f"{POST_BASE_URL}{post.id}/comments/{root.id}/?depth=1")
+        assert response.data['replies'][0]['id'] == reply.id
+        assert response.data['replies'][0]['replies'] == []
+
+    def test_reply_to_comment_of_another_post_returns_400(self, authenticate, create_post_instance, create_comment):
+        post = create_post_instance()
+        other_post = create_post_instance()
+        foreign = baker.make(Comment, post=other_post, owner=other_post.owner)
+        authenticate()
+
+        response = create_comment(post.id, {'body': 'test', 'parent': foreign.id})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_reply_gets_path_below_parent(self, authenticate, create_post_instance, create_comment):
+        post = create_post_instance()
+        root = baker.make(Comment, post=post, owner=post.owner)
+        authenticate()
+
+        response = create_comment(post.id, {'body': 'test', 'parent': root.id})
+
+        reply = Comment.objects.get(pk=response.data['id'])
+        assert reply.depth == 1
+        assert reply.path.startswith(root.path)
@@ -0,0 +1,69 @@
+import pytest
+from django.test import RequestFactory
+from django.utils import timezone
+
+from blog.compiled import CompiledSerializer
+from blog.models import Author, Post
+from blog.serializers import AuthorSerializer, CommentSerializer, PostSerializer, SimpleAuthorSerializer
+
+
+@pytest.fixture
+def context():
+    return {'request': RequestFactory().get('/')}
+
+
+def compiled_data(serializer_class, queryset, context):
+    compiled = CompiledSerializer(serializer_class(context=context))
+    return compiled.many(compiled.values(queryset))
+
+
+@pytest.mark.django_db
+class TestCompiledSerializer:
+    def test_posts_match_the_serializer(self, create_post_instance, context):
+        create_post_instance(status='P', published_date=timezone.now())
+        create_post_instance(status='D', published_date=None)
+        queryset = Post.objects.order_by('id')
+
+        assert compiled_data(PostSerializer, queryset, context) == \
+            PostSerializer(queryset, many=True, context=context).data
+
+    @pytest.mark.parametrize('serializer_class', [AuthorSerializer, SimpleAuthorSerializer])
+    def test_authors_match_the_serializer(self, authenticate, context, serializer_class):
+        author = authenticate().author
+        Author.objects.filter(pk=author.pk).update(image='users/profiles/a b.png',
+                                                   image_variants={'source': 'a.png', 'w64': '/media/a_w64.webp'})
+        authenticate()
+        queryset = Author.objects.select_related('user').order_by('id')
+
+        assert compiled_data(serializer_class, queryset, context) == \
+            serializer_class(queryset, many=True, context=context).data
+
+    def test_method_fields_can_not_be_compiled(self):
+        with pytest.raises(TypeError):
+            CompiledSerializer(CommentSerializer())
+
+
+@pytest.mark.django_db
+class TestCompiledList:
+    def test_post_pages_match_the_serializer(self, api_client, create_post_instance):
+        for _ in range(3):
+            create_post_instance(status='P', published_date=timezone.now())
+        api_client.force_authenticate(user=None)
+
+        first = api_client.get('/blog/posts/', {'page_size': 2}).data
+        second = api_client.get(first['next']).data
+
+        posts = Post.objects.order_by('-published_date', '-created_at', '-id')
+        expected = PostSerializer(posts, many=True).data
+        assert first['results'] + second['results'] == expected
+
+    def test_author_list_matches_the_serializer(self, api_client, authenticate):
+        for _ in range(3):
+            authenticate()
+        api_client.force_authenticate(user=None)
+
+        response = api_client.get('/blog/authors/', {'ordering': 'following_count'})
+
+        authors = Author.objects.select_related('user').order_by('following_count')
+        expected = AuthorSerializer(authors, many=True, context={'request': response.wsgi_request}).data
+        assert response.data['results'] == expected
@@ -0,0 +1,126 @@
+import pytest
+from model_bakery import baker
+from rest_framework import status
+
+from blog import queries
+from blog.models import Comment, Post
+
+
+@pytest.fixture
+def revalidate(api_client):
+    def do_revalidate(path, response):
+        return api_client.get(path, HTTP_IF_NONE_MATCH=response['ETag'])
+    return do_revalidate
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    def test_unchanged_post_is_not_modified_after_one_query(self, api_client, create_post_instance, revalidate,
+                                                            django_assert_num_queries):
+        post = create_post_instance()
+        path = f'/blog/posts/{post.id}/'
+        response = api_client.get(path)
+        assert response['ETag'].startswith('"')
+        assert 'Last-Modified' in response
+
+        with django_assert_num_queries(1):
+            response = revalidate(path, response)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b''
+
+    def test_edited_post_is_sent_again(self, api_client, create_post_instance, revalidate):
+        post = create_post_instance()
+        path = f'/blog/posts/{post.id}/'
+        response = api_client.get(path)
+
+        api_client.patch(path, {'title': 'Edited'})
+
+        response = revalidate(path, response)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['title'] == 'Edited'
+
+    def test_counters_moving_change_the_post(self, api_client, create_post_instance, revalidate):
+        post = create_post_instance()
+        path = f'/blog/posts/{post.id}/'
+        response = api_client.get(path)
+
+        baker.make(Comment, post=post, owner=post.owner)
+
+        response = revalidate(path, response)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['comments_count'] == 1
+
+    def test_if_modified_since(self, api_client, create_post_instance):
+        post = create_post_instance()
+        path = f'/blog/posts/{post.id}/'
+        last_modified = api_client.get(path)['Last-Modified']
+
+        response = api_client.get(path, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_post_list_changes_with_new_and_deleted_posts(self, api_client, create_post_instance, revalidate):
+        post = create_post_instance()
+        response = api_client.get('/blog/posts/')
+        assert revalidate('/blog/posts/', response).status_code == status.HTTP_304_NOT_MODIFIED
+
+        create_post_instance()
+        response = revalidate('/blog/posts/', response)
+        assert response.status_code == status.HTTP_200_OK
+
+        Post.objects.filter(pk=post.pk).delete()
+        assert revalidate('/blog/posts/', response).status_code == status.HTTP_200_OK
+
+    def test_lists_have_no_last_modified(self, api_client, create_post_instance):
+        create_post_instance()
+        older = create_post_instance()
+        response = api_client.get('/blog/posts/')
+        assert 'Last-Modified' not in response
+
+        Post.objects.filter(pk=older.pk).delete()
+        response = api_client.get('/blog/posts/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == 1
+
+    def test_missing_post_is_not_found_whatever_the_preconditions(self, api_client):
+        response = api_client.get('/blog/posts/999999/', HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_comment_list_changes_with_edited_comments(self, api_client, create_post_instance, revalidate):
+        post = create_post_instance()
+        comment = baker.make(Comment, post=post, owner=post.owner)
+        path = f'/blog/posts/{post.id}/comments/'
+        response = api_client.get(path)
+        assert revalidate(path, response).status_code == status.HTTP_304_NOT_MODIFIED
+
+        api_client.patch(f'{path}{comment.id}/', {'body': 'Edited'})
+
+        response = revalidate(path, response)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data[0]['body'] == 'Edited'
+
+    def test_author_changes_with_followers_and_user(self, api_client, authenticate, revalidate):
+        author = authenticate().author
+        path = f'/blog/authors/{author.id}/'
+        response = api_client.get(path)
+        assert revalidate(path, response).status_code == status.HTTP_304_NOT_MODIFIED
+
+        authenticate()
+        api_client.post(f'/blog/follow/{author.id}/', {})
+        response = revalidate(path, response)
+        assert response.data['follower_count'] == 1
+
+        author.user.first_name = 'Renamed'
+        author.user.save()
+        response = revalidate(path, response)
+        assert response.data['first_name'] == 'Renamed'
+
+    def test_representations_have_their_own_tags(self, api_client, create_post_instance, monkeypatch):
+        # The browsable API renders its forms with queries of its own.
+        monkeypatch.setattr(queries, 'STRICT', False)
+        post = create_post_instance()
+        path = f'/blog/posts/{post.id}/'
+        json_response = api_client.get(path, HTTP_ACCEPT='application/json')
+        html_response = api_client.get(path, HTTP_ACCEPT='text/html')
+        assert json_response['ETag'] != html_response['ETag']
@@ -0,0 +1,136 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from rest_framework import status
+
+from blog.exports import read_rows
+from blog.models import Follow, Post
+
+
+def lines(response):
+    return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+
+@pytest.fixture
+def admin(authenticate):
+    user = authenticate()
+    user.is_staff = True
+    user.save()
+    return user
+
+
+@pytest.mark.django_db
+class TestReadRows:
+    def test_ranges_resume_after_the_watermark(self, create_post_instance):
+        posts = [create_post_instance() for _ in range(5)]
+        watermark = {}
+
+        rows = list(read_rows('posts', watermark, range_size=2, chunk_size=2))
+
+        assert [row['id'] for row in rows] == [post.id for post in posts]
+        assert (watermark['updated_at'], watermark['id']) == (rows[-1]['updated_at'], posts[-1].id)
+        assert list(read_rows('posts', dict(watermark))) == []
+
+        posts[1].title = 'Edited'
+        posts[1].save()
+        assert [row['title'] for row in read_rows('posts', watermark)] == ['Edited']
+
+    def test_rows_committed_late_are_read_once(self, create_post_instance):
+        first, second = create_post_instance(), create_post_instance()
+        watermark = {}
+        list(read_rows('posts', watermark))
+
+        # Written by a transaction that began before the export and committed after it.
+        late = create_post_instance()
+        Post.objects.filter(pk=late.pk).update(updated_at=first.updated_at + timedelta(microseconds=1))
+
+        assert [row['id'] for row in read_rows('posts', watermark)] == [late.id]
+        assert list(read_rows('posts', watermark)) == []
+
+        # Without the rows it read, a watermark reads the overlap again.
+        Post.objects.filter(pk__in=[first.pk, late.pk]).update(updated_at=second.updated_at - timedelta(hours=1))
+        watermark = {'updated_at': second.updated_at, 'id': second.id}
+        assert [row['id'] for row in read_rows('posts', watermark, overlap=60)] == [second.id]
+
+    def test_follow_edges_by_id(self, authenticate):
+        first, second, third = (authenticate().author for _ in range(3))
+        edge = Follow.objects.create(from_author=first, to_author=second)
+        new_edge = Follow.objects.create(from_author=third, to_author=first)
+
+        rows = list(read_rows('follows', {'id': edge.id}))
+
+        assert rows == [{'id': new_edge.id, 'from_author_id': third.id, 'to_author_id': first.id}]
+
+
+@pytest.mark.django_db
+class TestExportApi:
+    def test_only_admins_can_export(self, api_client, authenticate):
+        assert api_client.get('/blog/export/posts/').status_code == status.HTTP_401_UNAUTHORIZED
+        authenticate()
+        response = api_client.get('/blog/export/posts/', {'format': 'csv'})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert response['Content-Type'] == 'application/json'
+
+    def test_formats(self, api_client, admin, create_post_instance):
+        post = create_post_instance(status='P', title='a, "quoted"\ntitle')
+        api_client.force_authenticate(user=admin)
+
+        response = api_client.get('/blog/export/posts/')
+        assert response['Content-Type'] == 'application/x-ndjson'
+        assert response['Content-Disposition'] == 'attachment; filename="posts.jsonl"'
+        assert [(row['id'], row['title']) for row in lines(response)] == [(post.id, post.title)]
+
+        response = api_client.get('/blog/export/posts/', {'format': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        assert [(row['id'], row['title'], row['published_date']) for row in rows] == [
+            (str(post.id), post.title, post.published_date.isoformat())]
+
+        response = api_client.get('/blog/export/authors/', HTTP_ACCEPT='application/x-columns+ndjson')
+        [chunk] = lines(response)
+        assert chunk['rows'] == 2
+        assert chunk['columns']['username'] == [admin.username, post.owner.user.username]
+
+    def test_resume_parameters(self, api_client, admin, create_post_instance):
+        older, first, second = create_post_instance(), create_post_instance(), create_post_instance()
+        Post.objects.filter(pk=older.pk).update(updated_at=first.updated_at - timedelta(hours=1))
+        api_client.force_authenticate(user=admin)
+
+        response = api_client.get('/blog/export/posts/', {'after_updated_at': first.updated_at.isoformat(),
+                                                          'after_id': first.id})
+
+        # The rows of the overlap before the watermark are sent again.
+        assert [row['id'] for row in lines(response)] == [first.id, second.id]
+
+    def test_invalid_requests(self, api_client, admin):
+        api_client.force_authenticate(user=admin)
+
+        assert api_client.get('/blog/export/users/').status_code == status.HTTP_404_NOT_FOUND
+        response = api_client.get('/blog/export/posts/', {'format': 'csv', 'after_id': '3'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'watermark' in response.json()
+        response = api_client.get('/blog/export/posts/', {'after_updated_at': 'yesterday', 'after_id': '3'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestExportCommand:
+    def test_incremental_export(self, create_post_instance, tmp_path):
+        first = create_post_instance()
+        watermarks = tmp_path / 'watermarks.json'
+
+        def export(*tables, **options):
+            call_command('export_blog', *tables, output_dir=str(tmp_path), watermarks=str(watermarks),
+                         stdout=io.StringIO(), **options)
+
+        export()
+        assert [json.loads(line)['id'] for line in (tmp_path / 'posts.jsonl').read_text().splitlines()] == [first.id]
+        assert set(json.loads(watermarks.read_text())) == {'posts', 'authors'}
+
+        second = create_post_instance()
+        export('posts', format='csv')
+        assert [row['id'] for row in csv.DictReader((tmp_path / 'posts.csv').open())] == [str(second.id)]
+        assert json.loads(watermarks.read_text())['posts']['id'] == second.id
@@ -0,0 +1,103 @@
+import pytest
+from model_bakery import baker
+from rest_framework import status
+
+from blog import feed
+from blog.models import Post, TimelineEntry
+
+FEED_URL = '/blog/feed/'
+
+
+@pytest.fixture
+def follow(api_client):
+    def do_follow(author_id):
+        return api_client.post(f'/blog/follow/{author_id}/', {})
+    return do_follow
+
+
+@pytest.fixture
+def unfollow(api_client):
+    def do_unfollow(author_id):
+        return api_client.delete(f'/blog/unfollow/{author_id}/')
+    return do_unfollow
+
+
+@pytest.mark.django_db
+class TestFeed:
+    def test_anonymous_user_cannot_view_feed_returns_401(self, api_client):
+        response = api_client.get(FEED_URL)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_feed_shows_published_posts_of_followed_authors(self, api_client, authenticate, follow):
+        followed = authenticate().author
+        other = authenticate().author
+        old_post = baker.make(Post, owner=followed, status='P')
+        baker.make(Post, owner=followed, status='D')
+        baker.make(Post, owner=other, status='P')
+        authenticate()
+
+        follow(followed.id)
+        new_post = baker.make(Post, owner=followed, status='P')
+        response = api_client.get(FEED_URL)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [post['id'] for post in response.data['results']] == [new_post.id, old_post.id]
+
+    def test_unpublishing_and_unfollowing_remove_posts(self, api_client, authenticate, follow, unfollow):
+        followed = authenticate().author
+        post = baker.make(Post, owner=followed, status='P')
+        follower = authenticate().author
+        follow(followed.id)
+
+        post.status = 'D'
+        post.save()
+        assert not TimelineEntry.objects.filter(post=post).exists()
+
+        post.status = 'P'
+        post.save()
+        assert TimelineEntry.objects.filter(follower=follower, post=post).exists()
+
+        unfollow(followed.id)
+        assert api_client.get(FEED_URL).data['results'] == []
+
+    def test_backfill_is_capped_per_author(self, api_client, authenticate, monkeypatch):
+        monkeypatch.setattr(feed, 'BACKFILL_SIZE', 2)
+        prolific = authenticate().author
+        posts = baker.make(Post, owner=prolific, status='P', _quantity=3)
+        quiet = authenticate().author
+        quiet_post = baker.make(Post, owner=quiet, status='P')
+        follower = authenticate().author
+
+        api_client.post('/blog/follow/bulk/', {'author_ids': [prolific.id, quiet.id]}, format='json')
+
+        latest = sorted(posts, key=lambda post: (post.published_date, post.id))[-2:]
+        assert set(TimelineEntry.objects.filter(follower=follower).values_list('post_id', flat=True)) == \
+            {quiet_post.id, *[post.id for post in latest]}
+
+    def test_popular_authors_are_read_on_fan_in(self, api_client, authenticate, follow, monkeypatch):
+        monkeypatch.setattr(feed, 'FANOUT_FOLLOWER_LIMIT', 0)
+        popular = authenticate().author
+        authenticate()
+        follow(popular.id)
+        post = baker.make(Post, owner=popular, status='P')
+
+        response = api_client.get(FEED_URL)
+
+        assert not TimelineEntry.objects.exists()
+        assert [item['id'] for item in response.data['results']] == [post.id]
+
+    def test_feed_pages_with_cursor(self, api_client, authenticate, follow):
+        followed = authenticate().author
+        authenticate()
+        follow(followed.id)
+        posts = baker.make(Post, owner=followed, status='P', _quantity=13)
+
+        ids = []
+        url = FEED_URL
+        while url:
+            response = api_client.get(url)
+            ids += [post['id'] for post in response.data['results']]
+            url = response.data['next']
+
+        assert sorted(ids) == sorted(post.id for post in posts)
+        assert len(ids) == len(set(ids))
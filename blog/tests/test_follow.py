@@ -1,6 +1,11 @@
+from io import StringIO
+
 import pytest
+from django.core.management import call_command
 from rest_framework import status
 
+from blog.models import Author, Follow
+
 @pytest.fixture
 def follow_author(api_client):
     def do_follow_author(author_id):
@@ -92,3 +97,94 @@ class TestGetFollow:
         authenticate()
         response = api_client.get('/blog/followings/')
         assert response.status_code == status.HTTP_200_OK
+
+    def test_followings_are_paged_by_id(self, api_client, authenticate, create_author_instance):
+        followed = [create_author_instance() for _ in range(12)]
+        author = authenticate().author
+        Follow.objects.bulk_create(Follow(from_author=author, to_author=other) for other in reversed(followed))
+
+        pages = [api_client.get('/blog/followings/', {'page': page}).data['results'] for page in (1, 2)]
+
+        assert [row['id'] for page in pages for row in page] == [other.id for other in followed]
+
+@pytest.mark.django_db
+class TestFollowCounters:
+    def test_follow_and_unfollow_update_counters(self, follow_author, unfollow_author, authenticate, create_author_instance):
+        author = create_author_instance()
+        follower = authenticate().author
+
+        follow_author(author.id)
+        follow_author(author.id)
+        author.refresh_from_db()
+        follower.refresh_from_db()
+        assert (author.follower_count, follower.following_count) == (1, 1)
+
+        unfollow_author(author.id)
+        unfollow_author(author.id)
+        author.refresh_from_db()
+        follower.refresh_from_db()
+        assert (author.follower_count, follower.following_count) == (0, 0)
+
+    def test_reconcile_command_fixes_only_drifted_authors(self, follow_author, authenticate, create_author_instance):
+        author = create_author_instance()
+        follower = authenticate().author
+        follow_author(author.id)
+        Author.objects.filter(pk=author.pk).update(follower_count=5)
+        Author.objects.filter(pk=follower.pk).update(following_count=0)
+
+        out = StringIO()
+        call_command('reconcile_follow_counters', chunk_size=1, stdout=out)
+
+        author.refresh_from_db()
+        follower.refresh_from_db()
+        assert (author.follower_count, author.following_count) == (1, 0)
+        assert (follower.follower_count, follower.following_count) == (0, 1)
+        assert 'Fixed 2 drifted authors.' in out.getvalue()
+
+@pytest.mark.django_db
+class TestBulkFollow:
+    def test_anonymous_user_cannot_bulk_follow_returns_401(self, api_client):
+        response = api_client.post('/blog/follow/bulk/', {'author_ids': [1]}, format='json')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_empty_list_returns_400(self, api_client, authenticate):
+        authenticate()
+        response = api_client.post('/blog/follow/bulk/', {'author_ids': []}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_bulk_follow_reports_status_per_id(self, api_client, authenticate, create_author_instance, follow_author):
+        first = create_author_instance()
+        second = create_author_instance()
+        followed = create_author_instance()
+        me = authenticate().author
+        follow_author(followed.id)
+
+        response = api_client.post('/blog/follow/bulk/',
+                                   {'author_ids': [first.id, second.id, followed.id, me.id, 999]}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['statuses'] == {
+            first.id: 'followed',
+            second.id: 'followed',
+            followed.id: 'already following',
+            me.id: "You can't follow yourself.",
+            999: 'not found',
+        }
+        me.refresh_from_db()
+        first.refresh_from_db()
+        assert me.following_count == 3
+        assert first.follower_count == 1
+        assert set(me.follows.values_list('id', flat=True)) == {first.id, second.id, followed.id}
+
+    def test_bulk_unfollow_reports_status_per_id(self, api_client, authenticate, create_author_instance, follow_author):
+        followed = create_author_instance()
+        stranger = create_author_instance()
+        me = authenticate().author
+        follow_author(followed.id)
+
+        response = api_client.post('/blog/unfollow/bulk/', {'author_ids': [followed.id, stranger.id]}, format='json')
+
+        assert response.data['statuses'] == {followed.id: 'unfollowed', stranger.id: 'not following'}
+        me.refresh_from_db()
+        followed.refresh_from_db()
+        assert (me.following_count, followed.follower_count) == (0, 0)
@@ -1,5 +1,12 @@
 import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
+from blog.cache import get_cache
+from blog.models import Post
+from blog.slugs import slug_key
 
 
 POST_BASE_URL = '/blog/posts/'
@@ -47,6 +54,21 @@ class TestPostCreation:
         assert response.status_code == status.HTTP_201_CREATED
         assert response.data['title'] == 'Valid Post'
 
+    def test_same_titles_get_free_slugs(self, authenticate, create_post):
+        authenticate()
+        slugs = [create_post({'title': title, 'body': 'x'}).data['slug']
+                 for title in ['Same Title', 'Same title!', 'Same Title', '???']]
+        assert slugs == ['same-title', 'same-title-2', 'same-title-3', 'post']
+
+    def test_slug_taken_meanwhile_is_allocated_again(self, create_post_instance, monkeypatch):
+        create_post_instance(title='Race', slug='race')
+        allocated = iter(['race', 'race-2'])
+        monkeypatch.setattr('blog.slugs.allocate_slug', lambda text: next(allocated))
+
+        post = create_post_instance(title='Race', slug='')
+
+        assert Post.objects.get(pk=post.pk).slug == 'race-2'
+
 @pytest.mark.django_db
 class TestPostRetrieval:
     def test_nonexistent_post_returns_404(self, retrieve_post):
@@ -59,6 +81,44 @@ class TestPostRetrieval:
         assert response.status_code == status.HTTP_200_OK
         assert response.data['id'] == post.id
 
+@pytest.mark.django_db
+class TestPostRetrievalBySlug:
+    def test_slug_is_resolved_from_the_cache(self, api_client, create_post_instance):
+        post = create_post_instance(title='Slug Post')
+        assert api_client.get(f'{POST_BASE_URL}slug/slug-post/').data['id'] == post.id
+        cache.clear()
+        get_cache().set(slug_key('slug-post'), post.id)
+
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(f'{POST_BASE_URL}slug/slug-post/')
+
+        assert response.data['id'] == post.id
+        assert not any('"slug" =' in query['sql'] for query in context.captured_queries)
+
+    def test_renamed_and_deleted_slugs_are_forgotten(self, api_client, create_post_instance):
+        post = create_post_instance(title='Old')
+        assert api_client.get(f'{POST_BASE_URL}slug/old/').status_code == status.HTTP_200_OK
+
+        api_client.patch(f'{POST_BASE_URL}{post.id}/', {'slug': 'new'})
+        assert api_client.get(f'{POST_BASE_URL}slug/old/').status_code == status.HTTP_404_NOT_FOUND
+        assert api_client.get(f'{POST_BASE_URL}slug/new/').data['id'] == post.id
+
+        api_client.delete(f'{POST_BASE_URL}{post.id}/')
+        assert api_client.get(f'{POST_BASE_URL}slug/new/').status_code == status.HTTP_404_NOT_FOUND
+
+    def test_slug_read_back_before_the_commit_is_forgotten(self, create_post_instance,
+                                                           django_capture_on_commit_callbacks):
+        post = create_post_instance(title='Old')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            post.slug = 'new'
+            post.save()
+            # A request reading the old slug before the commit.
+            get_cache().set(slug_key('old'), post.id)
+
+        assert get_cache().get(slug_key('old')) is None
+
+
 @pytest.mark.django_db
 class TestPostUpdate:
     def test_anonymous_user_cannot_update_post_returns_401(self, update_post):
@@ -109,3 +169,51 @@ class TestPostDeletion:
         post = create_post_instance()
         response = delete_post(post.id)
         assert response.status_code == status.HTTP_204_NO_CONTENT
+
+@pytest.mark.django_db
+class TestPostList:
+    def collect_pages(self, api_client, url):
+        ids = []
+        while url:
+            response = api_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            ids += [post['id'] for post in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_list_is_paginated(self, api_client, create_post_instance):
+        for _ in range(12):
+            create_post_instance(status='P')
+        response = api_client.get(POST_BASE_URL)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == 10
+        assert response.data['next'] is not None
+        assert response.data['previous'] is None
+
+    def test_cursor_walk_returns_every_post_once_in_order(self, api_client, create_post_instance):
+        for i in range(25):
+            create_post_instance(status='P' if i % 3 else 'D')
+        ids = self.collect_pages(api_client, f"{POST_BASE_URL}?page_size=4")
+        expected = list(Post.objects.order_by(
+            F('published_date').desc(nulls_last=True), '-created_at', '-id'
+        ).values_list('id', flat=True))
+        assert ids == expected
+
+    def test_previous_link_returns_previous_page(self, api_client, create_post_instance):
+        for _ in range(6):
+            create_post_instance(status='P')
+        first = api_client.get(f"{POST_BASE_URL}?page_size=3")
+        second = api_client.get(first.data['next'])
+        back = api_client.get(second.data['previous'])
+        assert [post['id'] for post in back.data['results']] == [post['id'] for post in first.data['results']]
+
+    def test_cursor_walk_respects_filter_and_ordering(self, api_client, create_post_instance):
+        for i in range(9):
+            create_post_instance(status='P' if i % 2 else 'D')
+        ids = self.collect_pages(api_client, f"{POST_BASE_URL}?status=P&ordering=updated_at&page_size=2")
+        expected = list(Post.objects.filter(status='P').order_by('updated_at', 'id').values_list('id', flat=True))
+        assert ids == expected
+
+    def test_invalid_cursor_returns_404(self, api_client):
+        response = api_client.get(f"{POST_BASE_URL}?cursor=bogus")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,52 @@
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+
+from blog.models import Comment, Post, PostImage, PostVideo
+
+
+@pytest.mark.django_db
+class TestPostCounters:
+    def test_counters_follow_child_creation_and_deletion(self, create_post_instance):
+        post = create_post_instance()
+        comment = baker.make(Comment, post=post, owner=post.owner)
+        baker.make(Comment, post=post, owner=post.owner, parent=comment)
+        baker.make(PostImage, post=post, _create_files=True)
+        video = baker.make(PostVideo, post=post, _create_files=True)
+
+        post.refresh_from_db()
+        assert (post.comments_count, post.images_count, post.videos_count) == (2, 1, 1)
+
+        comment.delete()
+        video.delete()
+
+        post.refresh_from_db()
+        assert (post.comments_count, post.images_count, post.videos_count) == (0, 1, 0)
+
+    def test_counters_are_served_by_post_endpoint(self, api_client, create_post_instance):
+        post = create_post_instance()
+        baker.make(Comment, post=post, owner=post.owner, _quantity=3)
+        response = api_client.get(f'/blog/posts/{post.id}/')
+        assert response.data['comments_count'] == 3
+        assert response.data['images_count'] == 0
+
+    def test_saving_a_post_keeps_counters_changed_meanwhile(self, create_post_instance):
+        post = create_post_instance(title='Before')
+        post = Post.objects.get(pk=post.pk)
+        baker.make(Comment, post=post, owner=post.owner)
+
+        post.title = 'After'
+        post.save()
+
+        post.refresh_from_db()
+        assert (post.title, post.comments_count) == ('After', 1)
+
+    def test_rebuild_command_fixes_drifted_counters(self, create_post_instance):
+        post = create_post_instance()
+        baker.make(Comment, post=post, owner=post.owner, _quantity=2)
+        Post.objects.filter(pk=post.pk).update(comments_count=7, images_count=4)
+
+        call_command('rebuild_post_counters', chunk_size=1)
+
+        post.refresh_from_db()
+        assert (post.comments_count, post.images_count, post.videos_count) == (2, 0, 0)
@@ -4,7 +4,12 @@ from model_bakery import baker
 from django.core.files.uploadedfile import SimpleUploadedFile
 from PIL import Image
 import io
-from blog.models import PostImage
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from blog.images import generate_derivatives, needs_derivatives
+from blog.models import PostImage, Task
 
 
 BASE_POST_URL = '/blog/posts/'
@@ -144,6 +149,93 @@ class TestPostImageDeletion:
         response = delete_post_image(image.post_id, image.id)
         
         assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    def test_ownership_is_resolved_in_one_query(self, create_post_image_instance, delete_post_image):
+        image = create_post_image_instance()
+
+        with CaptureQueriesContext(connection) as queries:
+            delete_post_image(image.post_id, image.id)
+
+        lookups = [query['sql'] for query in queries if '"blog_author"' in query['sql']]
+        assert len(lookups) == 1
+        assert '"blog_post"' in lookups[0]
       
         
-    
\ No newline at end of file
+    
+@pytest.mark.django_db
+class TestPostImageDerivatives:
+    def test_upload_queues_derivatives(self, create_post_instance, create_post_image, create_upload_file, settings):
+        settings.BLOG_TASKS_EAGER = False
+        post = create_post_instance()
+        response = create_post_image(post.id, {"image": create_upload_file()})
+        task = Task.objects.get(name='blog.images.generate_derivatives')
+        assert task.args == ['blog.PostImage', response.data['id'], 'image', 'variants']
+        assert response.data['srcset'] == {}
+
+    def test_derivatives_are_served_as_srcset(self, create_post_image_instance, retrieve_post_image):
+        image = create_post_image_instance()
+        generate_derivatives('blog.PostImage', image.id, 'image', 'variants')
+
+        response = retrieve_post_image(image.post_id, image.id)
+
+        srcset = response.data['srcset']
+        assert set(srcset) == {'thumbnail', 'medium', 'webp'}
+        image.refresh_from_db()
+        with image.image.storage.open(image.variants['webp'].split(settings.MEDIA_URL, 1)[1]) as webp:
+            assert Image.open(webp).format == 'WEBP'
+
+    def test_replaced_image_discards_stale_derivatives(self, create_post_image_instance, create_upload_file, settings,
+                                                       django_capture_on_commit_callbacks):
+        image = create_post_image_instance()
+        generate_derivatives('blog.PostImage', image.id, 'image', 'variants')
+        image.refresh_from_db()
+        assert not needs_derivatives(image.image, image.variants)
+        stale = image.variants['files']
+
+        settings.BLOG_TASKS_EAGER = False
+        image.image = create_upload_file()
+        with django_capture_on_commit_callbacks(execute=True):
+            image.save()
+        assert needs_derivatives(image.image, image.variants)
+        image.refresh_from_db()
+        assert image.variants == {}
+        assert not any(image.image.storage.exists(path) for path in stale)
+
+    def test_regenerated_and_deleted_derivatives_are_removed(self, create_post_image_instance,
+                                                             django_capture_on_commit_callbacks):
+        image = create_post_image_instance()
+        storage = image.image.storage
+        with django_capture_on_commit_callbacks(execute=True):
+            generate_derivatives('blog.PostImage', image.id, 'image', 'variants')
+            image.refresh_from_db()
+            previous = image.variants['files']
+            generate_derivatives('blog.PostImage', image.id, 'image', 'variants')
+        image.refresh_from_db()
+        assert not any(storage.exists(path) for path in previous)
+        assert all(storage.exists(path) for path in image.variants['files'])
+
+        with django_capture_on_commit_callbacks(execute=True):
+            image.delete()
+        assert not any(storage.exists(path) for path in image.variants['files'])
+
+@pytest.mark.django_db
+class TestPostImageDimensions:
+    def test_upload_stores_dimensions(self, create_post_instance, create_post_image, create_upload_file):
+        post = create_post_instance()
+        response = create_post_image(post.id, {"image": create_upload_file()})
+        assert (response.data['width'], response.data['height']) == (100, 100)
+
+    def test_retrieve_does_not_open_the_file(self, create_post_image_instance, retrieve_post_image, monkeypatch):
+        image = create_post_image_instance()
+        monkeypatch.setattr('django.db.models.fields.files.FieldFile.open', lambda *args: pytest.fail('file opened'))
+        response = retrieve_post_image(image.post_id, image.id)
+        assert (response.data['width'], response.data['height']) == (100, 100)
+
+    def test_backfill_command_fills_missing_dimensions(self, create_post_image_instance):
+        image = create_post_image_instance()
+        PostImage.objects.filter(pk=image.pk).update(width=None, height=None)
+
+        call_command('backfill_media_metadata', stdout=io.StringIO())
+
+        image.refresh_from_db()
+        assert (image.width, image.height) == (100, 100)
@@ -0,0 +1,155 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from model_bakery import baker
+from rest_framework import status
+
+from blog.models import Follow, Post, TimelineEntry
+from blog.slugs import allocate_slugs
+
+IMPORT_URL = '/blog/posts/import/'
+
+
+def jsonl(*rows):
+    return '\n'.join(row if isinstance(row, str) else json.dumps(row) for row in rows).encode()
+
+
+@pytest.fixture
+def upload(api_client):
+    def do_upload(content, name='posts.jsonl', **data):
+        return api_client.post(IMPORT_URL, {'file': SimpleUploadedFile(name, content), **data}, format='multipart')
+    return do_upload
+
+
+@pytest.mark.django_db
+class TestAllocateSlugs:
+    def test_taken_and_repeated_bases_get_the_next_free_suffix(self, create_post_instance):
+        create_post_instance(slug='hello')
+        create_post_instance(slug='hello-2')
+        create_post_instance(slug='hello-world')
+
+        assert allocate_slugs(['hello', 'other', 'hello', 'other']) == ['hello-3', 'other', 'hello-4', 'other-2']
+
+
+@pytest.mark.django_db
+class TestImportApi:
+    def test_rows_become_posts_of_the_caller(self, authenticate, upload):
+        author = authenticate().author
+        response = upload(jsonl(
+            {'title': 'Hello world', 'body': 'First', 'status': 'P', 'owner': 'someone-else'},
+            {'title': 'Hello world', 'body': 'Second', 'slug': 'custom'},
+        ))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'rows': 2, 'created': 2, 'failed': 0, 'errors': []}
+        first, second = Post.objects.order_by('id')
+        assert (first.owner_id, first.slug, first.status) == (author.id, 'hello-world', 'P')
+        assert first.published_date is not None
+        assert (second.slug, second.status, second.published_date) == ('custom', 'D', None)
+
+    def test_failed_rows_are_reported_by_line(self, authenticate, upload):
+        authenticate()
+        response = upload(jsonl(
+            {'title': 'Fine', 'body': 'ok'},
+            '{not json',
+            '',
+            {'body': 'no title'},
+            '[1, 2]',
+            {'title': 'Bad status', 'body': 'x', 'status': 'X'},
+        ))
+
+        assert (response.data['created'], response.data['failed']) == (1, 4)
+        errors = {error['line']: error['errors'] for error in response.data['errors']}
+        assert sorted(errors) == [2, 4, 5, 6]
+        assert 'title' in errors[4] and 'status' in errors[6]
+
+    def test_csv_with_quoted_newlines(self, authenticate, upload):
+        authenticate()
+        content = b'title,body,status\r\nFirst,"two\r\nlines",P\r\nSecond,,D\r\n'
+
+        response = upload(content, name='export.csv')
+
+        assert response.data['created'] == 1
+        assert response.data['errors'][0]['line'] == 4
+        assert Post.objects.get().body == 'two\r\nlines'
+
+    def test_lines_that_are_not_utf8_are_reported(self, authenticate, upload):
+        authenticate()
+        response = upload(jsonl({'title': 'Before', 'body': 'x'}, '{"title": "Caf\xe9"}', {'title': 'After', 'body': 'x'})
+                          .replace(b'Caf\xc3\xa9', b'Caf\xe9'))
+
+        assert (response.status_code, response.data['created']) == (status.HTTP_200_OK, 2)
+        assert response.data['errors'] == [{'line': 2, 'errors': {'non_field_errors': ['The line is not UTF-8 text.']}}]
+
+    def test_csv_reading_goes_on_after_bad_records(self, authenticate, upload):
+        authenticate()
+        limit = csv.field_size_limit(20)
+        try:
+            response = upload(b'title,body\nOne,x\nTwo,' + b'y' * 30 + b'\nThr\xe9e,x\nFour,x\n', name='posts.csv')
+        finally:
+            csv.field_size_limit(limit)
+
+        assert response.data['created'] == 2
+        assert [error['line'] for error in response.data['errors']] == [3, 4]
+
+    def test_queries_do_not_grow_with_rows(self, authenticate, upload, django_assert_max_num_queries):
+        authenticate()
+        rows = [{'title': f'Post {number % 10}', 'body': 'body', 'status': 'P'} for number in range(200)]
+
+        with django_assert_max_num_queries(15):
+            response = upload(jsonl(*rows))
+
+        assert response.data['created'] == 200
+        assert Post.objects.values('slug').distinct().count() == 200
+
+    def test_imported_posts_are_searchable_and_fanned_out(self, api_client, authenticate, upload):
+        follower = authenticate().author
+        author = authenticate().author
+        Follow.objects.create(from_author=follower, to_author=author)
+
+        upload(jsonl({'title': 'Migrated notes', 'body': 'zeppelin', 'status': 'P'}))
+
+        post = Post.objects.get()
+        assert TimelineEntry.objects.filter(follower=follower, post=post).exists()
+        results = api_client.get('/blog/posts/', {'search': 'zeppelin'}).data['results']
+        assert [result['id'] for result in results] == [post.id]
+
+    def test_requires_a_file_and_authentication(self, api_client, authenticate, upload):
+        assert upload(jsonl({'title': 'x', 'body': 'y'})).status_code == status.HTTP_401_UNAUTHORIZED
+        authenticate()
+        response = api_client.post(IMPORT_URL, {}, format='multipart')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert upload(b'x', format='xml').status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestImportCommand:
+    def test_owner_column_in_small_batches(self, authenticate, tmp_path):
+        author = authenticate().author
+        path = tmp_path / 'posts.jsonl'
+        path.write_bytes(jsonl(*[{'title': 'Same', 'body': 'x', 'owner': author.user.username}] * 5,
+                               {'title': 'Orphan', 'body': 'x', 'owner': 'nobody'},
+                               {'title': 'Nobody', 'body': 'x'}))
+        errors = tmp_path / 'errors.jsonl'
+        out = io.StringIO()
+
+        call_command('import_posts', str(path), batch_size=2, chunk_size=1, errors=str(errors), stdout=out,
+                     stderr=io.StringIO())
+
+        assert 'Imported 5 of 7 rows, 2 failed' in out.getvalue()
+        assert sorted(Post.objects.values_list('slug', flat=True)) == ['same', 'same-2', 'same-3', 'same-4', 'same-5']
+        assert [json.loads(line)['line'] for line in errors.read_text().splitlines()] == [6, 7]
+
+    def test_owner_option(self, authenticate, tmp_path):
+        author = authenticate().author
+        path = tmp_path / 'posts.csv'
+        path.write_text('title,body\nOne,x\n')
+
+        call_command('import_posts', str(path), owner=author.user.username, stdout=io.StringIO(),
+                     stderr=io.StringIO())
+
+        assert Post.objects.get().owner_id == author.id
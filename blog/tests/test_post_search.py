@@ -0,0 +1,76 @@
+import pytest
+from model_bakery import baker
+
+from blog.models import Post
+from blog.search import InvertedIndexBackend
+
+POST_BASE_URL = '/blog/posts/'
+
+
+@pytest.fixture
+def search_posts(api_client):
+    def do_search_posts(query, **params):
+        response = api_client.get(POST_BASE_URL, {'search': query, **params})
+        return [post['id'] for post in response.data['results']]
+    return do_search_posts
+
+
+@pytest.mark.django_db
+class TestPostSearch:
+    def test_only_posts_matching_every_term_are_returned(self, create_post_instance, search_posts):
+        match = create_post_instance(title='Django tips', body='Use select_related for joins')
+        create_post_instance(title='Django news', body='Release notes')
+        create_post_instance(title='Cooking', body='Pasta')
+
+        assert search_posts('django joins') == [match.id]
+
+    def test_results_are_ranked_by_relevance(self, create_post_instance, search_posts):
+        weak = create_post_instance(title='Notes', body='one mention of python among many other words here')
+        strong = create_post_instance(title='Python', body='python python python')
+
+        assert search_posts('python') == [strong.id, weak.id]
+
+    def test_explicit_ordering_overrides_relevance(self, create_post_instance, search_posts):
+        first = create_post_instance(title='Python', body='python python')
+        second = create_post_instance(title='Notes', body='python')
+
+        assert search_posts('python', ordering='updated_at') == [first.id, second.id]
+
+    def test_index_follows_updates_and_deletes(self, create_post_instance, search_posts):
+        post = create_post_instance(title='Old title', body='body')
+        post.title = 'Fresh title'
+        post.save()
+        assert search_posts('old') == []
+        assert search_posts('fresh') == [post.id]
+
+        post.delete()
+        assert search_posts('fresh') == []
+
+    def test_ranked_results_page_with_cursor(self, api_client, create_post_instance):
+        for i in range(5):
+            create_post_instance(title='python ' * (i + 1), body='text')
+
+        ids = []
+        url = f"{POST_BASE_URL}?search=python&page_size=2"
+        while url:
+            response = api_client.get(url)
+            ids += [post['id'] for post in response.data['results']]
+            url = response.data['next']
+
+        assert len(ids) == len(set(ids)) == 5
+
+
+@pytest.mark.django_db
+class TestInvertedIndexBackend:
+    def test_search_ranks_and_tracks_changes(self, create_post_instance):
+        backend = InvertedIndexBackend()
+        weak = create_post_instance(title='Notes', body='python and more words')
+        strong = create_post_instance(title='Python', body='python')
+
+        ranked = backend.search(Post.objects.all(), 'python').order_by('-rank')
+        assert list(ranked.values_list('id', flat=True)) == [strong.id, weak.id]
+
+        weak.body = 'nothing relevant'
+        backend.index(weak)
+        backend.remove(strong.id)
+        assert not backend.search(Post.objects.all(), 'python').exists()
@@ -1,7 +1,10 @@
+import struct
+
 import pytest
 from rest_framework import status
 from model_bakery import baker
 from django.core.files.uploadedfile import SimpleUploadedFile
+from blog import ranges
 from blog.models import PostVideo
 
 BASE_POST_URL = '/blog/posts/'
@@ -136,3 +139,177 @@ class TestPostVideoDeletion:
         video = create_post_video_instance()
         response = delete_post_video(video.post_id, video.id)
         assert response.status_code == status.HTTP_204_NO_CONTENT
+
+@pytest.fixture
+def start_upload(api_client):
+    def do_start_upload(post_id, data):
+        return api_client.post(f"{BASE_POST_URL}{post_id}/video-uploads/", data)
+    return do_start_upload
+
+@pytest.fixture
+def put_chunk(api_client):
+    def do_put_chunk(post_id, upload_id, chunk, start, total):
+        return api_client.put(f"{BASE_POST_URL}{post_id}/video-uploads/{upload_id}/", chunk,
+                              content_type='application/octet-stream',
+                              headers={'Content-Range': f'bytes {start}-{start + len(chunk) - 1}/{total}'})
+    return do_put_chunk
+
+@pytest.fixture
+def finalize_upload(api_client):
+    def do_finalize_upload(post_id, upload_id):
+        return api_client.post(f"{BASE_POST_URL}{post_id}/video-uploads/{upload_id}/finalize/")
+    return do_finalize_upload
+
+@pytest.mark.django_db
+class TestChunkedVideoUpload:
+    def test_user_not_owner_cannot_start_upload(self, authenticate, create_post_instance, start_upload):
+        post = create_post_instance()
+        authenticate()
+        response = start_upload(post.id, {'filename': 'a.mp4', 'size': 10})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_limits_are_checked_before_any_chunk(self, create_post_instance, start_upload):
+        post = create_post_instance()
+        assert start_upload(post.id, {'filename': 'a.exe', 'size': 10}).status_code == status.HTTP_400_BAD_REQUEST
+        assert start_upload(post.id, {'filename': 'a.mp4', 'size': 11 * 1024 * 1024}).status_code == status.HTTP_400_BAD_REQUEST
+        assert start_upload(post.id, {'filename': 'a.mp4', 'size': 0}).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_chunks_are_assembled_into_a_video(self, create_post_instance, start_upload, put_chunk, finalize_upload):
+        post = create_post_instance()
+        payload = bytes(range(256)) * 40
+        upload = start_upload(post.id, {'filename': 'clip.mp4', 'size': len(payload), 'caption': 'hi'}).data
+
+        for start in range(0, len(payload), 4000):
+            response = put_chunk(post.id, upload['id'], payload[start:start + 4000], start, len(payload))
+            assert response.status_code == status.HTTP_200_OK
+        response = finalize_upload(post.id, upload['id'])
+
+        assert response.status_code == status.HTTP_201_CREATED
+        video = PostVideo.objects.get(pk=response.data['id'])
+        assert video.caption == 'hi'
+        with video.video.open('rb') as stored:
+            assert stored.read() == payload
+
+    def test_out_of_order_chunk_returns_current_offset(self, create_post_instance, start_upload, put_chunk, api_client):
+        post = create_post_instance()
+        upload = start_upload(post.id, {'filename': 'clip.mp4', 'size': 20}).data
+        put_chunk(post.id, upload['id'], b'x' * 10, 0, 20)
+
+        response = put_chunk(post.id, upload['id'], b'y' * 5, 15, 20)
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response['Upload-Offset'] == '10'
+        assert api_client.get(f"{BASE_POST_URL}{post.id}/video-uploads/{upload['id']}/").data['offset'] == 10
+
+    def test_incomplete_upload_cannot_be_finalized(self, create_post_instance, start_upload, put_chunk, finalize_upload):
+        post = create_post_instance()
+        upload = start_upload(post.id, {'filename': 'clip.mp4', 'size': 20}).data
+        put_chunk(post.id, upload['id'], b'x' * 10, 0, 20)
+
+        response = finalize_upload(post.id, upload['id'])
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert not PostVideo.objects.exists()
+
+@pytest.fixture
+def stream_post_video(api_client):
+    def do_stream_post_video(video, **headers):
+        return api_client.get(f"{BASE_POST_URL}{video.post_id}/videos/{video.id}/stream/", headers=headers)
+    return do_stream_post_video
+
+def read_content(response):
+    return b''.join(response.streaming_content)
+
+@pytest.mark.django_db
+class TestPostVideoStreaming:
+    def test_full_file_advertises_ranges(self, create_post_video_instance, stream_post_video):
+        video = create_post_video_instance()
+        response = stream_post_video(video, Accept='video/*')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Accept-Ranges'] == 'bytes'
+        assert read_content(response) == video.video.read()
+
+    def test_single_range_returns_206(self, create_post_video_instance, stream_post_video):
+        video = create_post_video_instance()
+        data = video.video.read()
+        response = stream_post_video(video, Range='bytes=10-19')
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response['Content-Range'] == f'bytes 10-19/{len(data)}'
+        assert read_content(response) == data[10:20]
+
+    def test_suffix_range_returns_file_end(self, create_post_video_instance, stream_post_video):
+        video = create_post_video_instance()
+        data = video.video.read()
+        response = stream_post_video(video, Range='bytes=-5')
+        assert read_content(response) == data[-5:]
+
+    def test_multiple_ranges_return_multipart(self, create_post_video_instance, stream_post_video):
+        video = create_post_video_instance()
+        data = video.video.read()
+        response = stream_post_video(video, Range='bytes=0-3,100-103')
+        body = read_content(response)
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response['Content-Type'].startswith('multipart/byteranges')
+        assert int(response['Content-Length']) == len(body)
+        assert data[0:4] in body and data[100:104] in body
+
+    def test_unsatisfiable_range_returns_416(self, create_post_video_instance, stream_post_video):
+        video = create_post_video_instance()
+        size = video.video.size
+        response = stream_post_video(video, Range=f'bytes={size + 10}-')
+        assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        assert response['Content-Range'] == f'bytes */{size}'
+
+    def test_stale_if_range_returns_whole_file(self, create_post_video_instance, stream_post_video):
+        video = create_post_video_instance()
+        response = stream_post_video(video, Range='bytes=0-3', **{'If-Range': '"stale"'})
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_matching_etag_returns_304(self, create_post_video_instance, stream_post_video):
+        video = create_post_video_instance()
+        etag = stream_post_video(video)['ETag']
+        response = stream_post_video(video, **{'If-None-Match': etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_offload_mode_returns_accel_redirect(self, create_post_video_instance, stream_post_video, monkeypatch):
+        monkeypatch.setattr(ranges, 'OFFLOAD', 'x-accel-redirect')
+        video = create_post_video_instance()
+        response = stream_post_video(video)
+        assert response['X-Accel-Redirect'] == f'/protected-media/{video.video.name}'
+
+def box(kind, payload):
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+def make_mp4(duration_seconds=3, width=640, height=360, codec=b'avc1'):
+    mvhd = box(b'mvhd', bytes(4) + struct.pack('>IIII', 0, 0, 1000, duration_seconds * 1000) + bytes(80))
+    tkhd = box(b'tkhd', bytes(76) + struct.pack('>II', width << 16, height << 16))
+    hdlr = box(b'hdlr', bytes(8) + b'vide' + bytes(13))
+    stsd = box(b'stsd', bytes(4) + struct.pack('>I', 1) + box(codec, bytes(78)))
+    mdia = box(b'mdia', hdlr + box(b'minf', box(b'stbl', stsd)))
+    moov = box(b'moov', mvhd + box(b'trak', tkhd + mdia))
+    return box(b'ftyp', b'isom' + bytes(4)) + box(b'mdat', bytes(2048)) + moov
+
+@pytest.mark.django_db
+class TestPostVideoMetadata:
+    def test_upload_stores_container_metadata(self, create_post_instance, upload_post_video, retrieve_post_video):
+        post = create_post_instance()
+        upload = SimpleUploadedFile("clip.mp4", make_mp4(), content_type="video/mp4")
+
+        response = upload_post_video(post.id, {'video': upload})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert (response.data['duration'], response.data['width'], response.data['height'], response.data['codec']) == (3.0, 640, 360, 'avc1')
+
+    def test_unparsable_video_has_no_metadata(self, create_post_video_instance):
+        video = create_post_video_instance()
+        assert video.duration is None and video.codec == ''
+
+    def test_chunked_upload_stores_metadata(self, create_post_instance, start_upload, put_chunk, finalize_upload):
+        post = create_post_instance()
+        payload = make_mp4(duration_seconds=7)
+        upload = start_upload(post.id, {'filename': 'clip.mov', 'size': len(payload)}).data
+        put_chunk(post.id, upload['id'], payload, 0, len(payload))
+
+        response = finalize_upload(post.id, upload['id'])
+
+        assert response.data['duration'] == 7.0
@@ -0,0 +1,61 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient
+from model_bakery import baker
+
+from blog import queries
+from blog.models import Author, Follow
+
+
+@pytest.fixture
+def create_followers():
+    def do_create_followers(author, count):
+        baker.make(get_user_model(), _quantity=count)
+        followers = Author.objects.exclude(pk=author.pk)
+        Follow.objects.bulk_create(Follow(from_author=follower, to_author=author) for follower in followers)
+    return do_create_followers
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+    def test_followers_run_no_query_per_follower(self, api_client, authenticate, create_followers, query_budget):
+        author = authenticate().author
+        create_followers(author, 5)
+
+        with query_budget(endpoint='FollowViewSet.followers', allow_duplicates=False):
+            response = api_client.get('/blog/followers/')
+
+        assert len(response.data['results']) == 5
+
+    def test_repeated_query_is_reported_with_call_site(self, authenticate, query_budget):
+        for _ in range(3):
+            authenticate()
+
+        with pytest.raises(queries.QueryBudgetExceeded) as error:
+            with query_budget(allow_duplicates=False):
+                [author.user.username for author in Author.objects.all()]
+
+        assert '3x at blog/tests/test_query_budget.py' in str(error.value)
+
+    def test_summary_header_names_the_view_action(self, api_client, create_post_instance):
+        post = create_post_instance()
+        response = api_client.get(f'/blog/posts/{post.id}/')
+        assert response[queries.HEADER].startswith('endpoint=PostViewSet.retrieve; count=2;')
+
+    def test_async_requests_are_recorded(self, create_post_instance):
+        post = create_post_instance()
+        response = async_to_sync(AsyncClient().get)(f'/blog/posts/{post.id}/')
+        assert response[queries.HEADER].startswith('endpoint=PostViewSet.retrieve; count=2;')
+
+    def test_strict_mode_fails_requests_over_budget(self, api_client, create_post_instance, monkeypatch):
+        monkeypatch.setattr(queries, 'BUDGETS', {'PostViewSet.retrieve': 0})
+        post = create_post_instance()
+        with pytest.raises(queries.QueryBudgetExceeded):
+            api_client.get(f'/blog/posts/{post.id}/')
+
+    def test_unsampled_requests_are_not_recorded(self, api_client, create_post_instance, monkeypatch):
+        monkeypatch.setattr(queries, 'SAMPLE_RATE', 0)
+        post = create_post_instance()
+        response = api_client.get(f'/blog/posts/{post.id}/')
+        assert queries.HEADER not in response
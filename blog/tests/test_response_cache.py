@@ -0,0 +1,83 @@
+import pytest
+from model_bakery import baker
+from rest_framework import status
+
+from blog.cache import get_generations, invalidate
+from blog.models import Comment
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+    def test_second_request_is_served_from_cache(self, api_client, create_post_instance, django_assert_num_queries):
+        post = create_post_instance(status='P')
+        api_client.logout()
+        assert api_client.get(f'/blog/posts/{post.id}/')['X-Cache'] == 'MISS'
+
+        # Only the conditional GET validators are read.
+        with django_assert_num_queries(1):
+            response = api_client.get(f'/blog/posts/{post.id}/')
+
+        assert response['X-Cache'] == 'HIT'
+        assert response.data['id'] == post.id
+
+    def test_invalidation_is_repeated_on_commit(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            invalidate('posts')
+            # The generations a concurrent reader would cache under before the commit.
+            generations = get_generations(['posts'])
+
+        assert get_generations(['posts']) != generations
+
+    def test_query_params_are_part_of_the_key(self, api_client, create_post_instance):
+        create_post_instance(status='P')
+        api_client.get('/blog/posts/')
+        response = api_client.get('/blog/posts/', {'status': 'D'})
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['results'] == []
+
+    def test_host_and_scheme_are_part_of_the_key(self, api_client, create_post_instance, settings):
+        settings.ALLOWED_HOSTS = ['testserver', 'other.example']
+        create_post_instance(status='P')
+        create_post_instance(status='P')
+        api_client.get('/blog/posts/', {'page_size': 1})
+
+        response = api_client.get('/blog/posts/', {'page_size': 1}, HTTP_HOST='other.example')
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['next'].startswith('http://other.example/')
+        response = api_client.get('/blog/posts/', {'page_size': 1}, secure=True)
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['next'].startswith('https://testserver/')
+
+    def test_child_changes_invalidate_post(self, api_client, create_post_instance):
+        post = create_post_instance(status='P')
+        api_client.get(f'/blog/posts/{post.id}/')
+        api_client.get('/blog/posts/')
+
+        baker.make(Comment, post=post, owner=post.owner)
+
+        response = api_client.get(f'/blog/posts/{post.id}/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['comments_count'] == 1
+        assert api_client.get('/blog/posts/').data['results'][0]['comments_count'] == 1
+
+    def test_author_update_invalidates_author(self, api_client, authenticate):
+        user = authenticate()
+        api_client.get(f'/blog/authors/{user.author.id}/')
+
+        api_client.put('/blog/authors/me/', {'bio': 'updated'})
+
+        response = api_client.get(f'/blog/authors/{user.author.id}/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['bio'] == 'updated'
+
+    def test_only_admin_can_view_stats(self, api_client, authenticate):
+        user = authenticate()
+        assert api_client.get('/blog/cache/stats/').status_code == status.HTTP_403_FORBIDDEN
+
+        user.is_staff = True
+        user.save()
+        api_client.get(f'/blog/authors/{user.author.id}/')
+        api_client.get(f'/blog/authors/{user.author.id}/')
+
+        response = api_client.get('/blog/cache/stats/')
+        assert response.data == {'authors.retrieve.hit': 1, 'authors.retrieve.miss': 1}
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from blog import renderers
+from blog.models import Follow
+from blog.renderers import StreamingJSONRenderer
+
+STREAM = StreamingJSONRenderer.media_type
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(renderers, 'CHUNK_SIZE', 2)
+
+
+def streamed(response):
+    assert response.streaming
+    return list(response.streaming_content)
+
+
+@pytest.mark.django_db
+class TestStreamingList:
+    def test_posts_stream_every_page_in_order(self, api_client, create_post_instance, small_chunks):
+        for _ in range(5):
+            create_post_instance(status='P', published_date=timezone.now())
+        api_client.force_authenticate(user=None)
+        first = api_client.get('/blog/posts/', {'page_size': 3}).data
+        pages = first['results'] + api_client.get(first['next']).data['results']
+
+        response = api_client.get('/blog/posts/', HTTP_ACCEPT=STREAM)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == STREAM
+        chunks = streamed(response)
+        assert len(chunks) == 3
+        assert json.loads(b''.join(chunks)) == pages
+
+    def test_format_parameter_and_filters(self, api_client, create_post_instance):
+        create_post_instance(status='P')
+        create_post_instance(status='D')
+
+        response = api_client.get('/blog/posts/', {'format': 'json-stream', 'status': 'D'})
+
+        assert [post['status'] for post in json.loads(b''.join(streamed(response)))] == ['D']
+
+    def test_empty_and_exact_chunks_are_valid_json(self, api_client, authenticate, small_chunks):
+        authenticate()
+        assert b''.join(streamed(api_client.get('/blog/followers/', HTTP_ACCEPT=STREAM))) == b'[]'
+        authenticate()
+        assert len(json.loads(b''.join(streamed(api_client.get('/blog/authors/', HTTP_ACCEPT=STREAM))))) == 2
+
+    def test_followers_stream(self, api_client, authenticate):
+        followed = authenticate().author
+        follower = authenticate().author
+        Follow.objects.create(from_author=follower, to_author=followed)
+        api_client.force_authenticate(user=followed.user)
+
+        response = api_client.get('/blog/followers/', HTTP_ACCEPT=STREAM)
+
+        assert [author['id'] for author in json.loads(b''.join(streamed(response)))] == [follower.id]
+
+    def test_other_responses_are_not_streamed(self, api_client, create_post_instance):
+        post = create_post_instance()
+        response = api_client.get(f'/blog/posts/{post.id}/', HTTP_ACCEPT=STREAM)
+        assert not response.streaming
+        assert json.loads(response.content)['id'] == post.id
+
+        response = api_client.get('/blog/posts/999999/', HTTP_ACCEPT=STREAM)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_json_stays_the_default(self, api_client, create_post_instance):
+        create_post_instance()
+        response = api_client.get('/blog/posts/')
+        assert response['Content-Type'] == 'application/json'
+        assert 'results' in response.data
+
+
+class TestEncoders:
+    @pytest.mark.parametrize('encoder', ['json', 'orjson'])
+    def test_output_matches_the_json_renderer(self, encoder):
+        if encoder == 'orjson':
+            pytest.importorskip('orjson')
+        rows = [{'id': 1, 'title': 'Café\u2028"quoted"', 'score': 1.5, 'tags': ['a'], 'image': None}, {}]
+        renderer = StreamingJSONRenderer(encoder)
+
+        assert b''.join(renderer.stream(iter(rows), dict, chunk_size=1)) == JSONRenderer().render(rows)
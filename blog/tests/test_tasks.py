@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from model_bakery import baker
+
+from blog.models import Task, TimelineEntry
+from blog import workers
+from blog.tasks import claim_tasks, enqueue, purge_finished_tasks, record_result, run_pending_tasks
+
+calls = []
+
+
+def record_call(*args, **kwargs):
+    calls.append((args, kwargs))
+
+
+def always_fail():
+    raise RuntimeError('boom')
+
+
+RECORD_CALL = f'{__name__}.record_call'
+ALWAYS_FAIL = f'{__name__}.always_fail'
+
+
+@pytest.fixture(autouse=True)
+def queue_tasks(settings):
+    settings.BLOG_TASKS_EAGER = False
+    calls.clear()
+
+
+@pytest.mark.django_db
+class TestTaskQueue:
+    def test_enqueue_stores_task_until_run(self):
+        enqueue(RECORD_CALL, 1, 'a', flag=True)
+        assert calls == []
+
+        [task] = run_pending_tasks()
+
+        assert calls == [((1, 'a'), {'flag': True})]
+        task.refresh_from_db()
+        assert (task.status, task.attempts) == ('D', 1)
+        assert task.duration_ms is not None
+
+    def test_failed_task_is_retried_with_backoff(self):
+        task = enqueue(ALWAYS_FAIL)
+        run_pending_tasks()
+
+        task.refresh_from_db()
+        assert (task.status, task.attempts) == ('Q', 1)
+        assert task.available_at > timezone.now()
+        assert 'RuntimeError' in task.last_error
+        assert run_pending_tasks() == []
+
+    def test_task_fails_after_last_attempt(self):
+        task = baker.make(Task, name=ALWAYS_FAIL, attempts=2, max_attempts=3)
+        run_pending_tasks()
+        task.refresh_from_db()
+        assert (task.status, task.attempts) == ('F', 3)
+
+    def test_expired_claim_is_taken_over(self):
+        task = enqueue(RECORD_CALL)
+        [claimed] = claim_tasks(10)
+        assert claim_tasks(10) == []
+
+        Task.objects.filter(pk=task.pk).update(available_at=timezone.now() - timedelta(seconds=1))
+        [retaken] = claim_tasks(10)
+
+        assert retaken.pk == claimed.pk
+        assert retaken.attempts == 2
+
+    def test_stale_attempt_does_not_overwrite_result(self):
+        enqueue(RECORD_CALL)
+        [stale] = claim_tasks(10)
+        Task.objects.filter(pk=stale.pk).update(available_at=timezone.now() - timedelta(seconds=1))
+        run_pending_tasks()
+
+        record_result(stale, 'late failure', 5)
+
+        assert Task.objects.get(pk=stale.pk).status == 'D'
+
+    def test_purge_deletes_only_old_finished_tasks(self):
+        old = timezone.now() - timedelta(days=2)
+        baker.make(Task, status='D', finished_at=old)
+        baker.make(Task, status='F', finished_at=old)
+        recent = baker.make(Task, status='D', finished_at=timezone.now())
+        queued = baker.make(Task, status='Q')
+
+        assert purge_finished_tasks(retention=24 * 3600, batch_size=1) == 2
+
+        assert set(Task.objects.values_list('pk', flat=True)) == {recent.pk, queued.pk}
+
+    def test_publishing_queues_fan_out(self, authenticate, create_post_instance):
+        post = create_post_instance(status='D')
+        follower = authenticate()
+        follower.author.follows.add(post.owner)
+
+        post.status = 'P'
+        post.save()
+        assert not TimelineEntry.objects.exists()
+
+        run_pending_tasks()
+        assert TimelineEntry.objects.filter(follower=follower.author, post=post).exists()
+
+
+def test_worker_closes_stale_connections_around_each_task(monkeypatch):
+    closed = []
+    monkeypatch.setattr(workers, 'close_old_connections', lambda: closed.append(len(calls)))
+
+    error, _ = workers.execute(RECORD_CALL, [1], {})
+
+    assert error is None
+    assert closed == [0, 1]
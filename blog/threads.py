@@ -0,0 +1,48 @@
+from django.db.models import Q
+
+# Each level of Comment.path is the comment id, zero padded to a fixed width,
+# so that sorting by path yields a depth-first walk of the thread and every
+# subtree is a contiguous range of the (post, path) index.
+PATH_STEP = 10
+MAX_DEPTH = 255 // PATH_STEP - 1
+
+
+def comment_path(pk, parent=None):
+    prefix = parent.path if parent is not None else ''
+    return f'{prefix}{pk:0{PATH_STEP}d}'
+
+
+def subtree_filter(comment, depth=None):
+    """
+    Match `comment` and its descendants, optionally only `depth` levels
+    below it. ':' sorts right after '9', so the prefix match is written as
+    a range the index can seek instead of a LIKE.
+    """
+    condition = Q(post_id=comment.post_id, path__gte=comment.path, path__lt=comment.path + ':')
+    if depth is not None:
+        condition &= Q(depth__lte=comment.depth + depth)
+    return condition
+
+
+def build_comment_tree(comments):
+    """
+    Link a flat list of comments into a tree in one pass.
+
+    Every comment gets a `thread_replies` list holding its children, in the
+    order they appear in `comments`. Comments whose parent is not part of the
+    list are returned as the roots.
+    """
+    comments = list(comments)
+    by_id = {}
+    for comment in comments:
+        comment.thread_replies = []
+        by_id[comment.id] = comment
+
+    roots = []
+    for comment in comments:
+        parent = by_id.get(comment.parent_id)
+        if parent is None:
+            roots.append(comment)
+        else:
+            parent.thread_replies.append(comment)
+    return roots
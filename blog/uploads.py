@@ -0,0 +1,109 @@
+import os
+import re
+import shutil
+from types import SimpleNamespace
+
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+
+from blog.mediainfo import video_metadata
+from blog.models import PostVideo
+
+# Chunks larger than this are refused, so no single request body (and no
+# worker) has to deal with a whole video.
+MAX_CHUNK_SIZE = 5 * 1024 * 1024
+COPY_BUFFER_SIZE = 64 * 1024
+UPLOADS_DIR = 'blog/post_videos/uploads'
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadConflict(Exception):
+    """The chunk does not start where the upload currently ends."""
+
+
+def validate_video(filename, size):
+    """
+    Run the validators of `PostVideo.video` against the announced file, so
+    oversized or unsupported uploads are refused before any byte is stored.
+    """
+    field = PostVideo._meta.get_field('video')
+    field.run_validators(SimpleNamespace(name=filename, size=size))
+
+
+def parse_content_range(header, upload):
+    """
+    Return `(start, length)` of a `Content-Range: bytes start-end/total`
+    header, checked against the announced size of `upload`.
+    """
+    match = CONTENT_RANGE_RE.match(header or '')
+    if match is None:
+        raise ValidationError('A "Content-Range: bytes start-end/total" header is required.')
+    start, end, total = (int(value) for value in match.groups())
+    if total != upload.size:
+        raise ValidationError(f'The total size must be {upload.size} bytes.')
+    if end < start or end >= total:
+        raise ValidationError('The byte range is not valid.')
+    if end - start + 1 > MAX_CHUNK_SIZE:
+        raise ValidationError(f'Chunks cannot exceed {MAX_CHUNK_SIZE} bytes.')
+    return start, end - start + 1
+
+
+def partial_path(upload):
+    return default_storage.path(f'{UPLOADS_DIR}/{upload.pk}.part')
+
+
+def write_chunk(upload, stream, start, length):
+    """
+    Append one chunk to the partial file of `upload` straight from the
+    request stream. The caller holds a row lock on `upload`.
+    """
+    if start != upload.offset:
+        raise UploadConflict()
+
+    path = partial_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'ab') as partial:
+        partial.truncate(upload.offset)
+        remaining = length
+        while remaining:
+            block = stream.read(min(COPY_BUFFER_SIZE, remaining))
+            if not block:
+                break
+            partial.write(block)
+            remaining -= len(block)
+    if remaining:
+        # The connection dropped mid-chunk: keep only what was acknowledged.
+        os.truncate(path, upload.offset)
+        raise ValidationError('The chunk is shorter than its Content-Range.')
+
+    upload.offset += length
+    upload.save(update_fields=['offset', 'updated_at'])
+
+
+def finalize(upload):
+    """
+    Move the completed partial file to its final place and create the
+    PostVideo pointing at it, without copying the bytes again.
+    """
+    if upload.offset != upload.size:
+        raise UploadConflict()
+
+    field = PostVideo._meta.get_field('video')
+    name = default_storage.get_available_name(field.generate_filename(None, upload.filename))
+    destination = default_storage.path(name)
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    shutil.move(partial_path(upload), destination)
+
+    with default_storage.open(name) as stored:
+        metadata = video_metadata(stored)
+    video = PostVideo.objects.create(post_id=upload.post_id, video=name, caption=upload.caption, **metadata)
+    upload.delete()
+    return video
+
+
+def discard(upload):
+    try:
+        os.remove(partial_path(upload))
+    except FileNotFoundError:
+        pass
+    upload.delete()
@@ -11,13 +11,19 @@ post_router = routers.NestedDefaultRouter(router, 'posts', lookup='post')
 post_router.register('comments', views.CommentViewSet, basename='post-comment')
 post_router.register('images', views.PostImageViewSet, basename='post-image')
 post_router.register('videos', views.PostVideoViewSet, basename='post-video')
+post_router.register('video-uploads', views.VideoUploadViewSet, basename='post-video-upload')
 
 
 
 
 urlpatterns = [
+    path('follow/bulk/', views.FollowViewSet.as_view({'post': 'bulk_follow'}), name='bulk-follow'),
+    path('unfollow/bulk/', views.FollowViewSet.as_view({'post': 'bulk_unfollow'}), name='bulk-unfollow'),
     path('follow/<int:pk>/', views.FollowViewSet.as_view({'post': 'follow'}), name='follow'),
     path('unfollow/<int:pk>/', views.FollowViewSet.as_view({'delete': 'unfollow'}), name='unfollow'),
     path('followers/', views.FollowViewSet.as_view({'get': 'followers'}), name='followers'),
     path('followings/', views.FollowViewSet.as_view({'get': 'followings'}), name='followings'),
+    path('feed/', views.FeedViewSet.as_view({'get': 'list'}), name='feed'),
+    path('export/<str:table>/', views.ExportViewSet.as_view({'get': 'retrieve'}), name='export'),
+    path('cache/stats/', views.CacheStatsViewSet.as_view({'get': 'list'}), name='cache-stats'),
     ] + router.urls + post_router.urls 
\ No newline at end of file
@@ -1,27 +1,47 @@
-from django.db import transaction
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
-from django.db.models import Count
+from django.db.models import Exists, OuterRef
 from rest_framework.viewsets import ModelViewSet
-from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.filters import SearchFilter, OrderingFilter
-from rest_framework.viewsets import ViewSet
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.viewsets import GenericViewSet, ViewSet
+from rest_framework.mixins import CreateModelMixin, DestroyModelMixin, RetrieveModelMixin
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .filters import PostFilter
-from .pagination import DefaultPaginationClass
+from .filters import FullTextSearchFilter, PostFilter, RelevanceOrderingFilter
+from .cache import CachedResponseMixin, stats as cache_stats
+from .compiled import CompiledListMixin, CompiledSerializer
+from .conditional import ConditionalGetMixin
+from .exports import TABLES as EXPORT_TABLES, export_table, filename as export_filename, parse_watermark
+from .counters import adjust_follow_counters
+from .feed import backfill_timeline, feed_sources, trim_timeline
+from .imports import FORMATS as IMPORT_FORMATS, detect_format, import_posts, read_rows
+from .negotiation import IgnoreClientContentNegotiation
+from .ownership import resolve_ownership
+from .pagination import DefaultPaginationClass, FeedPaginationClass, KeysetPaginationClass
 from .permissions import DenyUpdateExceptMe, IsOwner, IsPostOwnerOrReadOnly
-from .serializers import AuthorSerializer, CommentSerializer, PostImageSerializer, PostSerializer, PostVideoSerializer, SimpleAuthorSerializer
-from .models import Author, Comment, Post, PostImage, PostVideo
+from .renderers import ColumnsRenderer, CSVRenderer, JSONLinesRenderer, StreamingListMixin, chunked_response, is_streaming
+from .serializers import AuthorSerializer, BulkFollowSerializer, CommentSerializer, PostImageSerializer, PostSerializer, PostVideoSerializer, SimpleAuthorSerializer, VideoUploadSerializer
+from .models import Author, Comment, Follow, Post, PostImage, PostVideo, VideoUpload
+from .ranges import serve_file
+from .slugs import post_id_for_slug
+from .threads import build_comment_tree, subtree_filter
+from .uploads import UploadConflict, discard as discard_upload, finalize as finalize_upload, parse_content_range, write_chunk
 
 
 
 
 
-class AuthorViewSet(ModelViewSet):
-    queryset = Author.objects.select_related('user').prefetch_related('followed_by').all()
+class AuthorViewSet(ConditionalGetMixin, StreamingListMixin, CachedResponseMixin, CompiledListMixin, ModelViewSet):
+    cache_scope = 'authors'
+    queryset = Author.objects.select_related('user').prefetch_related('followed_by').order_by('id')
     serializer_class = AuthorSerializer
     http_method_names = ['get', 'put', 'option', 'head']
     pagination_class = DefaultPaginationClass
@@ -39,7 +59,7 @@ class AuthorViewSet(ModelViewSet):
     
     @action(detail=False, methods=['GET', 'PUT'])
     def me(self, request):
-        author = request.user.author
+        author = get_object_or_404(Author.objects.select_related('user'), pk=resolve_ownership(request).author_id)
 
         if request.method == 'GET':
             serializer = AuthorSerializer(author)
@@ -54,39 +74,87 @@ class AuthorViewSet(ModelViewSet):
     
    
     
-class PostViewSet(ModelViewSet):
-    queryset = Post.objects.annotate(
-                    comments_count=Count('comments'),
-                    images_count=Count('images'),
-                    videos_count=Count('videos'))
+class PostViewSet(ConditionalGetMixin, StreamingListMixin, CachedResponseMixin, CompiledListMixin, ModelViewSet):
+    cache_scope = 'posts'
+    queryset = Post.objects.all()
     serializer_class = PostSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    pagination_class = KeysetPaginationClass
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RelevanceOrderingFilter]
     ordering_fields = ['published_date', 'updated_at']
-    search_fields = ['title', 'body']
     filterset_class = PostFilter
     
    
     
     
-    def get_serializer_context(self):
-        return {'user_id': self.request.user.id}
-    
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'retrieve_by_slug']:
             return [AllowAny()]
         return [IsAuthenticated(), IsOwner()]
 
+    @action(detail=False, methods=['GET'], url_path=r'slug/(?P<slug>[-\w]+)')
+    def retrieve_by_slug(self, request, slug):
+        """`retrieve` of the post with `slug`, found through the cached slug to id map."""
+        post_id = post_id_for_slug(slug)
+        if post_id is None:
+            raise NotFound()
+        self.kwargs = {self.lookup_url_kwarg or self.lookup_field: str(post_id)}
+        return self.retrieve(request, **self.kwargs)
+
+    def perform_create(self, serializer):
+        serializer.save(owner_id=resolve_ownership(self.request).author_id)
 
+    @action(detail=False, methods=['POST'], url_path='import', parser_classes=[MultiPartParser])
+    def import_posts(self, request):
+        """
+        Create the caller's posts from an uploaded JSONL or CSV `file`, read
+        as a stream. Answers with the number of rows read, created and
+        failed, and the errors of the failed rows by line.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': ['No file was submitted.']})
+        format = request.data.get('format') or detect_format(upload.name, upload.content_type)
+        if format not in IMPORT_FORMATS:
+            raise ValidationError({'format': [f'Expected one of {", ".join(IMPORT_FORMATS)}.']})
+        report = import_posts(read_rows(upload, format), owner_id=resolve_ownership(request).author_id)
+        return Response(report)
 
-class CommentViewSet(ModelViewSet):
-    queryset = Comment.objects\
-                        .select_related('owner', 'post', 'parent') \
-                        .prefetch_related('replies').all()
+
+
+class CommentViewSet(ConditionalGetMixin, ModelViewSet):
     serializer_class = CommentSerializer
     filter_backends = [OrderingFilter]
     ordering_fields = ['created_at']
+    ordering = ['path']
     
-        
+    def get_queryset(self):
+        return Comment.objects.filter(post_id=self.kwargs['post_pk'])
+
+    def get_depth(self):
+        depth = self.request.query_params.get('depth')
+        if depth is None:
+            return None
+        if not depth.isdigit():
+            raise ValidationError({'depth': 'Must be a non-negative integer.'})
+        return int(depth)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, self.list_thread, *args, **kwargs)
+
+    def list_thread(self, request, *args, **kwargs):
+        comments = self.filter_queryset(self.get_queryset())
+        depth = self.get_depth()
+        if depth is not None:
+            comments = comments.filter(depth__lte=depth)
+        serializer = self.get_serializer(build_comment_tree(comments), many=True)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        comment = self.get_object()
+        subtree = self.filter_queryset(Comment.objects.filter(subtree_filter(comment, self.get_depth())))
+        root, = build_comment_tree(subtree)
+        serializer = self.get_serializer(root)
+        return Response(serializer.data)
     
     def get_permissions(self):
         if self.request.method in SAFE_METHODS:
@@ -94,69 +162,187 @@ class CommentViewSet(ModelViewSet):
         return [IsAuthenticated(), IsOwner()]
     
     def get_serializer_context(self):
-        return {'post_id': self.kwargs['post_pk'],
-                'user_id': self.request.user.id}
+        return {'post_id': self.kwargs['post_pk']}
 
+    def perform_create(self, serializer):
+        serializer.save(owner_id=resolve_ownership(self.request, self.kwargs['post_pk']).author_id)
 
-class FollowViewSet(ViewSet):
+
+class FollowViewSet(StreamingListMixin, ViewSet):
     permission_classes = [IsAuthenticated]
     
     @action(detail=True, methods=['post'], url_path='follows', permission_classes=[IsAuthenticated])
     def follow(self, request, pk=None):
         with transaction.atomic():
             author_to_follow = get_object_or_404(Author, pk=pk)
-            user_author = request.user.author  # assuming `request.user` has a related `author` object
+            author_id = self.lock_follower(request)
 
-            if author_to_follow == user_author:
+            if author_to_follow.pk == author_id:
                 return Response({'status': "You can't follow yourself."}, status=status.HTTP_403_FORBIDDEN)
 
-            if not user_author.follows.filter(pk=author_to_follow.pk).exists():
-                user_author.follows.add(author_to_follow)
-                user_author.following_count += 1
-                author_to_follow.follower_count += 1
-
-                user_author.save(update_fields=['following_count'])
-                author_to_follow.save(update_fields=['follower_count'])
-
-                return Response({'status': 'followed'}, status=status.HTTP_201_CREATED)
+            # The unique (from_author, to_author) constraint decides who wins
+            # a concurrent double follow, so the counters move only once.
+            try:
+                with transaction.atomic():
+                    Follow.objects.create(from_author_id=author_id, to_author=author_to_follow)
+            except IntegrityError:
+                return Response({'status': 'already following'}, status=status.HTTP_409_CONFLICT)
 
-            return Response({'status': 'already following'}, status=status.HTTP_409_CONFLICT)
+            adjust_follow_counters(author_id, [author_to_follow.pk], 1)
+            backfill_timeline(author_id, [author_to_follow])
+            return Response({'status': 'followed'}, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['delete'], url_path='unfollow', permission_classes=[IsAuthenticated])
     def unfollow(self, request, pk=None):
         with transaction.atomic():
             author_to_unfollow = get_object_or_404(Author, pk=pk)
-            user_author = request.user.author
+            author_id = self.lock_follower(request)
 
-            if user_author.follows.filter(pk=author_to_unfollow.pk).exists():
-                user_author.follows.remove(author_to_unfollow)
-                user_author.following_count -= 1
-                author_to_unfollow.follower_count -= 1
+            deleted, _ = Follow.objects.filter(from_author_id=author_id, to_author=author_to_unfollow).delete()
+            if not deleted:
+                return Response({'status': 'not following'}, status=status.HTTP_404_NOT_FOUND)
 
-                user_author.save(update_fields=['following_count'])
-                author_to_unfollow.save(update_fields=['follower_count'])
+            adjust_follow_counters(author_id, [author_to_unfollow.pk], -1)
+            trim_timeline(author_id, [author_to_unfollow.pk])
+            return Response({'status': 'unfollowed'}, status=status.HTTP_200_OK)
 
-                return Response({'status': 'unfollowed'}, status=status.HTTP_200_OK)
+    def lock_follower(self, request):
+        """
+        Lock the caller's author row and return its id. Follow changes of one
+        author then run one at a time, so the edges read by a bulk request
+        stay true until it commits and the counters move once per edge.
+        """
+        author_id = resolve_ownership(request).author_id
+        list(Author.objects.select_for_update().filter(pk=author_id).values_list('pk', flat=True))
+        return author_id
 
-            return Response({'status': 'not following'}, status=status.HTTP_404_NOT_FOUND)
+    def get_bulk_targets(self, request):
+        serializer = BulkFollowSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        author_ids = serializer.validated_data['author_ids']
+        author_id = self.lock_follower(request)
+        # One query tells which ids exist and which of them are followed already.
+        authors = Author.objects.filter(pk__in=author_ids).annotate(
+            is_followed=Exists(Follow.objects.filter(from_author_id=author_id, to_author=OuterRef('pk'))))
+        return author_id, author_ids, {author.pk: author for author in authors}
+
+    @action(detail=False, methods=['post'], url_path='bulk', permission_classes=[IsAuthenticated])
+    def bulk_follow(self, request):
+        with transaction.atomic():
+            user_author_id, author_ids, authors = self.get_bulk_targets(request)
+            statuses = {}
+            to_follow = []
+            for author_id in author_ids:
+                author = authors.get(author_id)
+                if author is None:
+                    statuses[author_id] = 'not found'
+                elif author_id == user_author_id:
+                    statuses[author_id] = "You can't follow yourself."
+                elif author.is_followed:
+                    statuses[author_id] = 'already following'
+                else:
+                    statuses[author_id] = 'followed'
+                    to_follow.append(author)
+
+            Follow.objects.bulk_create(
+                [Follow(from_author_id=user_author_id, to_author=author) for author in to_follow],
+                ignore_conflicts=True,
+            )
+            adjust_follow_counters(user_author_id, [author.pk for author in to_follow], 1)
+            backfill_timeline(user_author_id, to_follow)
+            return Response({'statuses': statuses}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='bulk', permission_classes=[IsAuthenticated])
+    def bulk_unfollow(self, request):
+        with transaction.atomic():
+            user_author_id, author_ids, authors = self.get_bulk_targets(request)
+            statuses = {}
+            to_unfollow = []
+            for author_id in author_ids:
+                author = authors.get(author_id)
+                if author is None:
+                    statuses[author_id] = 'not found'
+                elif not author.is_followed:
+                    statuses[author_id] = 'not following'
+                else:
+                    statuses[author_id] = 'unfollowed'
+                    to_unfollow.append(author_id)
+
+            Follow.objects.filter(from_author_id=user_author_id, to_author_id__in=to_unfollow).delete()
+            adjust_follow_counters(user_author_id, to_unfollow, -1)
+            trim_timeline(user_author_id, to_unfollow)
+            return Response({'statuses': statuses}, status=status.HTTP_200_OK)
     
-    @action(detail=False, methods=['GET'], permission_classes=[IsAuthenticated])
-    def followers(self, request):
-        author = Author.objects.get(user=request.user)
+    def get_authors(self, relation):
+        """Authors following the caller (`follows`) or followed by them (`followed_by`)."""
+        authors = Author.objects.filter(**{relation: resolve_ownership(self.request).author_id})
+        return authors.select_related('user').order_by('id')
+
+    def list_authors(self, request, relation):
+        authors = self.get_authors(relation)
+        if is_streaming(request):
+            serializer = CompiledSerializer(SimpleAuthorSerializer(context={'request': request}))
+            return self.stream_queryset(authors, serializer)
         paginator = DefaultPaginationClass()
-        result_page = paginator.paginate_queryset(author.followed_by.all(), request)
+        result_page = paginator.paginate_queryset(authors, request)
         serializer = SimpleAuthorSerializer(result_page, many=True, context={'request': request})
         return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['GET'], permission_classes=[IsAuthenticated])
+    def followers(self, request):
+        return self.list_authors(request, 'follows')
     
     @action(detail=False, methods=['GET'], permission_classes=[IsAuthenticated])
     def followings(self, request):
-        author = Author.objects.get(user=request.user)
-        paginator = DefaultPaginationClass()
-        result_page = paginator.paginate_queryset(author.follows.all(), request)
-        serializer = SimpleAuthorSerializer(result_page, many=True, context={'request': request})
+        return self.list_authors(request, 'followed_by')
+
+
+class FeedViewSet(ViewSet):
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        paginator = FeedPaginationClass()
+        result_page = paginator.paginate_sources(feed_sources(resolve_ownership(request).author_id), Post.objects.all(), request)
+        serializer = PostSerializer(result_page, many=True, context={'request': request})
         return paginator.get_paginated_response(serializer.data)
 
 
+class CacheStatsViewSet(ViewSet):
+    permission_classes = [IsAdminUser]
+
+    def list(self, request):
+        return Response(dict(sorted(cache_stats.items())))
+
+
+class ExportViewSet(ViewSet):
+    permission_classes = [IsAdminUser]
+    renderer_classes = [JSONLinesRenderer, CSVRenderer, ColumnsRenderer]
+
+    def retrieve(self, request, table):
+        """
+        Stream every row of `table` as JSON lines, CSV or column chunks
+        (`?format=`), resuming after the row given by `after_<key>`
+        parameters, such as `after_updated_at` and `after_id`. Rows in the
+        overlap before `after_updated_at` are sent again.
+        """
+        if table not in EXPORT_TABLES:
+            raise NotFound(f'Tables: {", ".join(EXPORT_TABLES)}.')
+        try:
+            watermark = parse_watermark(table, {key: request.query_params.get(f'after_{key}')
+                                                for key in EXPORT_TABLES[table].keys})
+        except DjangoValidationError as error:
+            raise ValidationError({'watermark': error.messages})
+        format = request.accepted_renderer.format
+        response = chunked_response(request, export_table(table, format, watermark))
+        response['Content-Disposition'] = f'attachment; filename="{export_filename(table, format)}"'
+        return response
+
+    def handle_exception(self, exc):
+        # Errors are answered in JSON, whichever export format was asked for.
+        self.request.accepted_renderer, self.request.accepted_media_type = JSONRenderer(), JSONRenderer.media_type
+        return super().handle_exception(exc)
+
+
 class PostImageViewSet(ModelViewSet):
     serializer_class = PostImageSerializer
     permission_classes = [IsPostOwnerOrReadOnly]
@@ -180,5 +366,55 @@ class PostVideoViewSet(ModelViewSet):
     def get_serializer_context(self):
         return {'post_id': self.kwargs.get('post_pk')}
 
-    
-    
+    @action(detail=True, methods=['get'], content_negotiation_class=IgnoreClientContentNegotiation)
+    def stream(self, request, *args, **kwargs):
+        return serve_file(request, self.get_object().video)
+
+
+class VideoUploadViewSet(CreateModelMixin, RetrieveModelMixin, DestroyModelMixin, GenericViewSet):
+    """
+    Resumable, chunked video uploads: create a session, PUT the bytes in
+    chunks with a Content-Range header, then finalize it into a PostVideo.
+    GET returns the current offset to resume from after a dropped connection.
+    """
+    serializer_class = VideoUploadSerializer
+    permission_classes = [IsPostOwnerOrReadOnly]
+
+    def get_queryset(self):
+        ownership = resolve_ownership(self.request, self.kwargs.get('post_pk'))
+        return VideoUpload.objects.filter(post_id=self.kwargs.get('post_pk'), owner_id=ownership.author_id)
+
+    def get_serializer_context(self):
+        return {'post_id': self.kwargs.get('post_pk')}
+
+    def perform_create(self, serializer):
+        serializer.save(owner_id=resolve_ownership(self.request, self.kwargs.get('post_pk')).author_id)
+
+    def conflict(self, upload):
+        return Response({'status': 'offset mismatch', 'offset': upload.offset},
+                        status=status.HTTP_409_CONFLICT, headers={'Upload-Offset': str(upload.offset)})
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            upload = get_object_or_404(self.get_queryset().select_for_update(), pk=kwargs['pk'])
+            try:
+                start, length = parse_content_range(request.headers.get('Content-Range'), upload)
+                write_chunk(upload, request.stream, start, length)
+            except DjangoValidationError as error:
+                raise ValidationError({'detail': error.messages})
+            except UploadConflict:
+                return self.conflict(upload)
+        return Response(self.get_serializer(upload).data, headers={'Upload-Offset': str(upload.offset)})
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, *args, **kwargs):
+        with transaction.atomic():
+            upload = get_object_or_404(self.get_queryset().select_for_update(), pk=kwargs['pk'])
+            try:
+                video = finalize_upload(upload)
+            except UploadConflict:
+                return self.conflict(upload)
+        return Response(PostVideoSerializer(video, context={'request': request}).data, status=status.HTTP_201_CREATED)
+
+    def perform_destroy(self, instance):
+        discard_upload(instance)
@@ -0,0 +1,36 @@
+"""
+Entry points of the `run_tasks` worker processes. They are pickled by
+reference into freshly spawned interpreters, so this module must not
+import models before `setup` has run.
+"""
+import time
+import traceback
+
+import django
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+
+def setup():
+    django.setup()
+
+
+def execute(name, args, kwargs):
+    """
+    Run one task and return `(error, duration_ms)`, where `error` is None on
+    success. Never raises, so a failing task cannot break the pool.
+
+    Workers live long, so connections the database dropped while idle, or
+    that outlived CONN_MAX_AGE, are closed around every task, as Django
+    does around every request.
+    """
+    started = time.perf_counter()
+    close_old_connections()
+    try:
+        import_string(name)(*args, **kwargs)
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+    finally:
+        close_old_connections()
+    return error, round((time.perf_counter() - started) * 1000)
@@ -2,6 +2,8 @@
 ASGI config for myblog project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests are routed with ``myblog.asgi_urls``, so the read-only blog
+endpoints are served by async views instead of running in a thread.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -9,8 +11,19 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler, ASGIRequest
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myblog.settings')
 
-application = get_asgi_application()
+
+class AsyncReadRequest(ASGIRequest):
+    urlconf = 'myblog.asgi_urls'
+
+
+class AsyncReadHandler(ASGIHandler):
+    request_class = AsyncReadRequest
+
+
+django.setup(set_prefix=False)
+application = AsyncReadHandler()
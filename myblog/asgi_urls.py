@@ -0,0 +1,12 @@
+"""
+URL configuration of ASGI requests: the async read views of the blog take
+precedence, everything else is routed as in `myblog.urls`.
+"""
+from django.urls import path, include
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('blog/', include('blog.async_urls')),
+    *sync_urlpatterns,
+]
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
+import importlib.util
 import os
 from dotenv import load_dotenv
 
@@ -45,22 +46,26 @@ INSTALLED_APPS = [
     'djoser',
     'django_filters',
     'drf_spectacular',
-    'debug_toolbar',
     'blog',
     'users'
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware'
 ]
 
+# The debug toolbar is a development aid only; it is not a dependency.
+if DEBUG and importlib.util.find_spec('debug_toolbar'):
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'myblog.urls'
 
 TEMPLATES = [
@@ -96,6 +101,58 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# LocMemCache evicts least recently used entries once MAX_ENTRIES is reached.
+# Set CACHE_URL (e.g. redis://127.0.0.1:6379/1) to share the cache between workers.
+
+if os.getenv("CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("CACHE_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+
+BLOG_RESPONSE_CACHE_ALIAS = "default"
+BLOG_RESPONSE_CACHE_TIMEOUT = 300
+
+# Background tasks are stored in the database and run by `manage.py run_tasks`.
+# BLOG_TASKS_EAGER runs them inline instead, for development without a worker.
+
+BLOG_TASKS_EAGER = os.getenv("BLOG_TASKS_EAGER") == "1"
+BLOG_TASKS_VISIBILITY_TIMEOUT = 300
+# Done and failed tasks are deleted by `run_tasks` a week after they finished.
+BLOG_TASKS_RETENTION = 7 * 24 * 3600
+
+# SQL query instrumentation by blog.middleware.QueryBudgetMiddleware: the share
+# of requests recorded, and the most queries each view action may run,
+# authentication and conditional GET validators included. Going over budget is
+# logged, or raised when strict.
+
+BLOG_QUERY_SAMPLE_RATE = float(os.getenv("BLOG_QUERY_SAMPLE_RATE", "0"))
+BLOG_QUERY_BUDGET_STRICT = DEBUG
+BLOG_QUERY_BUDGETS = {
+    "PostViewSet.list": 4,
+    "PostViewSet.retrieve": 4,
+    "PostViewSet.retrieve_by_slug": 4,
+    "CommentViewSet.list": 4,
+    "CommentViewSet.retrieve": 3,
+    "AuthorViewSet.list": 5,
+    "AuthorViewSet.retrieve": 4,
+    "FollowViewSet.followers": 4,
+    "FollowViewSet.followings": 4,
+    "FeedViewSet.list": 5,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -143,7 +200,7 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "blog.authentication.ClaimsJWTAuthentication",
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
@@ -182,5 +239,6 @@ DJOSER = {
 
 SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("JWT",),
+    "TOKEN_OBTAIN_SERIALIZER": "blog.authentication.AuthorTokenObtainPairSerializer",
 }
 